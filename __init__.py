@@ -1,20 +1,47 @@
 """
 Package initialization for WhatsApp Gemini AI Bot
 """
+import importlib
+from typing import Any
 
 # Version information
 __version__ = "2.0.0"
 __author__ = "WhatsApp Bot Team"
 __description__ = "Modular WhatsApp AI Bot using Gemini"
 
-# Import main classes for easy access
-from .config import Config
-from .models import ChatResponse, Message, ConversationMessage, BotStatus, BotStats
-from .ai_client import GeminiAIClient
-from .whatsapp_driver import WhatsAppDriver
-from .conversation_manager import ConversationManager
-from .message_processor import MessageProcessor
-from .bot_new import WhatsAppGeminiBot
+# Main classes for easy access, imported from their module on first use so
+# that importing the package does not pull in google-genai, pydantic or the
+# browser drivers
+_LAZY_EXPORTS = {
+    "Config": "config",
+    "ChatResponse": "models",
+    "Message": "models",
+    "ConversationMessage": "models",
+    "BotStatus": "models",
+    "BotStats": "models",
+    "AdvancedGeminiAIClient": "advanced_ai_client",
+    "WhatsAppDriver": "whatsapp_driver",
+    "ConversationManager": "conversation_manager",
+    "MessageProcessor": "message_processor",
+    "WhatsAppGeminiBot": "bot_new",
+}
+
+# Older name for the Gemini client
+_ALIASES = {"GeminiAIClient": "AdvancedGeminiAIClient"}
+
+def __getattr__(name: str) -> Any:
+    """Import an exported class the first time it is accessed"""
+    target = _ALIASES.get(name, name)
+    module_name = _LAZY_EXPORTS.get(target)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), target)
+    globals()[name] = value
+    return value
+
+def __dir__() -> list:
+    """Include the lazy exports in dir() and tab completion"""
+    return sorted(set(globals()) | set(__all__))
 
 __all__ = [
     "Config",
@@ -23,6 +50,7 @@ __all__ = [
     "ConversationMessage",
     "BotStatus",
     "BotStats",
+    "AdvancedGeminiAIClient",
     "GeminiAIClient",
     "WhatsAppDriver",
     "ConversationManager",
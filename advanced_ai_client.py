@@ -3,46 +3,204 @@ Advanced Gemini AI client with Google Search grounding, function calling, and we
 """
 import json
 import time
-from typing import Optional, List, Dict, Any, Callable
+import asyncio
+import inspect
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, List, Dict, Any, Callable, Tuple, Iterator, Generator
 from google import genai
 from google.genai import types
 from config import Config
 from models import ConversationMessage
+from response_cache import ResponseCache
+from context_cache import SystemInstructionCache
+from stream_chunker import StreamChunker
+from keyword_matcher import Intent, match_intents
+from text_sanitizer import sanitize_text
+from metrics import GEMINI_SECONDS, GEMINI_TOKENS
+from rate_limiter import GeminiCallGateway, Priority, current_priority, estimate_tokens
+
+# Function declarations exposed to the model on the function calling route
+FUNCTION_DECLARATIONS = [
+    {
+        "name": "get_current_time",
+        "description": "Gets the current date and time",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    },
+    {
+        "name": "get_weather",
+        "description": "Gets weather information for a location",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "location": {
+                    "type": "string",
+                    "description": "The city or location name"
+                }
+            },
+            "required": ["location"]
+        }
+    },
+]
+
+class ResponseStream:
+    """Chunks of a streamed reply; ``text`` holds the whole reply once they are consumed"""
+    
+    def __init__(self, chunks: Generator[str, None, str]):
+        self._chunks = chunks
+        self.text = ""
+    
+    def __iter__(self) -> Iterator[str]:
+        self.text = yield from self._chunks
 
 class AdvancedGeminiAIClient:
     """Advanced Gemini AI client with Google Search grounding and function calling"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, client: Optional[Any] = None):
         self.config = config
-        self.client: Optional[genai.Client] = None
+        # An injected client (e.g. gemini_stub.GeminiStubClient) replaces genai.Client
+        self.client: Optional[genai.Client] = client
         self.system_instruction = config.SYSTEM_INSTRUCTION
-        self.function_registry = {}
+        self.context_cache: Optional[SystemInstructionCache] = None
+        self.function_registry: Dict[str, Callable[..., Any]] = {}
+        # Functions without shared state that may run alongside other calls
+        self.concurrent_functions = set()
+        self.function_timeouts: Dict[str, float] = {}
+        self._function_executor = self._new_function_pool(concurrent=True)
+        # Calls that must not overlap get a pool of their own
+        self._serial_executor = self._new_function_pool(concurrent=False)
+        # Timed out calls still holding a thread, guarded by _function_lock
+        self._hung_calls = 0
+        self._function_lock = threading.Lock()
+        self.response_cache: Optional[ResponseCache] = None
+        if config.ENABLE_RESPONSE_CACHE:
+            self.response_cache = ResponseCache(
+                max_entries=config.RESPONSE_CACHE_SIZE,
+                db_path=config.RESPONSE_CACHE_DB
+            )
+        self.gateway = GeminiCallGateway(
+            requests_per_minute=config.GEMINI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=config.GEMINI_TOKENS_PER_MINUTE,
+            max_in_flight=config.GEMINI_MAX_IN_FLIGHT,
+            max_retries=config.GEMINI_MAX_RETRIES,
+            backoff_base=config.GEMINI_BACKOFF_BASE,
+            backoff_max=config.GEMINI_BACKOFF_MAX
+        )
         self._initialize_client()
         self._register_functions()
     
     def _initialize_client(self) -> None:
         """Initialize Gemini AI client"""
         try:
-            self.client = genai.Client(api_key=self.config.GEMINI_API_KEY)
+            if self.client is None:
+                self.client = genai.Client(api_key=self.config.GEMINI_API_KEY)
+            if self.config.ENABLE_CONTEXT_CACHE:
+                self.context_cache = SystemInstructionCache(
+                    self.client,
+                    model=self.config.GEMINI_MODEL,
+                    system_instruction=self.system_instruction,
+                    ttl_seconds=self.config.CONTEXT_CACHE_TTL,
+                    refresh_margin=self.config.CONTEXT_CACHE_REFRESH_MARGIN,
+                    min_tokens=self.config.CONTEXT_CACHE_MIN_TOKENS
+                )
             print("Advanced Gemini AI client initialized successfully!")
         except Exception as e:
             print(f"Error initializing Gemini AI: {e}")
             raise
     
+    def _generate_content(self, **request) -> Any:
+        """Call models.generate_content through the rate limiting gateway"""
+        response = self.gateway.call(
+            self.client.models.generate_content,
+            estimated_tokens=estimate_tokens(request.get("contents")),
+            **request
+        )
+        self._record_usage(response)
+        return response
+    
+    async def _generate_content_async(self, **request) -> Any:
+        """Call aio.models.generate_content through the rate limiting gateway"""
+        response = await self.gateway.call_async(
+            self.client.aio.models.generate_content,
+            estimated_tokens=estimate_tokens(request.get("contents")),
+            **request
+        )
+        self._record_usage(response)
+        return response
+    
+    def _generate_content_stream(self, **request) -> Iterator[Any]:
+        """Stream models.generate_content_stream through the rate limiting gateway"""
+        last_chunk = None
+        for chunk in self.gateway.call_stream(
+            self.client.models.generate_content_stream,
+            estimated_tokens=estimate_tokens(request.get("contents")),
+            **request
+        ):
+            last_chunk = chunk
+            yield chunk
+        # Only the final chunk carries the usage of the whole stream
+        if last_chunk is not None:
+            self._record_usage(last_chunk)
+    
+    def _record_usage(self, response: Any) -> None:
+        """Feed usage_metadata into the token counters and the context cache's accounting"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            GEMINI_TOKENS.inc(getattr(usage, "prompt_token_count", None) or 0, kind="prompt")
+            GEMINI_TOKENS.inc(getattr(usage, "cached_content_token_count", None) or 0, kind="cached")
+            GEMINI_TOKENS.inc(getattr(usage, "candidates_token_count", None) or 0, kind="output")
+        if self.context_cache:
+            self.context_cache.record_usage(response)
+    
+    def _simple_config(self) -> types.GenerateContentConfig:
+        """Generation config for tool-less requests
+        
+        The system instruction comes from the context cache when one is
+        live. Cached content cannot be combined with per-request tools or
+        a system instruction, so the tool routes always send it inline.
+        """
+        cache_name = self.context_cache.cache_name() if self.context_cache else None
+        if cache_name:
+            return types.GenerateContentConfig(cached_content=cache_name)
+        return types.GenerateContentConfig(system_instruction=self.system_instruction)
+    
     def _register_functions(self):
         """Register available functions for the AI to call"""
         
         # Get current time function
-        self.function_registry['get_current_time'] = self._get_current_time
+        self._register_function('get_current_time', self._get_current_time)
         
         # Get weather function (placeholder)
-        self.function_registry['get_weather'] = self._get_weather
+        self._register_function('get_weather', self._get_weather)
         
         # Search information function (using Google Search grounding)
-        self.function_registry['search_information'] = self._search_information
+        self._register_function('search_information', self._search_information,
+                                timeout=self.config.SEARCH_TIMEOUT)
+    
+    def _register_function(self, name: str, func: Callable[..., Any], concurrent: bool = True,
+                           timeout: Optional[float] = None) -> None:
+        """Expose func to the model under name
+        
+        concurrent=False keeps the function from overlapping other
+        non-concurrent calls of the same turn. timeout defaults to
+        FUNCTION_CALL_TIMEOUT. func may be a coroutine function; the
+        async path then runs it as a task instead of on the pool.
+        """
+        self.function_registry[name] = func
+        if concurrent:
+            self.concurrent_functions.add(name)
+        else:
+            self.concurrent_functions.discard(name)
+        self.function_timeouts[name] = timeout or self.config.FUNCTION_CALL_TIMEOUT
     
-    def generate_response(self, user_message: str, conversation_context: str = "") -> str:
+    def generate_response(self, user_message: str, conversation_context: str = "",
+                          priority: int = Priority.USER_REPLY) -> str:
         """Generate AI response with advanced capabilities"""
+        priority_token = current_priority.set(priority)
         try:
             print(f"Generating advanced AI response for: {user_message}")
             
@@ -50,150 +208,265 @@ class AdvancedGeminiAIClient:
             has_bengali = self._detect_bengali(user_message)
             
             # Check if this requires function calling or web search
-            if self._requires_search_or_function(user_message):
-                return self._generate_with_grounding_and_functions(user_message, conversation_context, has_bengali)
+            route = self._select_route(user_message)
+            
+            cache_key = self._response_cache_key(user_message, route, has_bengali, conversation_context)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            if cached:
+                print(f"✓ Response served from cache ({route})")
+                return cached
+            
+            start_time = time.perf_counter()
+            if route == "search":
+                response = self._generate_with_google_search(user_message, conversation_context, has_bengali)
+            elif route == "function":
+                response = self._generate_with_functions(user_message, conversation_context, has_bengali)
             else:
-                return self._generate_simple_response(user_message, conversation_context, has_bengali)
+                response = self._generate_simple_response(user_message, conversation_context, has_bengali)
+            GEMINI_SECONDS.observe(time.perf_counter() - start_time, route=route)
+            
+            self._cache_response(cache_key, route, user_message, response)
+            return response
             
         except Exception as e:
             print(f"Error generating advanced AI response: {e}")
             return self._get_fallback_response(user_message)
+        finally:
+            current_priority.reset(priority_token)
     
-    def _requires_search_or_function(self, user_message: str) -> bool:
-        """Determine if the message requires search or function calling"""
-        # Keywords that typically require search or functions
-        search_keywords = [
-            'weather', 'current', 'today', 'now', 'search', 'find', 'look up',
-            'information about', 'tell me about', 'what is', 'who is',
-            'latest', 'recent', 'update', 'news', 'time', 'date',
-            'details about', 'more about', 'explain', 'describe'
-        ]
-        
-        # Bengali equivalents
-        bengali_keywords = [
-            'আবহাওয়া', 'বর্তমান', 'আজ', 'এখন', 'খুঁজ', 'তথ্য', 'সম্পর্কে বল',
-            'কি', 'কে', 'সর্বশেষ', 'সাম্প্রতিক', 'সময়', 'তারিখ', 'বিস্তারিত'
-        ]
-        
-        message_lower = user_message.lower()
-        return any(keyword in message_lower for keyword in search_keywords + bengali_keywords)
-    
-    def _generate_with_grounding_and_functions(self, user_message: str, context: str, has_bengali: bool) -> str:
-        """Generate response using Google Search grounding OR function calling"""
+    async def generate_response_async(self, user_message: str, conversation_context: str = "",
+                                      priority: int = Priority.USER_REPLY) -> str:
+        """Async counterpart of generate_response built on the client.aio API"""
+        # Each asyncio task runs in its own context, so this only affects this call
+        current_priority.set(priority)
         try:
-            # Determine the best approach based on the query
-            if self._needs_web_search(user_message):
-                return self._generate_with_google_search(user_message, context, has_bengali)
-            elif self.config.ENABLE_FUNCTION_CALLING and self._needs_function_call(user_message):
-                return self._generate_with_functions(user_message, context, has_bengali)
+            print(f"Generating advanced AI response (async) for: {user_message}")
+            
+            has_bengali = self._detect_bengali(user_message)
+            
+            route = self._select_route(user_message)
+            
+            cache_key = self._response_cache_key(user_message, route, has_bengali, conversation_context)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            if cached:
+                print(f"✓ Response served from cache ({route})")
+                return cached
+            
+            start_time = time.perf_counter()
+            if route == "search":
+                response = await self._generate_with_google_search_async(user_message, conversation_context, has_bengali)
+            elif route == "function":
+                response = await self._generate_with_functions_async(user_message, conversation_context, has_bengali)
             else:
-                return self._generate_simple_response(user_message, context, has_bengali)
+                response = await self._generate_simple_response_async(user_message, conversation_context, has_bengali)
+            GEMINI_SECONDS.observe(time.perf_counter() - start_time, route=route)
+            
+            self._cache_response(cache_key, route, user_message, response)
+            return response
             
         except Exception as e:
-            print(f"Error in advanced response generation: {e}")
-            return self._generate_simple_response(user_message, context, has_bengali)
+            print(f"Error generating advanced AI response: {e}")
+            return self._get_fallback_response(user_message)
+    
+    def generate_response_stream(self, user_message: str, conversation_context: str = "",
+                                 priority: int = Priority.USER_REPLY) -> ResponseStream:
+        """Generate the response as a stream of sentence or paragraph sized chunks
+        
+        The search and simple routes stream from generate_content_stream; the
+        function route needs the full tool call first and yields one chunk.
+        Once iterated, the stream's ``text`` is the whole reply with its line
+        breaks, as generate_response would have returned it.
+        """
+        return ResponseStream(self._stream_at_priority(user_message, conversation_context, priority))
+    
+    def _stream_at_priority(self, user_message: str, conversation_context: str,
+                            priority: int) -> Generator[str, None, str]:
+        """Run _generate_response_stream with current_priority set"""
+        # A generator may be closed from another context, so restore instead of reset()
+        previous_priority = current_priority.get()
+        current_priority.set(priority)
+        try:
+            return (yield from self._generate_response_stream(user_message, conversation_context))
+        finally:
+            current_priority.set(previous_priority)
+    
+    def _generate_response_stream(self, user_message: str, conversation_context: str) -> Generator[str, None, str]:
+        """Body of generate_response_stream, returning the whole reply"""
+        print(f"Streaming advanced AI response for: {user_message}")
+        has_bengali = self._detect_bengali(user_message)
+        route = self._select_route(user_message)
+        
+        cache_key = self._response_cache_key(user_message, route, has_bengali, conversation_context)
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached:
+            print(f"✓ Response served from cache ({route})")
+            yield cached
+            return cached
+        
+        if route == "function":
+            response = self._generate_with_functions(user_message, conversation_context, has_bengali)
+            yield response
+            return response
+        
+        if route == "search":
+            prompt = self._create_enhanced_prompt(user_message, conversation_context, has_bengali)
+            generate_config = self._google_search_config()
+        else:
+            prompt = self._create_simple_prompt(user_message, conversation_context, has_bengali)
+            generate_config = self._simple_config()
+        
+        chunker = StreamChunker(
+            min_chars=self.config.STREAM_MIN_CHUNK_CHARS,
+            max_chunk_chars=self.config.STREAM_MAX_CHUNK_CHARS,
+            max_length=self.config.MAX_RESPONSE_LENGTH,
+            clean=self._clean_response_text
+        )
+        chunks: List[str] = []
+        # The full text keeps the line breaks the chunker cuts at, for the cache
+        streamed_text = ""
+        try:
+            stream = self._generate_content_stream(
+                model=self.config.GEMINI_MODEL,
+                contents=prompt,
+                config=generate_config
+            )
+            for piece in stream:
+                streamed_text += piece.text or ""
+                for chunk in chunker.feed(piece.text):
+                    chunks.append(chunk)
+                    yield chunk
+            for chunk in chunker.flush():
+                chunks.append(chunk)
+                yield chunk
+                
+        except Exception as e:
+            print(f"Error in streaming generation: {e}")
+            if not chunks:
+                # Nothing delivered yet, so the regular path can still answer
+                response = self._generate_simple_response(user_message, conversation_context, has_bengali)
+                yield response
+                return response
+            return self._clean_and_validate_response(streamed_text.strip(), has_bengali)
+        
+        if not chunks:
+            response = self._clean_and_validate_response("", has_bengali)
+            yield response
+            return response
+        
+        # Cache what generate_response would have returned for the same text
+        response = self._clean_and_validate_response(streamed_text.strip(), has_bengali)
+        self._cache_response(cache_key, route, user_message, response)
+        return response
+    
+    def _select_route(self, user_message: str) -> str:
+        """Pick the generation route: search, function or simple"""
+        if not self._requires_search_or_function(user_message):
+            return "simple"
+        if self._needs_web_search(user_message):
+            return "search"
+        if self.config.ENABLE_FUNCTION_CALLING and self._needs_function_call(user_message):
+            return "function"
+        return "simple"
+    
+    def _response_cache_key(self, user_message: str, route: str, has_bengali: bool,
+                            conversation_context: str = "") -> Optional[str]:
+        """Cache key for a message in its conversation, or None when its route must not be cached"""
+        if self.response_cache is None or self.config.RESPONSE_CACHE_TTL.get(route, 0) <= 0:
+            return None
+        # Very short messages ("yes", "why?") depend on the conversation, not the text
+        if len(user_message.split()) < self.config.RESPONSE_CACHE_MIN_WORDS:
+            return None
+        return ResponseCache.make_key(user_message, "bengali" if has_bengali else "english", conversation_context)
+    
+    def _cache_response(self, cache_key: Optional[str], route: str, user_message: str, response: str) -> None:
+        """Store a generated response unless it is the error fallback"""
+        if cache_key and response and response != self._get_fallback_response(user_message):
+            self.response_cache.put(cache_key, response, self.config.RESPONSE_CACHE_TTL.get(route, 0))
+    
+    def _requires_search_or_function(self, user_message: str) -> bool:
+        """Determine if the message requires search or function calling"""
+        return Intent.SEARCH_OR_FUNCTION in match_intents(user_message)
     
     def _needs_web_search(self, user_message: str) -> bool:
         """Check if message needs web search"""
-        search_indicators = [
-            'latest', 'recent', 'current', 'today', 'news', 'update', 'now',
-            'who is', 'what is', 'tell me about', 'information about',
-            'সর্বশেষ', 'সাম্প্রতিক', 'বর্তমান', 'আজ', 'এখন', 'সংবাদ', 'তথ্য'
-        ]
-        message_lower = user_message.lower()
-        return any(indicator in message_lower for indicator in search_indicators)
+        return Intent.WEB_SEARCH in match_intents(user_message)
     
     def _needs_function_call(self, user_message: str) -> bool:
         """Check if message needs function call"""
-        function_indicators = [
-            'time', 'date', 'weather', 'temperature', 'forecast',
-            'সময়', 'তারিখ', 'আবহাওয়া', 'তাপমাত্রা'
-        ]
-        message_lower = user_message.lower()
-        return any(indicator in message_lower for indicator in function_indicators)
+        return Intent.FUNCTION_CALL in match_intents(user_message)
     
     def _generate_with_google_search(self, user_message: str, context: str, has_bengali: bool) -> str:
         """Generate response using Google Search grounding"""
         try:
             full_prompt = self._create_enhanced_prompt(user_message, context, has_bengali)
             
-            # Use Google Search tool for Gemini 2.0
-            tools = [types.Tool(google_search=types.GoogleSearch())]
-            
-            generate_config = types.GenerateContentConfig(
-                tools=tools,
-                response_modalities=["TEXT"],
-            )
-            
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",  # Use stable version
+            response = self._generate_content(
+                model=self.config.GEMINI_MODEL,
                 contents=full_prompt,
-                config=generate_config
+                config=self._google_search_config()
             )
             
-            # Process grounded response
-            response_text = ""
-            if response.candidates and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        response_text += part.text
+            response_text = self._extract_grounded_text(response)
+            return self._clean_and_validate_response(response_text, has_bengali) if response_text else self._get_fallback_response(user_message)
             
-            # Check for grounding metadata
-            if response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
-                    print("✓ Response includes grounded web search results")
+        except Exception as e:
+            print(f"Error in Google Search generation: {e}")
+            return self._generate_simple_response(user_message, context, has_bengali)
+    
+    async def _generate_with_google_search_async(self, user_message: str, context: str, has_bengali: bool) -> str:
+        """Async Google Search grounded generation"""
+        try:
+            full_prompt = self._create_enhanced_prompt(user_message, context, has_bengali)
             
+            response = await self._generate_content_async(
+                model=self.config.GEMINI_MODEL,
+                contents=full_prompt,
+                config=self._google_search_config()
+            )
+            
+            response_text = self._extract_grounded_text(response)
             return self._clean_and_validate_response(response_text, has_bengali) if response_text else self._get_fallback_response(user_message)
             
         except Exception as e:
             print(f"Error in Google Search generation: {e}")
-            return self._generate_simple_response(user_message, context, has_bengali)
+            return await self._generate_simple_response_async(user_message, context, has_bengali)
+    
+    def _google_search_config(self) -> types.GenerateContentConfig:
+        """Generation config with the Google Search grounding tool"""
+        # Use Google Search tool for Gemini 2.0
+        tools = [types.Tool(google_search=types.GoogleSearch())]
+        
+        return types.GenerateContentConfig(
+            system_instruction=self.system_instruction,
+            tools=tools,
+            response_modalities=["TEXT"],
+        )
+    
+    def _extract_grounded_text(self, response) -> str:
+        """Collect text parts from a grounded response"""
+        response_text = ""
+        if response.candidates and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'text') and part.text:
+                    response_text += part.text
+        
+        # Check for grounding metadata
+        if response.candidates and len(response.candidates) > 0:
+            candidate = response.candidates[0]
+            if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
+                print("✓ Response includes grounded web search results")
+        
+        return response_text
     
     def _generate_with_functions(self, user_message: str, context: str, has_bengali: bool) -> str:
         """Generate response using function calling"""
         try:
             full_prompt = self._create_enhanced_prompt(user_message, context, has_bengali)
             
-            # Define function declarations
-            function_declarations = [
-                {
-                    "name": "get_current_time",
-                    "description": "Gets the current date and time",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                },
-                {
-                    "name": "get_weather",
-                    "description": "Gets weather information for a location",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "location": {
-                                "type": "string",
-                                "description": "The city or location name"
-                            }
-                        },
-                        "required": ["location"]
-                    }
-                },
-            ]
-            
-            # Use function calling tool
-            tools = [types.Tool(function_declarations=function_declarations)]
-            
-            generate_config = types.GenerateContentConfig(
-                tools=tools,
-                response_modalities=["TEXT"]
-            )
-            
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",  # Use stable version
+            response = self._generate_content(
+                model=self.config.GEMINI_MODEL,
                 contents=full_prompt,
-                config=generate_config
+                config=self._function_calling_config()
             )
             
             # Process the response with function calls
@@ -203,76 +476,297 @@ class AdvancedGeminiAIClient:
             print(f"Error in function calling generation: {e}")
             return self._generate_simple_response(user_message, context, has_bengali)
     
+    async def _generate_with_functions_async(self, user_message: str, context: str, has_bengali: bool) -> str:
+        """Async function calling generation"""
+        try:
+            full_prompt = self._create_enhanced_prompt(user_message, context, has_bengali)
+            
+            response = await self._generate_content_async(
+                model=self.config.GEMINI_MODEL,
+                contents=full_prompt,
+                config=self._function_calling_config()
+            )
+            
+            return await self._process_function_response_async(response, user_message, has_bengali)
+            
+        except Exception as e:
+            print(f"Error in function calling generation: {e}")
+            return await self._generate_simple_response_async(user_message, context, has_bengali)
+    
+    def _function_calling_config(self) -> types.GenerateContentConfig:
+        """Generation config exposing the registered functions as tools"""
+        # Use function calling tool
+        tools = [types.Tool(function_declarations=FUNCTION_DECLARATIONS)]
+        
+        return types.GenerateContentConfig(
+            system_instruction=self.system_instruction,
+            tools=tools,
+            response_modalities=["TEXT"]
+        )
+    
     def _process_function_response(self, response, user_message: str, has_bengali: bool) -> str:
         """Process response with function calls"""
         try:
-            # Check if there are function calls
-            response_text = ""
-            function_calls = []
-            
-            if response.candidates and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    # Handle text parts
-                    if hasattr(part, 'text') and part.text:
-                        response_text += part.text
-                    
-                    # Handle function call parts
-                    if hasattr(part, 'function_call') and part.function_call:
-                        function_calls.append(part.function_call)
-            
-            # Execute function calls if any
-            if function_calls:
-                function_results = []
-                for function_call in function_calls:
-                    function_name = function_call.name
-                    function_args = {}
-                    
-                    # Extract function arguments
-                    if hasattr(function_call, 'args') and function_call.args:
-                        for key, value in function_call.args.items():
-                            function_args[key] = value
-                    
-                    print(f"✓ Executing function: {function_name} with args: {function_args}")
-                    
-                    # Execute the function
-                    if function_name in self.function_registry:
-                        try:
-                            function_result = self.function_registry[function_name](**function_args)
-                            function_results.append(function_result)
-                        except Exception as e:
-                            print(f"Error executing function {function_name}: {e}")
-                            function_results.append(f"Error: Unable to execute {function_name}")
+            response_text, function_results = self._execute_function_calls(response)
+            
+            # If we have function results, generate a final response
+            if function_results:
+                all_results = "\n".join(function_results)
+                final_prompt = self._create_final_prompt(user_message, all_results, has_bengali)
                 
-                # If we have function results, generate a final response
-                if function_results:
-                    all_results = "\n".join(function_results)
-                    final_prompt = self._create_final_prompt(user_message, all_results, has_bengali)
-                    
-                    final_response = self.client.models.generate_content(
-                        model="gemini-2.0-flash",
-                        contents=final_prompt
-                    )
-                    
-                    return self._clean_and_validate_response(final_response.text.strip(), has_bengali)
+                final_response = self._generate_content(
+                    model=self.config.GEMINI_MODEL,
+                    contents=final_prompt
+                )
+                
+                return self._clean_and_validate_response(final_response.text.strip(), has_bengali)
             
             # Return the text response if no function calls
             if response_text:
                 return self._clean_and_validate_response(response_text, has_bengali)
             else:
                 return self._get_fallback_response(user_message)
+                
+        except Exception as e:
+            print(f"Error processing function response: {e}")
+            return self._get_fallback_response(user_message)
+    
+    async def _process_function_response_async(self, response, user_message: str, has_bengali: bool) -> str:
+        """Async variant of _process_function_response"""
+        try:
+            response_text, function_results = await self._execute_function_calls_async(response)
+            
+            if function_results:
+                all_results = "\n".join(function_results)
+                final_prompt = self._create_final_prompt(user_message, all_results, has_bengali)
+                
+                final_response = await self._generate_content_async(
+                    model=self.config.GEMINI_MODEL,
+                    contents=final_prompt
+                )
+                
+                return self._clean_and_validate_response(final_response.text.strip(), has_bengali)
             
+            if response_text:
+                return self._clean_and_validate_response(response_text, has_bengali)
+            else:
+                return self._get_fallback_response(user_message)
+                
         except Exception as e:
             print(f"Error processing function response: {e}")
             return self._get_fallback_response(user_message)
     
+    def _extract_function_calls(self, response) -> Tuple[str, List[Tuple[str, Dict[str, Any]]]]:
+        """The response's own text and its (name, args) function calls"""
+        response_text = ""
+        function_calls = []
+        
+        if response.candidates and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                # Handle text parts
+                if hasattr(part, 'text') and part.text:
+                    response_text += part.text
+                
+                # Handle function call parts
+                if hasattr(part, 'function_call') and part.function_call:
+                    function_call = part.function_call
+                    function_args = dict(function_call.args) if getattr(function_call, 'args', None) else {}
+                    if function_call.name in self.function_registry:
+                        print(f"✓ Executing function: {function_call.name} with args: {function_args}")
+                        function_calls.append((function_call.name, function_args))
+                    else:
+                        print(f"Ignoring call to unknown function: {function_call.name}")
+        
+        return response_text, function_calls
+    
+    def _call_function(self, name: str, args: Dict[str, Any]) -> Any:
+        """Run a registered function on the current thread"""
+        func = self.function_registry[name]
+        if inspect.iscoroutinefunction(func):
+            return asyncio.run(func(**args))
+        return func(**args)
+    
+    def _function_error(self, name: str, error: BaseException) -> str:
+        """Result passed to the model in place of a failed or timed out call"""
+        if isinstance(error, (FutureTimeoutError, asyncio.TimeoutError)):
+            print(f"Function {name} timed out after {self.function_timeouts[name]}s")
+            return f"Error: {name} timed out"
+        print(f"Error executing function {name}: {error}")
+        return f"Error: Unable to execute {name}"
+    
+    def _new_function_pool(self, concurrent: bool) -> ThreadPoolExecutor:
+        """Thread pool for concurrent-safe calls, or the single thread for the others"""
+        if concurrent:
+            return ThreadPoolExecutor(max_workers=self.config.FUNCTION_CALL_WORKERS, thread_name_prefix="function-call")
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="function-call-serial")
+    
+    def _submit_function(self, name: str, args: Dict[str, Any]) -> Tuple[Future, Future]:
+        """Queue a call on its pool
+        
+        Returns the call's future and a second one that resolves to the
+        monotonic time the call started running. New calls are refused
+        while FUNCTION_CALL_WORKERS timed out calls are still running.
+        """
+        started: Future = Future()
+        
+        def run() -> Any:
+            started.set_result(time.monotonic())
+            return self._call_function(name, args)
+        
+        with self._function_lock:
+            if self._hung_calls >= self.config.FUNCTION_CALL_WORKERS:
+                raise RuntimeError(f"{self._hung_calls} timed out function calls are still running")
+            pool = self._function_executor if name in self.concurrent_functions else self._serial_executor
+            return pool.submit(run), started
+    
+    def _abandon_function(self, name: str, future: Future) -> None:
+        """Drop a call that missed its deadline
+        
+        A call that never started is cancelled. One that is still running
+        keeps its thread until it returns, so its pool is replaced and
+        later calls do not queue behind it.
+        """
+        if future.cancel():
+            return
+        concurrent = name in self.concurrent_functions
+        with self._function_lock:
+            self._hung_calls += 1
+            if concurrent:
+                stale, self._function_executor = self._function_executor, self._new_function_pool(concurrent=True)
+            else:
+                stale, self._serial_executor = self._serial_executor, self._new_function_pool(concurrent=False)
+        future.add_done_callback(self._hung_call_returned)
+        stale.shutdown(wait=False)
+    
+    def _hung_call_returned(self, future: Future) -> None:
+        """Done callback of an abandoned call"""
+        with self._function_lock:
+            self._hung_calls -= 1
+    
+    def _function_result(self, name: str, future: Future, started: Future) -> str:
+        """Wait for a submitted call; its deadline counts from when it started running"""
+        timeout = self.function_timeouts[name]
+        try:
+            start = started.result(timeout=timeout)
+            return future.result(timeout=max(0.0, start + timeout - time.monotonic()))
+        except FutureTimeoutError as e:
+            self._abandon_function(name, future)
+            return self._function_error(name, e)
+        except Exception as e:
+            return self._function_error(name, e)
+    
+    def _execute_function_calls(self, response) -> Tuple[str, List[str]]:
+        """Run the function calls requested by the model.
+        
+        Concurrent-safe calls all start at once on the function pool, the
+        others run one after another on their own thread alongside them.
+        Each call gets its own deadline from the moment it starts running;
+        a call that misses it is reported to the model as an error while
+        the remaining results are kept. Results come back in the order the
+        model asked for them.
+        
+        Returns the response's own text and the results of executed functions.
+        """
+        response_text, function_calls = self._extract_function_calls(response)
+        
+        results: List[Optional[str]] = [None] * len(function_calls)
+        pending = []
+        serial = []
+        for index, (name, args) in enumerate(function_calls):
+            if name not in self.concurrent_functions:
+                serial.append((index, name, args))
+                continue
+            try:
+                pending.append((index, name) + self._submit_function(name, args))
+            except Exception as e:
+                results[index] = self._function_error(name, e)
+        
+        for index, name, args in serial:
+            try:
+                future, started = self._submit_function(name, args)
+            except Exception as e:
+                results[index] = self._function_error(name, e)
+                continue
+            results[index] = self._function_result(name, future, started)
+        
+        for index, name, future, started in pending:
+            results[index] = self._function_result(name, future, started)
+        
+        return response_text, results
+    
+    async def _execute_function_calls_async(self, response) -> Tuple[str, List[str]]:
+        """Async variant of _execute_function_calls
+        
+        Coroutine functions run as tasks on the event loop, synchronous
+        ones on the function pools; both are bounded by their deadline.
+        """
+        response_text, function_calls = self._extract_function_calls(response)
+        serial_lock = asyncio.Lock()
+        
+        async def call(name: str, args: Dict[str, Any]) -> Any:
+            func = self.function_registry[name]
+            timeout = self.function_timeouts[name]
+            if inspect.iscoroutinefunction(func):
+                return await asyncio.wait_for(func(**args), timeout)
+            
+            future, started = self._submit_function(name, args)
+            try:
+                # Shielded so giving up on the start leaves the call to _abandon_function
+                start = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(started)), timeout)
+                return await asyncio.wait_for(asyncio.wrap_future(future), max(0.0, start + timeout - time.monotonic()))
+            except asyncio.TimeoutError:
+                self._abandon_function(name, future)
+                raise
+        
+        async def run(name: str, args: Dict[str, Any]) -> str:
+            try:
+                if name in self.concurrent_functions:
+                    return await call(name, args)
+                async with serial_lock:
+                    return await call(name, args)
+            except Exception as e:
+                return self._function_error(name, e)
+        
+        results = await asyncio.gather(*(run(name, args) for name, args in function_calls))
+        return response_text, list(results)
+    
+    def close(self) -> None:
+        """Release the function pools and the context cache"""
+        with self._function_lock:
+            pools = (self._function_executor, self._serial_executor)
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self.context_cache:
+            self.context_cache.close()
+    
     def _generate_simple_response(self, user_message: str, context: str, has_bengali: bool) -> str:
         """Generate simple response without advanced features"""
         try:
             full_prompt = self._create_simple_prompt(user_message, context, has_bengali)
             
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",  # Use stable version
-                contents=full_prompt
+            response = self._generate_content(
+                model=self.config.GEMINI_MODEL,
+                contents=full_prompt,
+                config=self._simple_config()
+            )
+            
+            return self._clean_and_validate_response(response.text.strip(), has_bengali)
+            
+        except Exception as e:
+            print(f"Error in simple response generation: {e}")
+            return self._get_fallback_response(user_message)
+    
+    async def _generate_simple_response_async(self, user_message: str, context: str, has_bengali: bool) -> str:
+        """Async simple generation without tools"""
+        try:
+            full_prompt = self._create_simple_prompt(user_message, context, has_bengali)
+            
+            # Creating or refreshing the context cache is a blocking API call
+            generate_config = await asyncio.to_thread(self._simple_config)
+            response = await self._generate_content_async(
+                model=self.config.GEMINI_MODEL,
+                contents=full_prompt,
+                config=generate_config
             )
             
             return self._clean_and_validate_response(response.text.strip(), has_bengali)
@@ -284,9 +778,7 @@ class AdvancedGeminiAIClient:
     def _create_enhanced_prompt(self, user_message: str, context: str, has_bengali: bool) -> str:
         """Create enhanced prompt for advanced features"""
         if has_bengali:
-            return f"""{self.system_instruction}
-
-{context}
+            return f"""{context}
 
 User message: "{user_message}"
 
@@ -299,9 +791,7 @@ Be helpful and provide accurate, up-to-date information.
 Respond in Bengali naturally and conversationally.
 No emojis or special symbols."""
         else:
-            return f"""{self.system_instruction}
-
-{context}
+            return f"""{context}
 
 User message: "{user_message}"
 
@@ -317,9 +807,7 @@ No emojis or special symbols."""
     def _create_simple_prompt(self, user_message: str, context: str, has_bengali: bool) -> str:
         """Create simple prompt without advanced features"""
         if has_bengali:
-            return f"""{self.system_instruction}
-
-{context}
+            return f"""{context}
 
 User message: "{user_message}"
 
@@ -327,9 +815,7 @@ Respond naturally in Bengali, considering our conversation history.
 Keep it helpful and conversational.
 No emojis or special symbols."""
         else:
-            return f"""{self.system_instruction}
-
-{context}
+            return f"""{context}
 
 User message: "{user_message}"
 
@@ -412,22 +898,7 @@ No emojis or special symbols."""
     
     def _clean_response_text(self, text: str) -> str:
         """Remove emojis and non-BMP characters that cause ChromeDriver issues"""
-        if not text:
-            return ""
-        
-        import re
-        # Remove emojis and other non-BMP characters
-        text = re.sub(r'[^\x00-\x7F\u00A0-\uFFFF]', '', text)
-        # Remove common emoji patterns
-        text = re.sub(r'[\U0001F600-\U0001F64F]', '', text)  # emoticons
-        text = re.sub(r'[\U0001F300-\U0001F5FF]', '', text)  # symbols & pictographs
-        text = re.sub(r'[\U0001F680-\U0001F6FF]', '', text)  # transport & map
-        text = re.sub(r'[\U0001F1E0-\U0001F1FF]', '', text)  # flags
-        text = re.sub(r'[\U00002702-\U000027B0]', '', text)  # dingbats
-        text = re.sub(r'[\U000024C2-\U0001F251]', '', text)  # enclosed characters
-        # Clean up extra spaces
-        text = ' '.join(text.split())
-        return text.strip()
+        return sanitize_text(text, keep_emoji=self.config.allows_emoji())
     
     def _get_fallback_response(self, user_message: str) -> str:
         """Get fallback response when AI generation fails"""
@@ -455,12 +926,38 @@ No emojis or special symbols."""
             
             Summary:"""
             
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",  # Use stable version
-                contents=summary_prompt
-            )
+            priority_token = current_priority.set(Priority.SUMMARY)
+            try:
+                response = self._generate_content(
+                    model=self.config.GEMINI_MODEL,
+                    contents=summary_prompt
+                )
+            finally:
+                current_priority.reset(priority_token)
             
             return response.text.strip()
         except Exception as e:
             print(f"Error creating conversation summary: {e}")
             return ""
+    
+    def update_rolling_summary(self, summary: str, new_turns: str) -> str:
+        """Fold conversation turns that left the context into the running summary"""
+        summary_prompt = f"""Running summary of the earlier conversation:
+{summary or "(none yet)"}
+
+Turns that came after it:
+{new_turns}
+
+Rewrite the running summary in 2-3 sentences so it also covers these turns.
+Keep names, facts and open questions. Reply with the summary only, in plain text."""
+        
+        priority_token = current_priority.set(Priority.SUMMARY)
+        try:
+            response = self._generate_content(
+                model=self.config.GEMINI_MODEL,
+                contents=summary_prompt
+            )
+        finally:
+            current_priority.reset(priority_token)
+        
+        return self._clean_response_text(response.text or "")
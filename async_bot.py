@@ -0,0 +1,203 @@
+"""
+Asyncio orchestrator with concurrent AI generation for WhatsApp Gemini AI Bot
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+from config import Config
+from models import Message
+from bot_new import WhatsAppGeminiBot
+from metrics import STAGE_SECONDS
+
+class AsyncWhatsAppGeminiBot(WhatsAppGeminiBot):
+    """Bot that runs detection, AI generation and sending as concurrent stages
+    
+    Detection feeds a generation queue served by ``AI_CONCURRENCY`` workers
+    using the async Gemini client. Replies are handed to a single sender in
+    arrival order, so a slow generation never stops new messages from being
+    detected. The browser is only ever driven from one worker thread.
+    
+    Generations may finish out of order, so they only read the history.
+    The sender records each message and its reply together, in the order
+    the messages arrived.
+    """
+    
+    def __init__(self, config: Optional[Config] = None, gemini_client: Optional[Any] = None):
+        super().__init__(config, gemini_client)
+        self._browser = ThreadPoolExecutor(max_workers=1, thread_name_prefix="browser")
+        self._in_flight = 0
+    
+    def _run_chat_loop(self, end_time: float) -> None:
+        """Run the staged pipeline until the session ends"""
+        try:
+            asyncio.run(self._run_pipeline(end_time))
+        except KeyboardInterrupt:
+            print("\nBot stopped by user")
+            self.status.is_running = False
+    
+    async def _run_pipeline(self, end_time: float) -> None:
+        """Wire the detection, generation and send stages together"""
+        generation_queue: asyncio.Queue = asyncio.Queue()
+        send_queue: asyncio.Queue = asyncio.Queue()
+        
+        workers = [
+            asyncio.create_task(self._generation_worker(generation_queue))
+            for _ in range(max(1, self.config.AI_CONCURRENCY))
+        ]
+        sender = asyncio.create_task(self._send_stage(send_queue))
+        
+        try:
+            await self._detect_stage(end_time, generation_queue, send_queue)
+            
+            # Let replies for already detected messages go out before stopping
+            await generation_queue.join()
+            await send_queue.join()
+        finally:
+            for task in workers + [sender]:
+                task.cancel()
+            await asyncio.gather(*workers, sender, return_exceptions=True)
+    
+    async def _browser_call(self, func: Callable, *args) -> Any:
+        """Run a driver call on the single browser thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._browser, func, *args)
+    
+    async def _detect_stage(self, end_time: float, generation_queue: asyncio.Queue,
+                            send_queue: asyncio.Queue) -> None:
+        """Detect new messages and enqueue them for generation and sending
+        
+        Consecutive messages are held as a burst until COALESCE_WINDOW passes
+        without a new one (or the contact stops typing) and then answered
+        with a single reply.
+        """
+        push_mode = await self._browser_call(self._start_push_detection)
+        last_status_time = time.time()
+        window = self.config.COALESCE_WINDOW
+        burst: List[Message] = []
+        burst_start = burst_deadline = 0.0
+        
+        while time.time() < end_time and self.status.is_running:
+            try:
+                snapshot = not push_mode or self._catch_up
+                if not snapshot:
+                    # A push wait holds the browser thread, so keep it short while
+                    # replies are pending to avoid delaying their sends
+                    wait = self.config.PUSH_WAIT_TIMEOUT if self._in_flight == 0 else self.config.CHECK_INTERVAL
+                    if burst:
+                        wait = min(wait, max(0.0, burst_deadline - time.time()))
+                    timeout = min(wait, max(0.0, end_time - time.time()))
+                    current_messages = await self._browser_call(self.whatsapp_driver.wait_for_new_messages, timeout)
+                    if current_messages is None:
+                        push_mode = await self._browser_call(self._start_push_detection)
+                        continue
+                else:
+                    current_messages = await self._browser_call(self._get_latest_messages)
+                    self._catch_up = False
+                
+                new_messages = self._filter_new_messages(current_messages, snapshot=snapshot)
+                
+                for msg in new_messages:
+                    print(f"Received: {msg.text}")
+                
+                self.stats.total_messages_received += len(new_messages)
+                
+                if new_messages:
+                    if not burst:
+                        burst_start = time.time()
+                    burst.extend(new_messages)
+                    burst_deadline = self.message_processor.burst_deadline(
+                        time.time(), burst_start, window, self.config.COALESCE_MAX_WAIT
+                    )
+                
+                if burst and time.time() >= burst_deadline:
+                    typing = (window > 0 and time.time() < burst_start + self.config.COALESCE_MAX_WAIT
+                              and await self._browser_call(self._is_contact_typing))
+                    if typing:
+                        burst_deadline = self.message_processor.burst_deadline(
+                            time.time(), burst_start, window, self.config.COALESCE_MAX_WAIT
+                        )
+                    else:
+                        await self._enqueue_burst(burst, generation_queue, send_queue)
+                        burst = []
+                
+                if not push_mode:
+                    await asyncio.sleep(self.config.CHECK_INTERVAL)
+                
+                if time.time() - last_status_time >= self.config.STATUS_LOG_INTERVAL:
+                    self._log_status_update(push_mode)
+                    last_status_time = time.time()
+                    
+            except Exception as e:
+                print(f"Error in detection stage: {e}")
+                self.stats.total_errors += 1
+                await asyncio.sleep(1)
+        
+        if burst:
+            await self._enqueue_burst(burst, generation_queue, send_queue)
+    
+    async def _enqueue_burst(self, burst: List[Message], generation_queue: asyncio.Queue,
+                             send_queue: asyncio.Queue) -> None:
+        """Hand a burst to the generation and send stages as one message"""
+        if len(burst) > 1:
+            print(f"Coalesced {len(burst)} messages into one reply")
+        msg = self.message_processor.merge_messages(burst)
+        reply = asyncio.get_running_loop().create_future()
+        self._in_flight += 1
+        await generation_queue.put((msg, reply))
+        await send_queue.put((msg, reply, time.perf_counter()))
+    
+    async def _generation_worker(self, generation_queue: asyncio.Queue) -> None:
+        """Generate replies concurrently with other workers"""
+        while True:
+            msg, reply = await generation_queue.get()
+            try:
+                reply.set_result(await self._generate_reply_async(msg.text))
+            except Exception as e:
+                print(f"Error generating reply: {e}")
+                reply.set_result("")
+            finally:
+                generation_queue.task_done()
+    
+    async def _generate_reply_async(self, message_text: str) -> str:
+        """Async counterpart of _generate_reply; the send stage records the turns"""
+        local_response = self._local_reply(message_text)
+        if local_response:
+            return local_response
+        
+        with STAGE_SECONDS.time(stage="context"):
+            context = self.conversation_manager.get_conversation_context()
+        return await self.ai_client.generate_response_async(message_text, context)
+    
+    async def _send_stage(self, send_queue: asyncio.Queue) -> None:
+        """Send replies in the order their messages arrived"""
+        while True:
+            msg, reply, started_at = await send_queue.get()
+            try:
+                response = await reply
+                self.conversation_manager.add_message(msg.text, role="user")
+                if response:
+                    self.conversation_manager.add_message(response, role="assistant")
+                clean_response = self._clean_response(response)
+                
+                if clean_response:
+                    await asyncio.sleep(self.config.RESPONSE_DELAY)
+                    sent = await self._browser_call(self._send_message, clean_response)
+                    self._record_send_result(msg, clean_response, sent, started_at)
+                else:
+                    print("✗ Generated response was invalid or empty")
+                    self.stats.total_errors += 1
+                
+                self.status.last_activity = time.time()
+                
+            except Exception as e:
+                print(f"Error sending reply: {e}")
+                self.stats.total_errors += 1
+            finally:
+                self._in_flight -= 1
+                send_queue.task_done()
+    
+    def cleanup(self) -> None:
+        """Clean up all resources"""
+        self._browser.shutdown(wait=False)
+        super().cleanup()
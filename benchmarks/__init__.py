@@ -0,0 +1,3 @@
+"""
+Benchmarks for WhatsApp Gemini AI Bot
+"""
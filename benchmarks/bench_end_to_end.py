@@ -0,0 +1,231 @@
+"""
+End-to-end reply latency and throughput of WhatsAppGeminiBot, fully offline
+
+Each run serves the local fake chat page with chat_size existing messages,
+swaps Gemini for GeminiStubClient (fixed latency plus a token rate), and
+lets the page inject messages at a fixed rate once the bot is monitoring.
+Latency is measured in the page, from a message appearing to the reply that
+answers it being sent, so detection, generation and sending all count.
+Detection latency alone is the time until the bot first sees a message.
+
+With --idle the page stays quiet for that many seconds before the load
+starts, and the bot process's CPU use over the quiet period is reported;
+pass both detection modes to compare push against polling.
+
+Usage:
+    
+    python benchmarks/bench_end_to_end.py --sizes 50 500 --rates 0.5 2 --messages 20
+    python benchmarks/bench_end_to_end.py --orchestrator async --latency 1.0 --tokens-per-second 100
+    python benchmarks/bench_end_to_end.py --detection push poll --idle 30 --rates 0.2 --messages 10
+"""
+import argparse
+import contextlib
+import io
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+from bench_utils import percentile, print_table
+from fake_page import CONTACT_NAME, write_chat_page
+from config import Config
+from gemini_stub import GeminiStubClient
+from metrics import REGISTRY, STAGE_SECONDS
+from bot_new import WhatsAppGeminiBot
+from async_bot import AsyncWhatsAppGeminiBot
+
+MARKER = re.compile(r"#(\d+)")
+
+# Seconds between the bot opening the chat and the first injected message,
+# enough for the greeting and the push observer
+WARMUP_SECONDS = 3.0
+
+def make_reply(reply_tokens: int):
+    """Stub reply naming the message it answers, padded to about reply_tokens"""
+    filler = " ".join(["word"] * max(0, reply_tokens * 4 // 5))
+    
+    def reply(prompt: str) -> str:
+        for line in prompt.splitlines():
+            if line.startswith("User message:"):
+                match = MARKER.search(line)
+                if match:
+                    return f"Reply to #{match.group(1)}. {filler}"
+        return "Hello, I am the benchmark assistant."
+    return reply
+
+def bench_config(url: str, args: argparse.Namespace, detection: str, duration_seconds: float) -> Config:
+    """Config pointing the bot at the fake page with quotas out of the way"""
+    config = Config()
+    config.GEMINI_API_KEY = "offline-benchmark"
+    config.TARGET_CONTACT = CONTACT_NAME
+    config.WHATSAPP_URL = url
+    config.BROWSER_BACKEND = args.backend
+    config.ORCHESTRATOR = args.orchestrator
+    config.DETECTION_MODE = detection
+    config.CHAT_DURATION_MINUTES = duration_seconds / 60
+    config.RESPONSE_DELAY = 0.0
+    config.COALESCE_WINDOW = args.coalesce
+    config.WEBDRIVER_TIMEOUT = 15
+    config.LOGIN_TIMEOUT = 15
+    config.ENABLE_RESPONSE_CACHE = False
+    config.GEMINI_REQUESTS_PER_MINUTE = 100000
+    config.GEMINI_TOKENS_PER_MINUTE = 100000000
+    if args.headless:
+        config.HEADLESS = True
+        config.CHROME_PROFILE_DIR = tempfile.mkdtemp(prefix="wa_bench_profile_")
+    return config
+
+def reply_latencies(injected: List[float], sent: List[Dict]) -> List[Optional[float]]:
+    """Seconds from each injected message to the reply that answered it
+    
+    A reply names the first message of the burst it answers, so message i
+    was answered by the reply with the largest marker not above i, provided
+    that reply went out after the message arrived. None means unanswered.
+    """
+    replies = {}
+    for entry in sent:
+        match = MARKER.search(entry["text"])
+        if match:
+            replies.setdefault(int(match.group(1)), entry["t"])
+    
+    latencies: List[Optional[float]] = []
+    for number, injected_at in enumerate(injected, start=1):
+        marker = max((m for m in replies if m <= number), default=None)
+        if marker is None or replies[marker] < injected_at:
+            latencies.append(None)
+        else:
+            latencies.append((replies[marker] - injected_at) / 1000)
+    return latencies
+
+def detection_latencies(injected: List[float], detected: Dict[int, float]) -> List[Optional[float]]:
+    """Seconds from each injected message to the bot first seeing it, None if never"""
+    return [
+        (detected[number] - injected_at) / 1000 if number in detected else None
+        for number, injected_at in enumerate(injected, start=1)
+    ]
+
+def record_detections(bot) -> Dict[int, float]:
+    """Note the wall-clock milliseconds at which each load message is first filtered in"""
+    detected: Dict[int, float] = {}
+    filter_new_messages = bot._filter_new_messages
+    
+    def filter_and_record(messages, snapshot=True):
+        new_messages = filter_new_messages(messages, snapshot=snapshot)
+        now = time.time() * 1000
+        for message in new_messages:
+            match = MARKER.search(message.text)
+            if match:
+                detected.setdefault(int(match.group(1)), now)
+        return new_messages
+    
+    bot._filter_new_messages = filter_and_record
+    return detected
+
+def sample_idle_cpu(start_after: float, idle_seconds: float) -> Dict[str, float]:
+    """Measure this process's CPU seconds over a quiet period, in the background
+    
+    The period starts start_after seconds from now. Browser processes are
+    not included; in push mode the page observer does not run while the
+    chat is quiet, while polling pays for every page query on both sides.
+    """
+    sample: Dict[str, float] = {}
+    
+    def measure() -> None:
+        time.sleep(start_after)
+        cpu_start = time.process_time()
+        time.sleep(idle_seconds)
+        sample["cpu_seconds"] = time.process_time() - cpu_start
+    
+    if idle_seconds > 0:
+        threading.Thread(target=measure, daemon=True).start()
+    return sample
+
+def run_once(chat_size: int, rate: float, detection: str, args: argparse.Namespace) -> list:
+    """Run one bot session against the fake page and summarize it"""
+    url = write_chat_page(chat_size)
+    interval = 1.0 / rate
+    start_delay = WARMUP_SECONDS + args.idle
+    duration = start_delay + args.messages * interval + args.drain
+    config = bench_config(url, args, detection, duration)
+    stub = GeminiStubClient(
+        latency_seconds=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        reply=make_reply(args.reply_tokens)
+    )
+    
+    REGISTRY.reset()
+    output = io.StringIO()
+    bot_class = AsyncWhatsAppGeminiBot if args.orchestrator == "async" else WhatsAppGeminiBot
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(output)
+    with quiet:
+        bot = bot_class(config, gemini_client=stub)
+        try:
+            if not bot.initialize():
+                raise RuntimeError(f"could not load the benchmark page:\n{output.getvalue()[-2000:]}")
+            detected = record_detections(bot)
+            bot.whatsapp_driver.run_script(
+                "window.__benchStart(arguments[0], arguments[1], arguments[2]);",
+                args.messages, int(interval * 1000), int(start_delay * 1000)
+            )
+            idle = sample_idle_cpu(WARMUP_SECONDS, args.idle)
+            bot.start_chat_session()
+            log = bot.whatsapp_driver.run_script("return window.__bench;")
+        finally:
+            bot.cleanup()
+    
+    latencies = reply_latencies(log["injected"], log["sent"])
+    answered = [latency for latency in latencies if latency is not None]
+    first_injected = log["injected"][0] if log["injected"] else 0
+    last_reply = max((entry["t"] for entry in log["sent"]), default=first_injected)
+    elapsed = max(1e-3, (last_reply - first_injected) / 1000)
+    stages = {key[0]: stats for key, stats in STAGE_SECONDS.summary().items()}
+    detections = [latency for latency in detection_latencies(log["injected"], detected) if latency is not None]
+    idle_cpu = f"{idle['cpu_seconds'] / args.idle * 100:.1f}%" if "cpu_seconds" in idle else "-"
+    
+    return [
+        detection, chat_size, rate, f"{len(answered)}/{len(latencies)}",
+        percentile(detections, 50) * 1000,
+        percentile(detections, 95) * 1000,
+        percentile(answered, 50) * 1000,
+        percentile(answered, 95) * 1000,
+        percentile(answered, 99) * 1000,
+        len(answered) / elapsed,
+        stages.get("poll", {}).get("p50", 0.0) * 1000,
+        stages.get("send", {}).get("p50", 0.0) * 1000,
+        idle_cpu,
+    ]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 500], help="Messages already in the chat")
+    parser.add_argument("--rates", nargs="+", type=float, default=[0.5, 2.0], help="Incoming messages per second")
+    parser.add_argument("--messages", type=int, default=20, help="Messages injected per run")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub time to first token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Stub output token rate")
+    parser.add_argument("--reply-tokens", type=int, default=60, help="Approximate reply length in tokens")
+    parser.add_argument("--coalesce", type=float, default=0.0, help="COALESCE_WINDOW for the bot")
+    parser.add_argument("--drain", type=float, default=10.0, help="Seconds allowed after the last message")
+    parser.add_argument("--backend", choices=["selenium", "playwright"], default="selenium")
+    parser.add_argument("--orchestrator", choices=["sync", "async"], default="sync")
+    parser.add_argument("--detection", nargs="+", choices=["push", "poll"], default=["push"])
+    parser.add_argument("--idle", type=float, default=0.0, help="Quiet seconds before the load, for idle CPU")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's own output")
+    args = parser.parse_args()
+    
+    rows = []
+    for detection in args.detection:
+        for chat_size in args.sizes:
+            for rate in args.rates:
+                rows.append(run_once(chat_size, rate, detection, args))
+    
+    print(f"\nEnd-to-end reply latency ({args.backend}, {args.orchestrator}, "
+          f"stub {args.latency}s + {args.reply_tokens} tokens at {args.tokens_per_second}/s)")
+    print_table(
+        ["detection", "chat_size", "msgs_per_s_in", "answered", "detect_p50_ms", "detect_p95_ms",
+         "p50_ms", "p95_ms", "p99_ms", "replies_per_s", "poll_p50_ms", "send_p50_ms", "idle_cpu"],
+        rows
+    )
+
+if __name__ == "__main__":
+    main()
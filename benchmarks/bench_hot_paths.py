@@ -0,0 +1,207 @@
+"""
+Microbenchmark suite for the per-poll and per-message hot paths, with stored baselines
+
+Times MessageProcessor, ConversationManager, the LocalResponder intent check
+and the AdvancedGeminiAIClient routing predicates on English, Bengali and Banglish corpora. Each case
+reports microseconds per call (per message for the corpus cases), the best
+of several repeats. --save records the results as the baseline; --check
+compares against it and exits non-zero when any case is slower than the
+baseline by more than --threshold, after measuring it a second time to
+rule out noise. A fixed calibration workload is timed right before every
+case and costs are compared relative to it, so a machine that is slower
+at the moment does not read as a regression.
+Baselines are still best saved on the machine that runs the check.
+
+Usage:
+    
+    python benchmarks/bench_hot_paths.py --save     # record baselines.json
+    python benchmarks/bench_hot_paths.py --check    # fail on regressions
+    python benchmarks/bench_hot_paths.py --filter conversation
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from bench_utils import print_table
+from corpora import CORPORA, REPLY, chat_messages
+from config import Config
+from dedup_index import MessageDedupIndex
+from message_processor import MessageProcessor
+from conversation_manager import ConversationManager
+from local_responder import LocalResponder
+from gemini_stub import GeminiStubClient
+from advanced_ai_client import AdvancedGeminiAIClient
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# (name, function, calls made by one invocation of function)
+Case = Tuple[str, Callable[[], object], int]
+
+def per_message(func: Callable[[str], object], texts: List[str]) -> Callable[[], None]:
+    """Call func once for every text in the corpus"""
+    def run() -> None:
+        for text in texts:
+            func(text)
+    return run
+
+def message_processor_cases() -> List[Case]:
+    """Poll-time filtering and per-message processing"""
+    processor = MessageProcessor()
+    cases: List[Case] = []
+    for size in (50, 500):
+        # Steady state between new messages: every visible message is already processed
+        messages = chat_messages(size)
+        seen = MessageDedupIndex(max_size=5000)
+        seen.update(processor.message_keys(messages, seen))
+        cases.append((f"filter_new_messages[{size} seen]",
+                      lambda messages=messages, seen=seen: processor.filter_new_messages(messages, seen), 1))
+    
+    for corpus, texts in CORPORA.items():
+        cases.append((f"should_skip_message[{corpus}]", per_message(processor.should_skip_message, texts), len(texts)))
+        cases.append((f"detect_language[{corpus}]", per_message(processor.detect_language, texts), len(texts)))
+        cases.append((f"extract_keywords[{corpus}]", per_message(processor.extract_keywords, texts), len(texts)))
+    cases.append(("clean_text_for_whatsapp[reply]", lambda: processor.clean_text_for_whatsapp(REPLY), 1))
+    return cases
+
+def conversation_cases(config: Config) -> List[Case]:
+    """History updates and context building for every message"""
+    manager = ConversationManager(config)
+    for text in CORPORA["english"] * 2:
+        manager.add_message(text, role="user")
+    
+    cases: List[Case] = []
+    texts = [text for corpus in CORPORA.values() for text in corpus]
+    # A full ring buffer: each add evicts the oldest message
+    cases.append(("add_message[full history]", per_message(manager.add_message, texts), len(texts)))
+    cases.append(("get_conversation_context[cached]", manager.get_conversation_context, 1))
+    
+    def add_then_context() -> None:
+        for text in texts:
+            manager.add_message(text)
+            manager.get_conversation_context()
+    cases.append(("add_message+get_conversation_context", add_then_context, len(texts)))
+    
+    for corpus, corpus_texts in CORPORA.items():
+        cases.append((f"handle_context_query[{corpus}]",
+                      per_message(manager.handle_context_query, corpus_texts), len(corpus_texts)))
+    return cases
+
+def routing_cases(config: Config) -> List[Case]:
+    """Route selection the AI client runs before every generation"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = AdvancedGeminiAIClient(config, client=GeminiStubClient())
+    cases: List[Case] = []
+    for corpus, texts in CORPORA.items():
+        cases.append((f"select_route[{corpus}]", per_message(client._select_route, texts), len(texts)))
+        cases.append((f"detect_bengali[{corpus}]", per_message(client._detect_bengali, texts), len(texts)))
+    return cases
+
+def local_responder_cases() -> List[Case]:
+    """Fast-path intent check that runs before every model call"""
+    responder = LocalResponder()
+    return [(f"local_classify[{corpus}]", per_message(responder.classify, texts), len(texts))
+            for corpus, texts in CORPORA.items()]
+
+def calibration_workload() -> None:
+    """Fixed mix of string, dict and sort work used to gauge machine speed"""
+    words = " ".join(CORPORA["english"]).split()
+    counts: Dict[str, int] = {}
+    for word in words * 4:
+        counts[word.lower()] = counts.get(word.lower(), 0) + 1
+    sorted(counts.items(), key=lambda item: item[1])
+
+def measure(func: Callable[[], object], calls: int, repeat: int) -> float:
+    """Best-of-repeat microseconds per call"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # autorange targets 0.2s; half of that per repeat keeps the suite quick
+    number = max(1, number // 2)
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number / calls * 1e6
+
+def measure_case(func: Callable[[], object], calls: int, repeat: int) -> Dict[str, float]:
+    """Time a case together with the calibration workload run right before it"""
+    calibration = measure(calibration_workload, 1, 3)
+    return {"us": measure(func, calls, repeat), "calibration_us": calibration}
+
+def relative_cost(result: Dict[str, float], reference: Dict[str, float]) -> float:
+    """Cost against the baseline, corrected for how fast the machine ran each time"""
+    return (result["us"] / result["calibration_us"]) / (reference["us"] / reference["calibration_us"])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--filter", default="", help="Only run cases containing this text")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero on regressions")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Allowed slowdown, 0.5 = 50%%")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    args = parser.parse_args()
+    
+    config = Config()
+    config.ENABLE_CONTEXT_CACHE = False
+    config.ENABLE_RESPONSE_CACHE = False
+    cases = (message_processor_cases() + conversation_cases(config) + routing_cases(config)
+             + local_responder_cases())
+    
+    baseline_path = Path(args.baseline)
+    stored = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    baseline: Dict[str, Dict[str, float]] = stored.get("cases", {})
+    
+    results: Dict[str, Dict[str, float]] = {}
+    rows = []
+    regressions = []
+    for name, func, calls in cases:
+        if args.filter not in name:
+            continue
+        result = measure_case(func, calls, args.repeat)
+        reference = baseline.get(name)
+        ratio = relative_cost(result, reference) if reference else None
+        if args.check and ratio is not None and ratio > 1 + args.threshold:
+            # Measure again before calling it a regression; a noisy neighbour only slows one run
+            retry = measure_case(func, calls, args.repeat)
+            if relative_cost(retry, reference) < ratio:
+                result, ratio = retry, relative_cost(retry, reference)
+        results[name] = result
+        regressed = ratio is not None and ratio > 1 + args.threshold
+        if regressed:
+            regressions.append(name)
+        rows.append([
+            name, result["us"],
+            reference["us"] if reference else "-",
+            f"{ratio:.2f}x" if ratio else "-",
+            "REGRESSED" if regressed else "ok"
+        ])
+    
+    print("\nHot path cost (microseconds per call, best of repeats; vs_baseline is calibrated)")
+    print_table(["case", "us", "baseline_us", "vs_baseline", "status"], rows)
+    
+    if args.save:
+        # Keep baselines of cases that were filtered out of this run
+        merged = dict(baseline, **results)
+        baseline_path.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cases": {
+                name: {key: round(value, 3) for key, value in result.items()}
+                for name, result in sorted(merged.items())
+            }
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"\nSaved {len(results)} baselines to {baseline_path}")
+    
+    if args.check:
+        if not baseline:
+            print(f"\nNo baseline at {baseline_path}; run with --save first")
+            sys.exit(2)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Import-time benchmark: cumulative `python -X importtime` cost of the entry points, with a budget
+
+Each target is imported in a fresh interpreter several times and the
+median cumulative time is compared against its budget. Targets that must
+stay light are also checked for heavy dependencies (google-genai, the
+browser drivers) that should only load on first use. Exits non-zero on a
+regression so it can gate CI.
+
+Usage:
+    
+    python benchmarks/bench_import_time.py --runs 5
+    python benchmarks/bench_import_time.py --budget-scale 2  # slower machines
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Set, Tuple
+from bench_utils import REPO_ROOT, print_table
+
+# Median cumulative import time budget per module, in milliseconds
+BUDGETS_MS = {
+    "config": 50,
+    "models": 400,
+    "message_processor": 400,
+    "conversation_manager": 450,
+    "bot_new": 500,
+    "main": 550,
+    "advanced_ai_client": 1500,
+}
+
+# Modules that only the AI client and the browser backends may pull in
+HEAVY_MODULES = ("google.genai", "selenium", "webdriver_manager", "playwright")
+HEAVY_ALLOWED = {"advanced_ai_client"}
+
+def import_profile(module: str) -> Tuple[float, List[str]]:
+    """Import module in a fresh interpreter; cumulative ms and every module it loaded"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    
+    cumulative_us = 0
+    loaded = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        loaded.append(name.strip())
+        if name.strip() == module and not name.startswith("  "):
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000, loaded
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget")
+    parser.add_argument("--modules", nargs="*", default=list(BUDGETS_MS))
+    args = parser.parse_args()
+    
+    rows = []
+    failures = []
+    for module in args.modules:
+        budget = BUDGETS_MS.get(module, 0) * args.budget_scale
+        times = []
+        heavy: Set[str] = set()
+        for _ in range(args.runs):
+            elapsed, loaded = import_profile(module)
+            times.append(elapsed)
+            heavy.update(prefix for prefix in HEAVY_MODULES for name in loaded if name.startswith(prefix))
+        
+        median = statistics.median(times)
+        unexpected = sorted(heavy) if module not in HEAVY_ALLOWED else []
+        ok = (not budget or median <= budget) and not unexpected
+        if not ok:
+            failures.append(module)
+        rows.append([module, median, min(times), budget or "-", ", ".join(unexpected) or "-", "ok" if ok else "FAIL"])
+    
+    print(f"\nCumulative import time over {args.runs} fresh interpreters (milliseconds)")
+    print_table(["module", "median_ms", "min_ms", "budget_ms", "heavy_imports", "status"], rows)
+    
+    if failures:
+        print(f"\nImport-time budget exceeded: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Microbenchmark: per-message keyword routing, legacy any() scans vs the compiled matcher
+
+Usage:
+    
+    python benchmarks/bench_keyword_matcher.py --iterations 2000
+"""
+import argparse
+import timeit
+from bench_utils import print_table
+from keyword_matcher import INTENT_KEYWORDS, INTENT_MATCHER, Intent
+
+# The scans the bot used to run for every message, one lowercase per call site
+LEGACY_SCANS = [
+    [Intent.SEARCH_OR_FUNCTION],  # _requires_search_or_function
+    [Intent.WEB_SEARCH],  # _needs_web_search
+    [Intent.FUNCTION_CALL],  # _needs_function_call
+    [Intent.CONTEXT_QUERY],  # handle_context_query
+    [Intent.SUMMARY_QUERY],  # handle_context_query
+    [Intent.SYSTEM_MESSAGE],  # should_skip_message
+]
+
+MESSAGES = {
+    "short english": "hey, can you help me with my homework please",
+    "long english": " ".join(["I was wondering whether you could help me plan a trip to the hills"] * 30),
+    "long bengali": " ".join(["আমি আগামী সপ্তাহে দার্জিলিং ঘুরতে যেতে চাই, আমাকে একটু সাহায্য করবে"] * 30),
+    "banglish": " ".join(["ami kal sokale office jabo tarpor bikele bazar korbo"] * 20),
+}
+
+def legacy_route(message: str) -> set:
+    """Reproduce the old per-call-site lower() + any() keyword scans"""
+    found = set()
+    for tags in LEGACY_SCANS:
+        message_lower = message.lower()
+        for tag in tags:
+            if any(keyword in message_lower for keyword in INTENT_KEYWORDS[tag]):
+                found.add(tag)
+    return found
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    
+    rows = []
+    for name, message in MESSAGES.items():
+        legacy = timeit.timeit(lambda: legacy_route(message), number=args.iterations)
+        compiled = timeit.timeit(lambda: INTENT_MATCHER.match(message), number=args.iterations)
+        rows.append([
+            name, len(message),
+            legacy / args.iterations * 1e6,
+            compiled / args.iterations * 1e6,
+            f"{legacy / compiled:.1f}x"
+        ])
+    
+    print("\nKeyword routing per message (microseconds)")
+    print_table(["corpus", "chars", "legacy_us", "matcher_us", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
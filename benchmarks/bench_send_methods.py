@@ -0,0 +1,59 @@
+"""
+Send latency against reply length for the paste and send_keys send paths
+
+Drives the Selenium backend against the local static chat page, so no
+WhatsApp account is needed. Usage:
+    
+    python benchmarks/bench_send_methods.py --lengths 100 1000 4096 --iterations 5
+"""
+import argparse
+from bench_utils import print_table, summarize, time_calls
+from fake_page import CONTACT_NAME, write_chat_page
+from config import Config
+from driver_base import create_whatsapp_driver
+
+SAMPLE_TEXT = "Here is the information you asked for.\nThe second line keeps going with details. "
+
+def reply_of_length(length: int) -> str:
+    """Repeat the sample reply up to exactly length characters"""
+    return (SAMPLE_TEXT * (length // len(SAMPLE_TEXT) + 1))[:length].strip()
+
+def benchmark_method(method: str, url: str, lengths: list, iterations: int) -> list:
+    """Time send_message for each reply length with one send method"""
+    config = Config()
+    config.BROWSER_BACKEND = "selenium"
+    config.SEND_METHOD = method
+    config.WHATSAPP_URL = url
+    config.WEBDRIVER_TIMEOUT = 15
+    
+    driver = create_whatsapp_driver(config)
+    try:
+        if not driver.login_whatsapp() or not driver.open_chat(CONTACT_NAME):
+            raise RuntimeError("could not load the benchmark page")
+        
+        rows = []
+        for length in lengths:
+            text = reply_of_length(length)
+            stats = summarize(time_calls(lambda: driver.send_message(text), iterations))
+            rows.append([method, length, stats["mean"], stats["p95"], stats["mean"] / length * 100])
+        return rows
+    finally:
+        driver.cleanup()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--methods", nargs="+", default=["keys", "paste"])
+    parser.add_argument("--lengths", nargs="+", type=int, default=[100, 500, 1000, 2000, 4096])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    
+    url = write_chat_page(50)
+    rows = []
+    for method in args.methods:
+        rows.extend(benchmark_method(method, url, args.lengths, args.iterations))
+    
+    print("\nsend_message latency by reply length (ms)")
+    print_table(["method", "chars", "mean", "p95", "per_100_chars"], rows)
+
+if __name__ == "__main__":
+    main()
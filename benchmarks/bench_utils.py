@@ -0,0 +1,51 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+# Benchmarks run as scripts; make the bot modules importable
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a sample (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+def time_calls(func: Callable[[], object], iterations: int) -> List[float]:
+    """Call func repeatedly and return each call's duration in seconds"""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+def summarize(durations: Sequence[float]) -> Dict[str, float]:
+    """Mean and tail latencies in milliseconds"""
+    if not durations:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {
+        "mean": sum(durations) / len(durations) * 1000,
+        "p50": percentile(durations, 50) * 1000,
+        "p95": percentile(durations, 95) * 1000,
+        "p99": percentile(durations, 99) * 1000,
+    }
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[object]]) -> None:
+    """Print rows as a left-aligned plain text table"""
+    cells = [[str(cell) for cell in headers]] + [
+        [f"{cell:.3f}" if isinstance(cell, float) else str(cell) for cell in row] for row in rows
+    ]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for index, row in enumerate(cells):
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
@@ -0,0 +1,78 @@
+"""
+Chat corpora for the hot-path benchmarks: English, Bengali and Banglish (Bengali in Latin script)
+"""
+from typing import Dict, List
+from models import Message
+
+ENGLISH = [
+    "hey are you there?",
+    "Can you tell me what the weather is like in Kolkata today",
+    "what time is it in New York right now",
+    "I need help writing an email to my manager about taking leave next week",
+    "lol that's hilarious 😂",
+    "What did I ask you before?",
+    "Who won the football match last night?",
+    "ok thanks!",
+    "Can you summarize our conversation so far",
+    "My laptop keeps freezing when I open too many tabs, any ideas how to fix it?",
+    "Recommend a good book on Indian history for a beginner",
+    "good night, talk tomorrow",
+]
+
+BENGALI = [
+    "তুমি কেমন আছো?",
+    "আজ কলকাতার আবহাওয়া কেমন থাকবে বলতে পারো?",
+    "এখন কয়টা বাজে?",
+    "আমার ছেলের স্কুলের জন্য একটা ছুটির দরখাস্ত লিখে দাও",
+    "আমি আগে তোমাকে কি জিজ্ঞেস করেছিলাম?",
+    "গতকালের খেলায় কে জিতেছে?",
+    "ধন্যবাদ, অনেক উপকার হলো",
+    "আমাদের কথোপকথনের সারাংশ দাও",
+    "ভাত রান্না করার সহজ উপায় কী?",
+    "দার্জিলিং ঘুরতে গেলে কোথায় কোথায় যাওয়া উচিত?",
+    "শুভ রাত্রি",
+    "আমার ফোনের চার্জ তাড়াতাড়ি শেষ হয়ে যাচ্ছে, কী করব?",
+]
+
+BANGLISH = [
+    "ki korcho?",
+    "aaj kolkata te brishti hobe naki?",
+    "ekhon koyta baje bolo to",
+    "amake ekta leave application likhe dao please",
+    "ami age ki jiggesh korechilam?",
+    "kal er match ke jitlo?",
+    "thik ache thanks bhai",
+    "amader conversation ta summarize koro",
+    "biryani banano r recipe ta bolo",
+    "darjeeling e ghurte gele kothay kothay jabo?",
+    "good night, kal kotha hobe",
+    "amar phone er charge khub taratari sesh hoye jacche, ki korbo?",
+]
+
+CORPORA: Dict[str, List[str]] = {
+    "english": ENGLISH,
+    "bengali": BENGALI,
+    "banglish": BANGLISH,
+}
+
+# A long assistant reply as generated by Gemini, before cleaning
+REPLY = (
+    "Sure! Here is what I found about the weather in Kolkata today.\n\n\n"
+    "- Morning: light rain, around 27C\n- Afternoon: humid   and cloudy\n"
+    "- Evening: a chance of thunderstorms 🌧️\n\n"
+    "আজ সন্ধ্যায় বজ্রসহ বৃষ্টি হতে পারে, তাই ছাতা সঙ্গে রাখুন।\n"
+    "Let me know if you want the forecast for tomorrow as well!"
+)
+
+def chat_messages(count: int) -> List[Message]:
+    """A chat of count messages cycling through every corpus, alternating in and out"""
+    texts = [text for corpus in CORPORA.values() for text in corpus]
+    return [
+        Message(
+            text=f"{texts[index % len(texts)]} ({index})",
+            is_incoming=index % 2 == 0,
+            timestamp=1700000000.0 + index,
+            message_id=f"{'false' if index % 2 == 0 else 'true'}_corpus_{index}"
+        )
+        for index in range(count)
+    ]
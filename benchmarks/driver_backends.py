@@ -0,0 +1,57 @@
+"""
+Side-by-side per-command latency of the Selenium and Playwright drivers
+
+Runs both backends against a local static chat page, so no WhatsApp account
+is needed. Usage:
+    
+    python benchmarks/driver_backends.py --messages 300 --iterations 50
+"""
+import argparse
+from bench_utils import print_table, summarize, time_calls
+from fake_page import CONTACT_NAME, write_chat_page
+from config import Config
+from driver_base import create_whatsapp_driver
+
+def benchmark_backend(backend: str, url: str, iterations: int) -> list:
+    """Time the driver operations the bot issues on every poll and reply"""
+    config = Config()
+    config.BROWSER_BACKEND = backend
+    config.WHATSAPP_URL = url
+    config.WEBDRIVER_TIMEOUT = 15
+    
+    driver = create_whatsapp_driver(config)
+    try:
+        if not driver.login_whatsapp() or not driver.open_chat(CONTACT_NAME):
+            raise RuntimeError(f"{backend}: could not load the benchmark page")
+        
+        operations = [
+            ("get_latest_messages", driver.get_latest_messages),
+            ("get_unread_chats", driver.get_unread_chats),
+            ("is_driver_alive", driver.is_driver_alive),
+            ("send_message", lambda: driver.send_message("Benchmark reply")),
+        ]
+        rows = []
+        for name, operation in operations:
+            stats = summarize(time_calls(operation, iterations))
+            rows.append([backend, name, stats["mean"], stats["p50"], stats["p95"]])
+        return rows
+    finally:
+        driver.cleanup()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", nargs="+", default=["selenium", "playwright"])
+    parser.add_argument("--messages", type=int, default=300, help="Messages rendered in the chat")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    
+    url = write_chat_page(args.messages)
+    rows = []
+    for backend in args.backends:
+        rows.extend(benchmark_backend(backend, url, args.iterations))
+    
+    print(f"\nDriver command latency, {args.messages} messages in chat (ms)")
+    print_table(["backend", "operation", "mean", "p50", "p95"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Stand-in for the WhatsApp Web DOM used by the drivers, with a scripted load generator
+"""
+import html
+import tempfile
+from pathlib import Path
+
+CONTACT_NAME = "Bench Contact"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>WhatsApp</title></head>
+<body>
+<div id="side">
+  <div contenteditable="true" data-tab="3" role="textbox" title="Search input textbox"></div>
+  <div id="pane-side">
+    <div role="listitem"><span title="{contact}">{contact}</span></div>
+  </div>
+</div>
+<div id="main">
+  <header><span title="{contact}">{contact}</span></header>
+  <div id="messages">
+{rows}
+  </div>
+  <footer>
+    <div contenteditable="true" data-tab="10" role="textbox" spellcheck="true"
+         data-lexical-editor="true" aria-label="Type a message"></div>
+  </footer>
+</div>
+<script>
+(function () {{
+  var sent = 0;
+  // Timestamps read back by the end-to-end harness
+  window.__bench = {{ injected: [], sent: [] }};
+  var input = document.querySelector('footer [contenteditable="true"]');
+  input.addEventListener('keydown', function (event) {{
+    if (event.key !== 'Enter' || event.shiftKey) {{ return; }}
+    event.preventDefault();
+    var text = input.innerText.trim();
+    input.innerHTML = '';
+    if (!text) {{ return; }}
+    sent += 1;
+    var row = document.createElement('div');
+    row.className = 'message-out';
+    row.setAttribute('data-id', 'true_bench_out_' + sent);
+    var span = document.createElement('span');
+    span.className = '_ao3e selectable-text';
+    span.innerText = text;
+    row.appendChild(span);
+    document.getElementById('messages').appendChild(row);
+    window.__bench.sent.push({{ t: Date.now(), text: text }});
+  }});
+  
+  // Load generator: append count incoming messages, one every intervalMs
+  window.__benchStart = function (count, intervalMs, startDelayMs) {{
+    var injected = 0;
+    function inject() {{
+      injected += 1;
+      var row = document.createElement('div');
+      row.className = 'message-in';
+      row.setAttribute('data-id', 'false_load_' + injected);
+      row.innerHTML = '<div class="copyable-text"><span class="_ao3e selectable-text" dir="ltr"></span></div>';
+      row.querySelector('span').innerText = 'Load message #' + injected + ' asking about topic ' + injected;
+      document.getElementById('messages').appendChild(row);
+      window.__bench.injected.push(Date.now());
+      if (injected < count) {{ setTimeout(inject, intervalMs); }}
+    }}
+    setTimeout(inject, startDelayMs);
+  }};
+}})();
+</script>
+</body>
+</html>
+"""
+
+ROW_TEMPLATE = (
+    '    <div class="{direction}" data-id="{message_id}">'
+    '<div class="copyable-text"><span class="_ao3e selectable-text" dir="ltr">{text}</span></div></div>'
+)
+
+def build_chat_page(message_count: int, contact: str = CONTACT_NAME) -> str:
+    """Render a chat page with message_count alternating in/out messages"""
+    rows = []
+    for index in range(message_count):
+        incoming = index % 2 == 0
+        rows.append(ROW_TEMPLATE.format(
+            direction="message-in" if incoming else "message-out",
+            message_id=f"{'false' if incoming else 'true'}_bench_{index}",
+            text=html.escape(f"Benchmark message number {index}")
+        ))
+    return PAGE_TEMPLATE.format(contact=html.escape(contact), rows="\n".join(rows))
+
+def write_chat_page(message_count: int, directory: str = "") -> str:
+    """Write a chat page to disk and return its file:// URL"""
+    target = Path(directory or tempfile.mkdtemp(prefix="wa_bench_")) / f"chat_{message_count}.html"
+    target.write_text(build_chat_page(message_count), encoding="utf-8")
+    return target.resolve().as_uri()
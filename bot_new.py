@@ -2,31 +2,142 @@
 Main WhatsApp Gemini AI Bot orchestrator
 """
 import time
-from typing import Set, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
 from config import Config
 from models import BotStatus, BotStats, Message
-from advanced_ai_client import AdvancedGeminiAIClient
-from whatsapp_driver import WhatsAppDriver
+from dedup_index import MessageDedupIndex
+from chat_scheduler import ChatScheduler
+from rate_limiter import Priority
+from state_store import BotStateStore
+from driver_base import create_whatsapp_driver
 from conversation_manager import ConversationManager
 from message_processor import MessageProcessor
+from local_responder import LocalResponder
+from metrics import REGISTRY, RESPONSE_SECONDS, STAGE_SECONDS, MetricsServer
+
+# Counters that add up across restarts when a state store is configured
+LIFETIME_COUNTERS = ("total_messages_received", "total_messages_sent", "total_errors", "model_calls_avoided")
 
 class WhatsAppGeminiBot:
     """Main bot class that orchestrates all components"""
     
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, gemini_client: Optional[Any] = None):
         self.config = config or Config()
         self.config.validate()
+        # Seconds spent in each startup phase, reported once the bot can reply
+        self.startup_timings: Dict[str, float] = {}
         
-        # Initialize components
-        self.ai_client = AdvancedGeminiAIClient(self.config)
-        self.whatsapp_driver = WhatsAppDriver(self.config)
-        self.conversation_manager = ConversationManager(self.config)
+        # Initialize components; google-genai is only imported once a bot is built
+        phase_start = time.perf_counter()
+        from advanced_ai_client import AdvancedGeminiAIClient
+        self.ai_client = AdvancedGeminiAIClient(self.config, client=gemini_client)
+        self.startup_timings["ai_client"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+        self.whatsapp_driver = create_whatsapp_driver(self.config)
+        self.startup_timings["browser"] = time.perf_counter() - phase_start
+        # Rolling summaries run on one background thread, off the reply path
+        self.summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self.state_store: Optional[BotStateStore] = None
+        if self.config.STATE_DB:
+            self.state_store = BotStateStore(self.config.STATE_DB, flush_interval=self.config.STATE_FLUSH_INTERVAL)
+        # Key for stored stats: the target contact, or every chat in multi-chat mode
+        self.stats_key = "*" if self.config.MULTI_CHAT_MODE else self.config.TARGET_CONTACT
+        self.conversation_manager = self._new_conversation_manager(self.config.TARGET_CONTACT)
         self.message_processor = MessageProcessor()
+        self.local_responder: Optional[LocalResponder] = None
+        if self.config.ENABLE_LOCAL_RESPONDER:
+            self.local_responder = LocalResponder(min_confidence=self.config.LOCAL_RESPONDER_MIN_CONFIDENCE)
         
         # Bot state
         self.status = BotStatus(is_running=False)
         self.stats = BotStats()
-        self.processed_messages: Set[str] = set()
+        self.processed_messages = self._new_dedup_index(self.config.TARGET_CONTACT)
+        # Counters of earlier sessions loaded from the state store
+        self.previous_totals: Dict[str, Any] = {}
+        self._restore_stats()
+        
+        # Multi-chat state: one conversation and dedup index per contact
+        self.chat_sessions: Dict[str, Tuple[ConversationManager, MessageDedupIndex]] = {}
+        self.scheduler = ChatScheduler(aging_weight=self.config.CHAT_AGING_WEIGHT,
+                                       max_visit_messages=self.config.CHAT_MAX_VISIT_MESSAGES)
+        
+        # Set when the push observer is (re)installed: the next read is a full snapshot
+        self._catch_up = False
+        
+        # Replies whose latency went into average_response_time
+        self._timed_responses = 0
+        self.metrics_server: Optional[MetricsServer] = None
+        if self.config.METRICS_PORT:
+            self.metrics_server = MetricsServer(self.config.METRICS_HOST, self.config.METRICS_PORT)
+            REGISTRY.add_collector(self._collect_metrics)
+    
+    def _new_conversation_manager(self, contact: str) -> ConversationManager:
+        """Create a contact's conversation manager wired to the summarizer and store"""
+        summarize = self.config.ENABLE_ROLLING_SUMMARY
+        return ConversationManager(
+            self.config,
+            summarizer=self.ai_client.update_rolling_summary if summarize else None,
+            executor=self.summary_executor if summarize else None,
+            store=self.state_store,
+            contact=contact
+        )
+    
+    def _new_dedup_index(self, contact: str) -> MessageDedupIndex:
+        """Create an empty dedup index sized from config, persisting keys when stored"""
+        on_add = partial(self.state_store.record_processed, contact) if self.state_store else None
+        return MessageDedupIndex(
+            max_size=self.config.DEDUP_MAX_ENTRIES,
+            ttl_seconds=self.config.DEDUP_TTL_SECONDS,
+            on_add=on_add
+        )
+    
+    def _restore_state(self, contact: str) -> bool:
+        """Reload the contact's history and processed keys from the state store
+        
+        Returns True when processed keys were found, so the chat does not
+        need to be scanned to seed the dedup index.
+        """
+        if not self.state_store:
+            return False
+        
+        start_time = time.perf_counter()
+        messages, summary = self.state_store.load_conversation(contact, self.config.MAX_CONVERSATION_HISTORY)
+        keys = self.state_store.load_processed(contact, self.config.DEDUP_MAX_ENTRIES)
+        self.conversation_manager.restore(messages, summary)
+        self.processed_messages.restore(keys)
+        self.state_store.prune(contact, self.config.MAX_CONVERSATION_HISTORY, self.config.DEDUP_MAX_ENTRIES)
+        
+        if keys:
+            print(f"Restored {len(messages)} messages and {len(keys)} processed keys for {contact} "
+                  f"in {(time.perf_counter() - start_time) * 1000:.1f}ms")
+        return bool(keys)
+    
+    def _restore_stats(self) -> None:
+        """Load the totals of earlier sessions; self.stats keeps counting this session only"""
+        if not self.state_store:
+            return
+        stored = self.state_store.load_stats(self.stats_key)
+        self.previous_totals = {field: stored.get(field, 0) for field in LIFETIME_COUNTERS}
+        self.previous_totals["languages_detected"] = dict(stored.get("languages_detected", {}))
+    
+    def lifetime_stats(self) -> Dict[str, Any]:
+        """Counters summed over every stored session, this one included"""
+        totals: Dict[str, Any] = {
+            field: self.previous_totals.get(field, 0) + getattr(self.stats, field)
+            for field in LIFETIME_COUNTERS
+        }
+        languages = dict(self.previous_totals.get("languages_detected", {}))
+        for language, count in self.stats.languages_detected.items():
+            languages[language] = languages.get(language, 0) + count
+        totals["languages_detected"] = languages
+        return totals
+    
+    def _save_stats(self) -> None:
+        """Queue a snapshot of the lifetime counters for the state store"""
+        if self.state_store:
+            self.state_store.record_stats(self.stats_key, self.lifetime_stats())
     
     def initialize(self) -> bool:
         """Initialize the bot and login to WhatsApp"""
@@ -34,14 +145,19 @@ class WhatsAppGeminiBot:
             print("Initializing WhatsApp Gemini AI Bot...")
             
             # Login to WhatsApp
+            phase_start = time.perf_counter()
             if not self.whatsapp_driver.login_whatsapp():
                 print("Failed to login to WhatsApp")
                 return False
+            self.startup_timings["login"] = time.perf_counter() - phase_start
             
-            # Open target chat
-            if not self.whatsapp_driver.open_chat(self.config.TARGET_CONTACT):
+            # Open target chat (multi-chat mode opens chats as they get messages)
+            phase_start = time.perf_counter()
+            if (not self.config.MULTI_CHAT_MODE and
+                    not self.whatsapp_driver.open_chat(self.config.TARGET_CONTACT)):
                 print(f"Failed to open chat with {self.config.TARGET_CONTACT}")
                 return False
+            self.startup_timings["open_chat"] = time.perf_counter() - phase_start
             
             print("Bot initialized successfully!")
             return True
@@ -60,40 +176,55 @@ class WhatsAppGeminiBot:
         self.status.start_time = time.time()
         end_time = self.status.start_time + (self.config.CHAT_DURATION_MINUTES * 60)
         
-        # Initialize message tracking
-        self._initialize_message_tracking()
-        
-        # Send initial greeting
-        self._send_initial_greeting()
-        
-        # Main chat loop
-        self._run_chat_loop(end_time)
+        if self.config.MULTI_CHAT_MODE:
+            self._report_startup()
+            self._run_multi_chat_loop(end_time)
+        else:
+            # Initialize message tracking, unless a warm restart already did
+            phase_start = time.perf_counter()
+            if not self._restore_state(self.config.TARGET_CONTACT):
+                self._initialize_message_tracking()
+            self.startup_timings["message_tracking"] = time.perf_counter() - phase_start
+            self._report_startup()
+            
+            # Send initial greeting
+            self._send_initial_greeting()
+            
+            # Main chat loop
+            self._run_chat_loop(end_time)
         
         # Update final status
         self.status.is_running = False
         self.status.end_time = time.time()
         self.stats.session_duration = self.status.end_time - self.status.start_time
+        self._save_stats()
         
         print("Chat bot session ended")
     
+    def _report_startup(self) -> None:
+        """Print how long each startup phase took until the bot was ready to reply"""
+        phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.startup_timings.items())
+        print(f"Ready to reply after {sum(self.startup_timings.values()):.1f}s ({phases})")
+    
     def _initialize_message_tracking(self) -> None:
         """Initialize message tracking by getting existing messages"""
-        initial_messages = self.whatsapp_driver.get_latest_messages()
+        initial_messages = self._get_latest_messages()
         
-        # Add all initial messages to processed set
-        for msg in initial_messages:
-            self.processed_messages.add(msg.text)
+        # Add all initial messages to the dedup index
+        self.processed_messages.update(self.message_processor.message_keys(initial_messages, self.processed_messages))
         
         print(f"Found {len(initial_messages)} existing messages in chat")
     
     def _send_initial_greeting(self) -> None:
         """Send initial greeting message"""
         try:
-            greeting = self.ai_client.generate_response("Say hello briefly as an AI assistant")
-            clean_greeting = self.message_processor.clean_text_for_whatsapp(greeting)
+            greeting = self.ai_client.generate_response(
+                "Say hello briefly as an AI assistant", priority=Priority.GREETING
+            )
+            clean_greeting = self.message_processor.clean_text_for_whatsapp(greeting, self.config.allows_emoji())
             
-            if self.whatsapp_driver.send_message(clean_greeting):
-                self.processed_messages.add(clean_greeting)
+            if self._send_message(clean_greeting):
+                self.processed_messages.add(self.message_processor.text_key(clean_greeting))
                 self.conversation_manager.add_message(clean_greeting, role="assistant")
                 self.stats.total_messages_sent += 1
             
@@ -104,33 +235,45 @@ class WhatsAppGeminiBot:
     
     def _run_chat_loop(self, end_time: float) -> None:
         """Main chat monitoring and response loop"""
-        message_check_counter = 0
+        push_mode = self._start_push_detection()
+        last_status_time = time.time()
         
         while time.time() < end_time and self.status.is_running:
             try:
                 # Check for new messages
-                current_messages = self.whatsapp_driver.get_latest_messages()
+                snapshot = not push_mode or self._catch_up
+                if not snapshot:
+                    # Block until the page observer reports messages (or times out)
+                    timeout = min(self.config.PUSH_WAIT_TIMEOUT, max(0.0, end_time - time.time()))
+                    current_messages = self.whatsapp_driver.wait_for_new_messages(timeout)
+                    if current_messages is None:
+                        # Observer detached (chat re-rendered); reinstall or fall back
+                        push_mode = self._start_push_detection()
+                        continue
+                else:
+                    current_messages = self._get_latest_messages()
+                    self._catch_up = False
                 
                 # Filter new incoming messages
-                new_messages = self.message_processor.filter_new_messages(
-                    current_messages, self.processed_messages
-                )
-                
-                # Process each new message
-                for msg in new_messages:
-                    self._process_new_message(msg)
+                new_messages = self._filter_new_messages(current_messages, snapshot=snapshot)
                 
                 # Update stats
                 self.stats.total_messages_received += len(new_messages)
                 
+                # Answer a burst of consecutive messages with a single reply
+                if new_messages:
+                    burst = self._collect_burst(new_messages, push_mode)
+                    self._process_new_message(self.message_processor.merge_messages(burst))
+                
                 # Sleep before next check
-                time.sleep(self.config.CHECK_INTERVAL)
+                if not push_mode:
+                    time.sleep(self.config.CHECK_INTERVAL)
                 
                 # Periodic status update
-                message_check_counter += 1
-                if message_check_counter % 60 == 0:  # Every 30 seconds
-                    self._log_status_update(len(current_messages))
-                
+                if time.time() - last_status_time >= self.config.STATUS_LOG_INTERVAL:
+                    self._log_status_update(push_mode)
+                    last_status_time = time.time()
+                    
             except KeyboardInterrupt:
                 print("\nBot stopped by user")
                 self.status.is_running = False
@@ -140,52 +283,182 @@ class WhatsAppGeminiBot:
                 self.stats.total_errors += 1
                 time.sleep(1)
     
+    def _collect_burst(self, messages: List[Message], push_mode: bool) -> List[Message]:
+        """Keep collecting follow-up messages until the chat goes quiet
+        
+        Every new message restarts the COALESCE_WINDOW debounce, and so does
+        the contact still typing when it runs out. COALESCE_MAX_WAIT caps
+        the total wait.
+        """
+        window = self.config.COALESCE_WINDOW
+        if window <= 0:
+            return messages
+        
+        burst = list(messages)
+        start_time = time.time()
+        max_wait = self.config.COALESCE_MAX_WAIT
+        latest_deadline = start_time + max_wait
+        deadline = self.message_processor.burst_deadline(start_time, start_time, window, max_wait)
+        
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                if time.time() < latest_deadline and self._is_contact_typing():
+                    deadline = self.message_processor.burst_deadline(time.time(), start_time, window, max_wait)
+                    continue
+                break
+            
+            if push_mode:
+                current_messages = self.whatsapp_driver.wait_for_new_messages(remaining)
+                if current_messages is None:
+                    # Observer detached; the main loop reinstalls it
+                    break
+            else:
+                time.sleep(min(self.config.CHECK_INTERVAL, remaining))
+                current_messages = self._get_latest_messages()
+            
+            more = self._filter_new_messages(current_messages, snapshot=not push_mode)
+            if more:
+                burst.extend(more)
+                self.stats.total_messages_received += len(more)
+                deadline = self.message_processor.burst_deadline(time.time(), start_time, window, max_wait)
+        
+        if len(burst) > 1:
+            print(f"Coalesced {len(burst)} messages into one reply")
+        return burst
+    
+    def _is_contact_typing(self) -> bool:
+        """Check the chat header for the contact's typing indicator"""
+        return self.message_processor.is_typing_indicator(self.whatsapp_driver.get_chat_status())
+    
+    def _start_push_detection(self) -> bool:
+        """Install the page observer when push detection is enabled
+        
+        The observer only reports rows added after it is installed, so the
+        next read is a full snapshot. Messages that arrived while nothing
+        was watching, e.g. during downtime before a warm restart, are then
+        answered in push mode just as the poll loop answers them.
+        """
+        if self.config.DETECTION_MODE != "push":
+            return False
+        
+        if self.whatsapp_driver.install_message_observer():
+            print("Message detection: push (MutationObserver)")
+            self._catch_up = True
+            return True
+        
+        print(f"Message detection: polling every {self.config.CHECK_INTERVAL}s (observer unavailable)")
+        return False
+    
+    def _run_multi_chat_loop(self, end_time: float) -> None:
+        """Serve every chat with unread messages from one browser session"""
+        print("Multi-chat mode: watching the chat list for unread messages")
+        current_chat: Optional[str] = None
+        last_status_time = time.time()
+        
+        while time.time() < end_time and self.status.is_running:
+            try:
+                # The open chat never shows an unread badge, so drain it directly
+                handled = self._process_chat_messages() if current_chat else 0
+                
+                unread_chats = [
+                    (name, count) for name, count in self.whatsapp_driver.get_unread_chats()
+                    if self._is_served_contact(name)
+                ]
+                self.scheduler.update(unread_chats)
+                
+                # Stay in a busy chat to save switches, until a waiting chat outranks it
+                self.scheduler.record_handled(handled)
+                next_chat = self.scheduler.next_chat(exclude=current_chat, current_unread=handled)
+                
+                if next_chat:
+                    switch_start = time.time()
+                    if self.whatsapp_driver.open_chat(next_chat):
+                        self.scheduler.record_switch(time.time() - switch_start)
+                        self.scheduler.mark_served(next_chat)
+                        current_chat = next_chat
+                        self._activate_chat(next_chat, dict(unread_chats).get(next_chat, 0))
+                        self.scheduler.record_handled(self._process_chat_messages())
+                    else:
+                        self.scheduler.mark_failed(next_chat)
+                elif not handled:
+                    time.sleep(self.config.CHECK_INTERVAL)
+                
+                if time.time() - last_status_time >= self.config.STATUS_LOG_INTERVAL:
+                    self._log_status_update(False)
+                    print(f"Chats: {len(self.chat_sessions)}, "
+                          f"Switches: {self.scheduler.switch_count}, "
+                          f"Avg switch: {self.scheduler.switch_cost:.2f}s, "
+                          f"Waiting: {self.scheduler.pending_count()}")
+                    last_status_time = time.time()
+                    
+            except KeyboardInterrupt:
+                print("\nBot stopped by user")
+                self.status.is_running = False
+                break
+            except Exception as e:
+                print(f"Error in multi-chat loop: {e}")
+                self.stats.total_errors += 1
+                time.sleep(1)
+    
+    def _is_served_contact(self, contact_name: str) -> bool:
+        """Check the contact against the optional multi-chat allowlist"""
+        return not self.config.MULTI_CHAT_CONTACTS or contact_name in self.config.MULTI_CHAT_CONTACTS
+    
+    def _activate_chat(self, contact_name: str, unread_count: int) -> None:
+        """Point the bot's conversation and dedup state at the opened chat"""
+        session = self.chat_sessions.get(contact_name)
+        first_visit = session is None
+        if first_visit:
+            session = (self._new_conversation_manager(contact_name), self._new_dedup_index(contact_name))
+            self.chat_sessions[contact_name] = session
+        
+        self.conversation_manager, self.processed_messages = session
+        
+        if first_visit and not self._restore_state(contact_name):
+            # Only the messages behind the unread badge are new on a first visit
+            messages = self._get_latest_messages()
+            keys = self.message_processor.message_keys(messages, self.processed_messages)
+            incoming = [key for msg, key in zip(messages, keys) if msg.is_incoming]
+            already_seen = incoming[:-unread_count] if unread_count > 0 else incoming
+            self.processed_messages.update(key for msg, key in zip(messages, keys) if not msg.is_incoming)
+            self.processed_messages.update(already_seen)
+    
+    def _process_chat_messages(self) -> int:
+        """Reply to every new message in the open chat, returning how many"""
+        new_messages = self._filter_new_messages(self._get_latest_messages())
+        
+        # Holding the browser on one chat would delay the others, so messages
+        # that are already pending are merged without waiting for more
+        if new_messages:
+            self._process_new_message(self.message_processor.merge_messages(new_messages))
+        
+        self.stats.total_messages_received += len(new_messages)
+        return len(new_messages)
+    
     def _process_new_message(self, message: Message) -> None:
         """Process a single new message"""
         try:
             print(f"Received: {message.text}")
+            started_at = time.perf_counter()
             
-            # Add to processed set
-            self.processed_messages.add(message.text)
+            if self.config.ENABLE_STREAMING:
+                self._stream_reply(message)
+                self.status.last_activity = time.time()
+                return
             
-            # Check if it's a context query first
-            context_response = self.conversation_manager.handle_context_query(message.text)
-            
-            if context_response:
-                response = context_response
-                # Add to conversation history
-                self.conversation_manager.add_message(message.text, role="user")
-                self.conversation_manager.add_message(response, role="assistant")
-            else:
-                # Add user message to conversation
-                self.conversation_manager.add_message(message.text, role="user")
-                
-                # Get conversation context
-                context = self.conversation_manager.get_conversation_context()
-                
-                # Generate AI response
-                response = self.ai_client.generate_response(message.text, context)
-                
-                # Add AI response to conversation
-                self.conversation_manager.add_message(response, role="assistant")
+            response = self._generate_reply(message.text)
             
             # Clean and validate response
-            clean_response = self.message_processor.validate_response(
-                response, self.config.MAX_RESPONSE_LENGTH
-            )
+            clean_response = self._clean_response(response)
             
             if clean_response:
                 # Wait before responding
                 time.sleep(self.config.RESPONSE_DELAY)
                 
                 # Send response
-                if self.whatsapp_driver.send_message(clean_response):
-                    self.processed_messages.add(clean_response)
-                    self.stats.total_messages_sent += 1
-                    print(f"✓ Responded to: {self.message_processor.truncate_message(message.text)}")
-                else:
-                    print("✗ Failed to send response")
-                    self.stats.total_errors += 1
+                sent = self._send_message(clean_response)
+                self._record_send_result(message, clean_response, sent, started_at)
             else:
                 print("✗ Generated response was invalid or empty")
                 self.stats.total_errors += 1
@@ -197,12 +470,150 @@ class WhatsAppGeminiBot:
             print(f"Error processing message: {e}")
             self.stats.total_errors += 1
     
-    def _log_status_update(self, total_messages: int) -> None:
+    def _local_reply(self, message_text: str) -> Optional[str]:
+        """Template reply for time, small talk and context queries, or None to ask Gemini"""
+        if not self.local_responder:
+            return self.conversation_manager.handle_context_query(message_text)
+        with STAGE_SECONDS.time(stage="local"):
+            response = self.local_responder.respond(message_text, self.conversation_manager)
+        if response:
+            self.stats.model_calls_avoided += 1
+        return response
+    
+    def _generate_reply(self, message_text: str) -> str:
+        """Produce the reply for a message and record both turns in history"""
+        # Add user message to conversation
+        self.conversation_manager.add_message(message_text, role="user")
+        
+        # Check if it can be answered without the model first
+        local_response = self._local_reply(message_text)
+        
+        if local_response:
+            response = local_response
+        else:
+            # Get conversation context
+            with STAGE_SECONDS.time(stage="context"):
+                context = self.conversation_manager.get_conversation_context()
+            
+            # Generate AI response
+            response = self.ai_client.generate_response(message_text, context)
+        
+        # Add AI response to conversation
+        self.conversation_manager.add_message(response, role="assistant")
+        return response
+    
+    def _stream_reply(self, message: Message) -> None:
+        """Send the reply chunk by chunk as Gemini streams it"""
+        self.conversation_manager.add_message(message.text, role="user")
+        local_response = self._local_reply(message.text)
+        
+        stream = None
+        if local_response:
+            chunks = [local_response]
+        else:
+            with STAGE_SECONDS.time(stage="context"):
+                context = self.conversation_manager.get_conversation_context()
+            chunks = stream = self.ai_client.generate_response_stream(message.text, context)
+        
+        start_time = time.time()
+        started_at = time.perf_counter()
+        sent_chunks: List[str] = []
+        for chunk in chunks:
+            clean_chunk = self._clean_response(chunk)
+            if not clean_chunk:
+                continue
+            
+            if not sent_chunks:
+                # Wait before responding, then measure time to first message
+                time.sleep(self.config.RESPONSE_DELAY)
+            
+            sent = self._send_message(clean_chunk)
+            # Response time is measured to the first chunk the contact sees
+            self._record_send_result(message, clean_chunk, sent, None if sent_chunks else started_at)
+            if sent:
+                if not sent_chunks:
+                    print(f"First chunk sent after {time.time() - start_time:.2f}s")
+                sent_chunks.append(clean_chunk)
+        
+        if sent_chunks:
+            # Record the reply as generate_response would, line breaks included
+            response = stream.text if stream is not None else local_response
+            self.conversation_manager.add_message(response or "\n\n".join(sent_chunks), role="assistant")
+        else:
+            print("✗ Generated response was invalid or empty")
+            self.stats.total_errors += 1
+    
+    def _record_send_result(self, message: Message, clean_response: str, sent: bool,
+                            started_at: Optional[float] = None) -> None:
+        """Update dedup index and stats after a send attempt
+        
+        started_at is the perf_counter() time the message was picked up;
+        when given, the reply's latency feeds average_response_time.
+        """
+        if sent:
+            self.processed_messages.add(self.message_processor.text_key(clean_response))
+            self.stats.total_messages_sent += 1
+            if started_at is not None:
+                self._record_response_time(time.perf_counter() - started_at)
+            print(f"✓ Responded to: {self.message_processor.truncate_message(message.text)}")
+        else:
+            print("✗ Failed to send response")
+            self.stats.total_errors += 1
+    
+    def _record_response_time(self, seconds: float) -> None:
+        """Add a reply's latency to the histogram and the running average"""
+        RESPONSE_SECONDS.observe(seconds)
+        self._timed_responses += 1
+        self.stats.average_response_time += (seconds - self.stats.average_response_time) / self._timed_responses
+    
+    def _get_latest_messages(self) -> List[Message]:
+        """Read the open chat's messages, timed as the poll stage"""
+        with STAGE_SECONDS.time(stage="poll"):
+            return self.whatsapp_driver.get_latest_messages()
+    
+    def _filter_new_messages(self, messages: List[Message], snapshot: bool = True) -> List[Message]:
+        """Drop processed and outgoing messages, timed as the filter stage"""
+        with STAGE_SECONDS.time(stage="filter"):
+            return self.message_processor.filter_new_messages(messages, self.processed_messages, snapshot)
+    
+    def _clean_response(self, response: str) -> str:
+        """Clean and validate a reply, timed as the clean stage"""
+        with STAGE_SECONDS.time(stage="clean"):
+            return self.message_processor.validate_response(
+                response, self.config.MAX_RESPONSE_LENGTH, self.config.allows_emoji()
+            )
+    
+    def _send_message(self, text: str) -> bool:
+        """Send text in the open chat, timed as the send stage"""
+        with STAGE_SECONDS.time(stage="send"):
+            return self.whatsapp_driver.send_message(text)
+    
+    def _collect_metrics(self) -> List[Tuple[str, str, float]]:
+        """Session counters, plus lifetime totals when stored, exported as gauges"""
+        gauges = [
+            ("whatsapp_bot_messages_received", "Messages received this session", self.stats.total_messages_received),
+            ("whatsapp_bot_messages_sent", "Messages sent this session", self.stats.total_messages_sent),
+            ("whatsapp_bot_errors", "Errors this session", self.stats.total_errors),
+            ("whatsapp_bot_average_response_seconds", "Mean reply latency", self.stats.average_response_time),
+        ]
+        if self.state_store:
+            lifetime = self.lifetime_stats()
+            gauges += [
+                ("whatsapp_bot_lifetime_messages_received", "Messages received across stored sessions",
+                 lifetime["total_messages_received"]),
+                ("whatsapp_bot_lifetime_messages_sent", "Messages sent across stored sessions",
+                 lifetime["total_messages_sent"]),
+            ]
+        return gauges
+    
+    def _log_status_update(self, push_mode: bool) -> None:
         """Log periodic status updates"""
-        print(f"Monitoring... Messages: {total_messages}, "
+        print(f"Monitoring ({'push' if push_mode else 'poll'})... "
+              f"Received: {self.stats.total_messages_received}, "
               f"Processed: {len(self.processed_messages)}, "
               f"Sent: {self.stats.total_messages_sent}, "
               f"Errors: {self.stats.total_errors}")
+        self._save_stats()
     
     def stop(self) -> None:
         """Stop the bot"""
@@ -219,15 +630,44 @@ class WhatsAppGeminiBot:
     
     def show_conversation_history(self) -> None:
         """Display conversation history"""
-        self.conversation_manager.display_conversation_history()
+        if not self.chat_sessions:
+            self.conversation_manager.display_conversation_history()
+            return
+        
+        for contact_name, (conversation_manager, _) in self.chat_sessions.items():
+            print(f"\nChat: {contact_name}")
+            conversation_manager.display_conversation_history()
     
     def cleanup(self) -> None:
-        """Clean up all resources"""
-        try:
-            self.whatsapp_driver.cleanup()
+        """Clean up all resources
+        
+        Each step runs even if an earlier one fails. A running summary is
+        allowed to finish first so it cannot write to a closed store, and
+        the store is closed before the browser so queued writes are kept.
+        """
+        steps = [
+            ("summaries", partial(self.summary_executor.shutdown, wait=True, cancel_futures=True)),
+            ("state store", self.state_store.close if self.state_store else None),
+            ("browser", self.whatsapp_driver.cleanup),
+            ("AI client", self.ai_client.close),
+            ("metrics", self._close_metrics if self.metrics_server else None),
+        ]
+        failed = False
+        for name, step in steps:
+            if step is None:
+                continue
+            try:
+                step()
+            except Exception as e:
+                print(f"Error during cleanup ({name}): {e}")
+                failed = True
+        if not failed:
             print("Cleanup completed successfully")
-        except Exception as e:
-            print(f"Error during cleanup: {e}")
+    
+    def _close_metrics(self) -> None:
+        """Stop serving metrics and drop the session gauges"""
+        REGISTRY.remove_collector(self._collect_metrics)
+        self.metrics_server.close()
     
     def is_healthy(self) -> bool:
         """Check if bot is healthy and running properly"""
@@ -0,0 +1,92 @@
+"""
+Fair scheduling of chat switches for multi-chat serving
+"""
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+class ChatScheduler:
+    """Decides which chat with unread messages to open next
+    
+    Chats are ranked by unread count plus an aging bonus for the time they
+    have been waiting, so busy chats are served first without starving quiet
+    ones. The open chat keeps the browser while it has new messages, but
+    only until a waiting chat outscores it or the visit has answered
+    ``max_visit_messages``. A chat that could not be opened keeps its place
+    and is retried after ``retry_after`` seconds. The cost of switching
+    chats is tracked as a moving average.
+    """
+    
+    def __init__(self, aging_weight: float = 0.2, smoothing: float = 0.3,
+                 max_visit_messages: int = 5, retry_after: float = 10.0):
+        self.aging_weight = aging_weight  # Unread-message equivalents per second waited
+        self.smoothing = smoothing
+        self.max_visit_messages = max_visit_messages
+        self.retry_after = retry_after
+        self._visit_messages = 0
+        self._retry_at: Dict[str, float] = {}
+        self.switch_cost: float = 0.0  # Moving average of chat switch time (seconds)
+        self.switch_count: int = 0
+        self._pending: Dict[str, int] = {}
+        self._waiting_since: Dict[str, float] = {}
+    
+    def update(self, unread_chats: Iterable[Tuple[str, int]]) -> None:
+        """Replace pending counts with the latest unread badge scan"""
+        now = time.time()
+        pending = dict(unread_chats)
+        
+        for name in pending:
+            self._waiting_since.setdefault(name, now)
+        for name in list(self._waiting_since):
+            if name not in pending:
+                del self._waiting_since[name]
+                self._retry_at.pop(name, None)
+        
+        self._pending = pending
+    
+    def next_chat(self, exclude: Optional[str] = None, current_unread: int = 0) -> Optional[str]:
+        """Return the chat that should be served next, if any
+        
+        ``exclude`` is the open chat and ``current_unread`` the messages it
+        just had. While it has some, a waiting chat only takes over once it
+        scores higher or the visit reached max_visit_messages.
+        """
+        now = time.time()
+        best_name, best_score = None, 0.0
+        
+        for name, unread in self._pending.items():
+            if name == exclude or self._retry_at.get(name, 0.0) > now:
+                continue
+            score = unread + self.aging_weight * (now - self._waiting_since.get(name, now))
+            if score > best_score:
+                best_name, best_score = name, score
+        
+        if current_unread and self._visit_messages < self.max_visit_messages and best_score <= current_unread:
+            return None
+        return best_name
+    
+    def record_handled(self, count: int) -> None:
+        """Count messages answered during the current visit"""
+        self._visit_messages += count
+    
+    def mark_served(self, name: str) -> None:
+        """Start a visit to a chat that was opened and forget its pending count"""
+        self._visit_messages = 0
+        self._pending.pop(name, None)
+        self._waiting_since.pop(name, None)
+        self._retry_at.pop(name, None)
+    
+    def mark_failed(self, name: str) -> None:
+        """Hold back a chat that could not be opened, keeping its wait age"""
+        self._retry_at[name] = time.time() + self.retry_after
+    
+    def record_switch(self, seconds: float) -> None:
+        """Fold a measured chat switch time into the moving average"""
+        self.switch_count += 1
+        if self.switch_count == 1:
+            self.switch_cost = seconds
+        else:
+            self.switch_cost += self.smoothing * (seconds - self.switch_cost)
+    
+    def pending_count(self) -> int:
+        """Total unread messages waiting in other chats"""
+        return sum(self._pending.values())
@@ -2,34 +2,102 @@
 Configuration settings for WhatsApp Gemini AI Bot
 """
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Config:
     """Configuration class for the WhatsApp bot"""
     
     # API Configuration
     GEMINI_API_KEY: str = ""  # Loaded from environment variable
+    GEMINI_MODEL: str = "gemini-2.0-flash"  # Use stable version
+    
+    # Gemini Quota Configuration (client-side limits for every model call)
+    GEMINI_REQUESTS_PER_MINUTE: int = 15  # Requests per minute allowed by the quota
+    GEMINI_TOKENS_PER_MINUTE: int = 1_000_000  # Input + output tokens per minute
+    GEMINI_MAX_IN_FLIGHT: int = 4  # Concurrent requests
+    GEMINI_MAX_RETRIES: int = 3  # Retries for 429 and transient 5xx errors
+    GEMINI_BACKOFF_BASE: float = 1.0  # Seconds; doubled per retry with full jitter
+    GEMINI_BACKOFF_MAX: float = 30.0  # Upper bound for a single backoff
     
     # WhatsApp Configuration
     TARGET_CONTACT: str = "Uttam"  # Change this to the name of your contact
+    MULTI_CHAT_MODE: bool = False  # Serve every chat with unread messages instead
+    MULTI_CHAT_CONTACTS: List[str] = []  # Optional allowlist for multi-chat mode
+    CHAT_AGING_WEIGHT: float = 0.2  # Scheduling bonus per second a chat has waited
+    CHAT_MAX_VISIT_MESSAGES: int = 5  # Messages answered in one chat before waiting chats get a turn
     
     # Bot Behavior Configuration
     CHAT_DURATION_MINUTES: int = 60  # How long to run the chat bot
     RESPONSE_DELAY: float = 0.5  # Seconds to wait before responding to messages
-    CHECK_INTERVAL: float = 0.5  # How often to check for new messages
+    CHECK_INTERVAL: float = 0.5  # How often to check for new messages (poll mode)
+    COALESCE_WINDOW: float = 0.0  # Seconds to wait for follow-up messages before replying (0 disables)
+    COALESCE_MAX_WAIT: float = 8.0  # Upper bound on a burst, even while the user keeps typing
+    
+    # Message Detection Configuration
+    DETECTION_MODE: str = "push"  # "push" (in-page MutationObserver) or "poll"
+    PUSH_WAIT_TIMEOUT: float = 5.0  # Max seconds to block waiting for a push event
+    STATUS_LOG_INTERVAL: float = 30.0  # Seconds between monitoring status lines
+    DEDUP_MAX_ENTRIES: int = 5000  # Max message keys remembered as processed
+    DEDUP_TTL_SECONDS: float = 24 * 60 * 60  # Forget keys not seen for this long
+    
+    # Orchestration Configuration
+    ORCHESTRATOR: str = "sync"  # "sync" (sequential loop) or "async" (staged pipeline)
+    AI_CONCURRENCY: int = 4  # Concurrent Gemini generations in async mode
     
     # WebDriver Configuration
+    BROWSER_BACKEND: str = "selenium"  # "selenium" (ChromeDriver) or "playwright"
+    SEND_METHOD: str = "paste"  # "paste" (insert the whole reply via script) or "keys" (type with send_keys)
+    WHATSAPP_URL: str = "https://web.whatsapp.com/"
     WEBDRIVER_TIMEOUT: int = 60  # WebDriver timeout in seconds
+    LOGIN_TIMEOUT: int = 120  # Seconds to wait for the chat list, including a QR scan
+    CHROME_PROFILE_DIR: str = ""  # Browser profile directory so the WhatsApp session survives restarts
+    HEADLESS: bool = False  # Run the browser without a window (needs a logged-in profile)
     
     # Conversation Configuration
     MAX_CONVERSATION_HISTORY: int = 15  # Maximum messages to keep in history
-    RECENT_MESSAGES_CONTEXT: int = 5  # Number of recent messages for context
+    CONTEXT_TOKEN_BUDGET: int = 1000  # Approximate tokens of recent conversation sent as context
+    ENABLE_ROLLING_SUMMARY: bool = True  # Summarize turns that leave the context in the background
+    SUMMARY_BATCH_MESSAGES: int = 4  # Dropped messages folded into the summary per update
     MAX_RESPONSE_LENGTH: int = 4096  # Maximum AI response length
     
+    # State Store Configuration
+    STATE_DB: str = ""  # SQLite file for history, processed messages and stats across restarts
+    STATE_FLUSH_INTERVAL: float = 0.5  # Seconds between batched background commits
+    
+    # Streaming Configuration
+    ENABLE_STREAMING: bool = False  # Send replies chunk by chunk while Gemini generates
+    STREAM_MIN_CHUNK_CHARS: int = 80  # Buffer at least this much before sending a chunk
+    STREAM_MAX_CHUNK_CHARS: int = 700  # Force a break when no sentence end shows up
+    
     # Advanced AI Features
     ENABLE_FUNCTION_CALLING: bool = True  # Enable function calling
     ENABLE_WEB_SEARCH: bool = True  # Enable web search capabilities
     ENABLE_GROUNDING: bool = True  # Enable Google Search grounding
+    FUNCTION_CALL_TIMEOUT: float = 5.0  # Seconds each function call may run before its result is dropped
+    FUNCTION_CALL_WORKERS: int = 4  # Threads running function calls in parallel; also the cap on hung calls
+    ENABLE_LOCAL_RESPONDER: bool = True  # Answer time, date, small talk and context queries without Gemini
+    LOCAL_RESPONDER_MIN_CONFIDENCE: float = 0.75  # Share of the message that must be understood to answer locally
+    
+    # Response Cache Configuration
+    ENABLE_RESPONSE_CACHE: bool = True  # Reuse answers to repeated questions
+    RESPONSE_CACHE_SIZE: int = 512  # Max cached responses kept in memory
+    RESPONSE_CACHE_DB: str = ""  # Optional SQLite file so the cache survives restarts
+    RESPONSE_CACHE_MIN_WORDS: int = 3  # Shorter messages are too context dependent to cache
+    RESPONSE_CACHE_TTL: Dict[str, float] = {  # Seconds per route; 0 disables caching
+        "simple": 6 * 60 * 60,
+        "search": 10 * 60,
+        "function": 0,  # Time and weather answers are never reused
+    }
+    
+    # Context Cache Configuration
+    ENABLE_CONTEXT_CACHE: bool = True  # Serve the system instruction from Gemini cached content
+    CONTEXT_CACHE_TTL: int = 3600  # Seconds a cache entry lives between refreshes
+    CONTEXT_CACHE_REFRESH_MARGIN: int = 300  # Extend the TTL when this close to expiry
+    CONTEXT_CACHE_MIN_TOKENS: int = 1024  # Smallest instruction, in estimated tokens, the model will cache
+    
+    # Metrics Configuration
+    METRICS_PORT: int = 0  # Serve Prometheus metrics at http://METRICS_HOST:<port>/metrics (0 disables)
+    METRICS_HOST: str = "127.0.0.1"  # Interface the metrics endpoint listens on
     
     # Search Configuration
     SEARCH_TIMEOUT: int = 10  # Timeout for search operations
@@ -66,14 +134,78 @@ class Config:
         config.CHAT_DURATION_MINUTES = int(os.getenv('CHAT_DURATION_MINUTES', config.CHAT_DURATION_MINUTES))
         config.RESPONSE_DELAY = float(os.getenv('RESPONSE_DELAY', config.RESPONSE_DELAY))
         config.CHECK_INTERVAL = float(os.getenv('CHECK_INTERVAL', config.CHECK_INTERVAL))
+        config.COALESCE_WINDOW = float(os.getenv('COALESCE_WINDOW', config.COALESCE_WINDOW))
+        config.COALESCE_MAX_WAIT = float(os.getenv('COALESCE_MAX_WAIT', config.COALESCE_MAX_WAIT))
+        config.MAX_CONVERSATION_HISTORY = int(os.getenv('MAX_CONVERSATION_HISTORY', config.MAX_CONVERSATION_HISTORY))
+        config.CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', config.CONTEXT_TOKEN_BUDGET))
+        config.ENABLE_ROLLING_SUMMARY = os.getenv('ENABLE_ROLLING_SUMMARY', str(config.ENABLE_ROLLING_SUMMARY)).lower() in ('1', 'true', 'yes')
+        config.DETECTION_MODE = os.getenv('DETECTION_MODE', config.DETECTION_MODE).lower()
+        config.PUSH_WAIT_TIMEOUT = float(os.getenv('PUSH_WAIT_TIMEOUT', config.PUSH_WAIT_TIMEOUT))
+        config.MULTI_CHAT_MODE = os.getenv('MULTI_CHAT_MODE', str(config.MULTI_CHAT_MODE)).lower() in ('1', 'true', 'yes')
+        contacts = os.getenv('MULTI_CHAT_CONTACTS')
+        if contacts:
+            config.MULTI_CHAT_CONTACTS = [name.strip() for name in contacts.split(',') if name.strip()]
+        config.GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', config.GEMINI_REQUESTS_PER_MINUTE))
+        config.GEMINI_TOKENS_PER_MINUTE = int(os.getenv('GEMINI_TOKENS_PER_MINUTE', config.GEMINI_TOKENS_PER_MINUTE))
+        config.GEMINI_MAX_IN_FLIGHT = int(os.getenv('GEMINI_MAX_IN_FLIGHT', config.GEMINI_MAX_IN_FLIGHT))
+        config.ENABLE_STREAMING = os.getenv('ENABLE_STREAMING', str(config.ENABLE_STREAMING)).lower() in ('1', 'true', 'yes')
+        config.RESPONSE_CACHE_DB = os.getenv('RESPONSE_CACHE_DB', config.RESPONSE_CACHE_DB)
+        config.STATE_DB = os.getenv('STATE_DB', config.STATE_DB)
+        config.ENABLE_CONTEXT_CACHE = os.getenv('ENABLE_CONTEXT_CACHE', str(config.ENABLE_CONTEXT_CACHE)).lower() in ('1', 'true', 'yes')
+        config.CONTEXT_CACHE_TTL = int(os.getenv('CONTEXT_CACHE_TTL', config.CONTEXT_CACHE_TTL))
+        config.CONTEXT_CACHE_MIN_TOKENS = int(os.getenv('CONTEXT_CACHE_MIN_TOKENS', config.CONTEXT_CACHE_MIN_TOKENS))
+        config.BROWSER_BACKEND = os.getenv('BROWSER_BACKEND', config.BROWSER_BACKEND).lower()
+        config.SEND_METHOD = os.getenv('SEND_METHOD', config.SEND_METHOD).lower()
+        config.LOGIN_TIMEOUT = int(os.getenv('LOGIN_TIMEOUT', config.LOGIN_TIMEOUT))
+        config.CHROME_PROFILE_DIR = os.getenv('CHROME_PROFILE_DIR', config.CHROME_PROFILE_DIR)
+        config.HEADLESS = os.getenv('HEADLESS', str(config.HEADLESS)).lower() in ('1', 'true', 'yes')
+        config.ORCHESTRATOR = os.getenv('ORCHESTRATOR', config.ORCHESTRATOR).lower()
+        config.METRICS_PORT = int(os.getenv('METRICS_PORT', config.METRICS_PORT))
+        config.METRICS_HOST = os.getenv('METRICS_HOST', config.METRICS_HOST)
+        config.AI_CONCURRENCY = int(os.getenv('AI_CONCURRENCY', config.AI_CONCURRENCY))
+        config.FUNCTION_CALL_TIMEOUT = float(os.getenv('FUNCTION_CALL_TIMEOUT', config.FUNCTION_CALL_TIMEOUT))
+        config.FUNCTION_CALL_WORKERS = int(os.getenv('FUNCTION_CALL_WORKERS', config.FUNCTION_CALL_WORKERS))
+        config.SEARCH_TIMEOUT = int(os.getenv('SEARCH_TIMEOUT', config.SEARCH_TIMEOUT))
+        config.ENABLE_LOCAL_RESPONDER = os.getenv('ENABLE_LOCAL_RESPONDER', str(config.ENABLE_LOCAL_RESPONDER)).lower() in ('1', 'true', 'yes')
+        config.LOCAL_RESPONDER_MIN_CONFIDENCE = float(os.getenv('LOCAL_RESPONDER_MIN_CONFIDENCE', config.LOCAL_RESPONDER_MIN_CONFIDENCE))
         return config
     
     def validate(self) -> bool:
         """Validate configuration settings"""
         if not self.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY must be set")
-        if not self.TARGET_CONTACT:
+        if not self.TARGET_CONTACT and not self.MULTI_CHAT_MODE:
             raise ValueError("TARGET_CONTACT must be set")
         if self.CHAT_DURATION_MINUTES <= 0:
             raise ValueError("CHAT_DURATION_MINUTES must be positive")
+        if self.MAX_CONVERSATION_HISTORY <= 0 or self.CONTEXT_TOKEN_BUDGET <= 0:
+            raise ValueError("MAX_CONVERSATION_HISTORY and CONTEXT_TOKEN_BUDGET must be positive")
+        if self.DETECTION_MODE not in ("push", "poll"):
+            raise ValueError("DETECTION_MODE must be 'push' or 'poll'")
+        if self.ORCHESTRATOR not in ("sync", "async"):
+            raise ValueError("ORCHESTRATOR must be 'sync' or 'async'")
+        if self.BROWSER_BACKEND not in ("selenium", "playwright"):
+            raise ValueError("BROWSER_BACKEND must be 'selenium' or 'playwright'")
+        if self.SEND_METHOD not in ("paste", "keys"):
+            raise ValueError("SEND_METHOD must be 'paste' or 'keys'")
+        if self.HEADLESS and not self.CHROME_PROFILE_DIR:
+            raise ValueError("HEADLESS requires CHROME_PROFILE_DIR with a logged-in WhatsApp session")
+        if not 0 <= self.METRICS_PORT <= 65535:
+            raise ValueError("METRICS_PORT must be between 0 and 65535")
+        if self.FUNCTION_CALL_TIMEOUT <= 0 or self.SEARCH_TIMEOUT <= 0:
+            raise ValueError("FUNCTION_CALL_TIMEOUT and SEARCH_TIMEOUT must be positive")
+        if not 0 < self.LOCAL_RESPONDER_MIN_CONFIDENCE <= 1:
+            raise ValueError("LOCAL_RESPONDER_MIN_CONFIDENCE must be in (0, 1]")
+        if self.FUNCTION_CALL_WORKERS <= 0:
+            raise ValueError("FUNCTION_CALL_WORKERS must be positive")
+        if self.LOGIN_TIMEOUT <= 0:
+            raise ValueError("LOGIN_TIMEOUT must be positive")
+        if self.MULTI_CHAT_MODE and self.ORCHESTRATOR != "sync":
+            raise ValueError("MULTI_CHAT_MODE requires ORCHESTRATOR=sync")
+        if self.ENABLE_CONTEXT_CACHE and self.CONTEXT_CACHE_TTL <= self.CONTEXT_CACHE_REFRESH_MARGIN:
+            raise ValueError("CONTEXT_CACHE_TTL must be longer than CONTEXT_CACHE_REFRESH_MARGIN")
         return True
+    
+    def allows_emoji(self) -> bool:
+        """Whether replies may keep emoji, i.e. they are not typed through ChromeDriver"""
+        return self.SEND_METHOD == "paste" or self.BROWSER_BACKEND == "playwright"
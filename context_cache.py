@@ -0,0 +1,157 @@
+"""
+Gemini context cache for the static system instruction
+"""
+import threading
+import time
+from typing import Any, Optional
+from google.genai import types
+from rate_limiter import estimate_tokens
+
+class SystemInstructionCache:
+    """Keeps the system instruction in a Gemini cached content entry
+    
+    Requests that reference the cache by name are billed for the cached
+    prefix at the reduced cached-token rate and skip its prefill. The entry
+    is created on first use and its TTL is extended shortly before it
+    would expire, so a long session keeps hitting the same cache. An
+    instruction estimated below the model's minimum cacheable size
+    (min_tokens) is never cached. If the API refuses to create the entry
+    the cache stays disabled for ``retry_after`` seconds. Either way,
+    callers send the instruction inline.
+    
+    Creating and refreshing the entry are network calls. They run outside
+    the lock, on the one thread that found the entry due, while the others
+    keep using the current entry.
+    """
+    
+    def __init__(self, client: Any, model: str, system_instruction: str, ttl_seconds: int = 3600,
+                 refresh_margin: int = 300, retry_after: int = 600, min_tokens: int = 1024):
+        self.client = client
+        self.model = model
+        self.system_instruction = system_instruction
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._name: Optional[str] = None
+        self._expires_at = 0.0
+        self._disabled_until = 0.0
+        self._updating = False
+        self._closed = False
+        self.creations = 0
+        self.refreshes = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        
+        # The instruction does not change, so one check settles it for the session
+        instruction_tokens = estimate_tokens(system_instruction, expected_output_tokens=0)
+        self.too_small = instruction_tokens < min_tokens
+        if self.too_small:
+            print(f"System instruction is about {instruction_tokens} tokens, below the "
+                  f"{min_tokens}-token cache minimum; sending it inline")
+    
+    def cache_name(self) -> Optional[str]:
+        """Name of a live cache entry, creating or refreshing it as needed"""
+        now = time.monotonic()
+        with self._lock:
+            if self.too_small or self._closed or now < self._disabled_until:
+                return None
+            name = self._name if now < self._expires_at else None
+            if self._updating or (name and self._expires_at - now > self.refresh_margin):
+                return name
+            self._updating = True
+        
+        refreshed = False
+        try:
+            refreshed = name is not None and self._refresh(name)
+            if not refreshed:
+                name = self._create()
+        except Exception as e:
+            print(f"Context cache unavailable, sending system instruction inline: {e}")
+            name = None
+        
+        with self._lock:
+            self._updating = False
+            if name is None:
+                self._name = None
+                self._disabled_until = now + self.retry_after
+                return None
+            if refreshed:
+                self.refreshes += 1
+            else:
+                self.creations += 1
+            closed = self._closed
+            if not closed:
+                self._name = name
+                self._expires_at = now + self.ttl_seconds
+        if closed:
+            # close() ran while the entry was being created
+            self._delete(name)
+            return None
+        return name
+    
+    def _create(self) -> str:
+        """Upload the system instruction as a new cached content entry"""
+        cached = self.client.caches.create(
+            model=self.model,
+            config=types.CreateCachedContentConfig(
+                display_name="whatsapp-bot-system-instruction",
+                system_instruction=self.system_instruction,
+                ttl=f"{self.ttl_seconds}s"
+            )
+        )
+        print(f"✓ Created context cache {cached.name} (TTL {self.ttl_seconds}s)")
+        return cached.name
+    
+    def _refresh(self, name: str) -> bool:
+        """Extend the TTL of an entry; False when it has to be recreated"""
+        try:
+            self.client.caches.update(
+                name=name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s")
+            )
+        except Exception as e:
+            # The entry may have been evicted server side; start a new one
+            print(f"Context cache refresh failed, recreating: {e}")
+            return False
+        return True
+    
+    def record_usage(self, response: Any) -> None:
+        """Accumulate prompt and cached token counts from usage_metadata"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += getattr(usage, "prompt_token_count", None) or 0
+            self.cached_tokens += getattr(usage, "cached_content_token_count", None) or 0
+    
+    def get_stats(self) -> dict:
+        """Get cache usage and the share of prompt tokens served from cache"""
+        with self._lock:
+            return {
+                "active": self._name is not None,
+                "too_small": self.too_small,
+                "creations": self.creations,
+                "refreshes": self.refreshes,
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cached_share": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+            }
+    
+    def close(self) -> None:
+        """Delete the cache entry so it stops accruing storage cost"""
+        with self._lock:
+            self._closed = True
+            name, self._name = self._name, None
+        if name:
+            self._delete(name)
+    
+    def _delete(self, name: str) -> None:
+        """Delete a cache entry, reporting failures"""
+        try:
+            self.client.caches.delete(name=name)
+        except Exception as e:
+            print(f"Error deleting context cache: {e}")
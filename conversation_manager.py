@@ -1,17 +1,52 @@
 """
 Conversation management and context handling
 """
-from typing import List, Optional, Dict, Any
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, List, Optional, Dict, Any, Tuple
+import threading
 import time
 from models import ConversationMessage
 from config import Config
+from keyword_matcher import Intent, match_intents
+from rate_limiter import estimate_tokens
+from state_store import BotStateStore
 
 class ConversationManager:
-    """Manages conversation history and context"""
+    """Manages conversation history and context
     
-    def __init__(self, config: Config):
+    History is a fixed-capacity ring buffer, so appends stay O(1) however
+    long the window is. The rendered context is maintained incrementally:
+    each message is formatted once when added, and the oldest lines are
+    dropped whenever the context exceeds its token budget.
+    
+    With a summarizer and executor, dropped lines are folded into a rolling
+    summary in the background and the summary is prepended to the context.
+    Adding a message only queues the dropped lines, so replies never wait
+    for a summary. With a store, messages and summaries are also persisted
+    under ``contact``.
+    """
+    
+    def __init__(self, config: Config, summarizer: Optional[Callable[[str, str], str]] = None,
+                 executor: Optional[Executor] = None, store: Optional[BotStateStore] = None,
+                 contact: str = ""):
         self.config = config
-        self.conversation_history: List[ConversationMessage] = []
+        self.store = store
+        self.contact = contact
+        self.conversation_history: Deque[ConversationMessage] = deque(
+            maxlen=config.MAX_CONVERSATION_HISTORY
+        )
+        self._context_lines: Deque[Tuple[str, int]] = deque()
+        self._context_tokens = 0
+        self._context: Optional[str] = None
+        
+        # Rolling summary state, shared with the summary worker thread
+        self.summarizer = summarizer if executor else None
+        self.executor = executor
+        self._summary_lock = threading.Lock()
+        self._summary = ""
+        self._pending_lines: List[str] = []
+        self._summary_future: Optional[Future] = None
     
     def add_message(self, content: str, role: str = "user") -> None:
         """Add message to conversation history"""
@@ -20,45 +55,111 @@ class ConversationManager:
             content=content,
             timestamp=time.time()
         )
+        # The deque evicts the oldest message once it is full
         self.conversation_history.append(message)
+        self._append_context_line(message)
+        if self.store:
+            self.store.record_message(self.contact, message)
+    
+    def restore(self, messages: List[ConversationMessage], summary: str = "") -> None:
+        """Reload persisted history and summary after a restart"""
+        for message in messages:
+            self.conversation_history.append(message)
+            self._append_context_line(message, summarize=False)
+        with self._summary_lock:
+            self._summary = summary
+            self._context = None
+    
+    def _append_context_line(self, message: ConversationMessage, summarize: bool = True) -> None:
+        """Render a message into the context and trim it to the token budget"""
+        role = "User" if message.role == "user" else "You"
+        line = f"{role}: {message.content}\n"
+        tokens = estimate_tokens(line, expected_output_tokens=0)
+        self._context_lines.append((line, tokens))
+        self._context_tokens += tokens
+        
+        # Always keep the newest line, even if it alone is over budget.
+        # Lines can also leave with the history window.
+        dropped = []
+        while ((self._context_tokens > self.config.CONTEXT_TOKEN_BUDGET and len(self._context_lines) > 1)
+               or len(self._context_lines) > len(self.conversation_history)):
+            old_line, old_tokens = self._context_lines.popleft()
+            self._context_tokens -= old_tokens
+            dropped.append(old_line)
+        self._context = None
         
-        # Manage conversation length
-        if len(self.conversation_history) > self.config.MAX_CONVERSATION_HISTORY:
-            self._summarize_and_trim()
+        if dropped and summarize and self.summarizer:
+            with self._summary_lock:
+                self._pending_lines.extend(dropped)
+                future = self._schedule_summary()
+            self._watch_summary(future)
     
-    def _summarize_and_trim(self) -> None:
-        """Summarize old conversation and keep recent messages"""
-        # This would need AI client to create summary
-        # For now, just keep recent messages
-        recent_messages = self.conversation_history[-self.config.RECENT_MESSAGES_CONTEXT:]
-        self.conversation_history = recent_messages
+    def _schedule_summary(self) -> Optional[Future]:
+        """Start a summary update once enough lines are waiting; caller holds the lock
+        
+        Returns the new future, which the caller passes to _watch_summary
+        once the lock is released.
+        """
+        if self._summary_future is not None or len(self._pending_lines) < self.config.SUMMARY_BATCH_MESSAGES:
+            return None
+        batch, self._pending_lines = "".join(self._pending_lines), []
+        try:
+            self._summary_future = self.executor.submit(self.summarizer, self._summary, batch)
+        except RuntimeError as e:
+            # The executor was shut down during cleanup
+            print(f"Conversation summary skipped: {e}")
+            return None
+        return self._summary_future
+    
+    def _watch_summary(self, future: Optional[Future]) -> None:
+        """Install _on_summary_done on a summary future; never call it holding the lock
+        
+        A future that is already done runs the callback right away on this
+        thread, and the callback takes the lock itself.
+        """
+        if future is not None:
+            future.add_done_callback(self._on_summary_done)
+    
+    def _on_summary_done(self, future: Future) -> None:
+        """Install the new summary and pick up lines that queued meanwhile"""
+        with self._summary_lock:
+            self._summary_future = None
+            try:
+                summary = future.result()
+                if summary:
+                    self._summary = summary
+                    self._context = None
+                    if self.store:
+                        self.store.record_summary(self.contact, summary)
+            except Exception as e:
+                # Keep the previous summary; the failed batch is dropped
+                print(f"Error updating conversation summary: {e}")
+            next_future = self._schedule_summary()
+        self._watch_summary(next_future)
     
     def get_conversation_context(self) -> str:
         """Get formatted conversation context for AI responses"""
-        if not self.conversation_history:
+        if not self._context_lines:
             return ""
         
-        context = "\nRecent conversation:\n"
-        for msg in self.conversation_history[-self.config.RECENT_MESSAGES_CONTEXT:]:
-            role = "User" if msg.role == "user" else "You"
-            context += f"{role}: {msg.content}\n"
-        return context
+        # Rendered once per change; repeated calls return the same string
+        with self._summary_lock:
+            if self._context is None:
+                summary = f"\nEarlier conversation summary: {self._summary}\n" if self._summary else ""
+                self._context = (summary + "\nRecent conversation:\n"
+                                 + "".join(line for line, _ in self._context_lines))
+            return self._context
+    
+    def get_summary(self) -> str:
+        """Get the rolling summary of turns that left the context"""
+        with self._summary_lock:
+            return self._summary
     
     def handle_context_query(self, user_message: str) -> Optional[str]:
         """Handle queries about previous conversation"""
-        context_keywords = [
-            "what did i ask", "what was my question", "earlier", "before", "previous",
-            "first question", "last question", "আগে", "প্রথম", "আগের", "কি জিজ্ঞেস",
-            "কি প্রশ্ন", "er aage", "aage", "prothom", "jiggesh", "jiggsh"
-        ]
-        
-        summary_keywords = [
-            "summarize", "summary", "conversation", "chat", "talk", "discuss",
-            "সামারি", "সারসংক্ষেপ", "আলোচনা", "কথাবার্তা"
-        ]
-        
-        is_context_query = any(keyword in user_message.lower() for keyword in context_keywords)
-        is_summary_query = any(keyword in user_message.lower() for keyword in summary_keywords)
+        intents = match_intents(user_message)
+        is_context_query = Intent.CONTEXT_QUERY in intents
+        is_summary_query = Intent.SUMMARY_QUERY in intents
         
         if is_summary_query and self.conversation_history:
             return self._create_conversation_summary(user_message)
@@ -73,7 +174,7 @@ class ConversationManager:
         try:
             conversation_text = "\n".join([
                 f"{'You' if msg.role == 'user' else 'I'}: {msg.content}"
-                for msg in self.conversation_history[-10:]  # Last 10 messages
+                for msg in list(self.conversation_history)[-10:]  # Last 10 messages
             ])
             
             has_bengali = self._detect_bengali(user_message)
@@ -89,19 +190,21 @@ class ConversationManager:
     
     def _handle_previous_question_query(self, user_message: str) -> str:
         """Handle queries about previous questions"""
-        user_messages = [msg for msg in self.conversation_history if msg.role == "user"]
+        user_messages = [msg.content for msg in self.conversation_history if msg.role == "user"]
+        # The async bot records a message only once its reply is sent
+        if not user_messages or user_messages[-1] != user_message:
+            user_messages.append(user_message)
         
         if len(user_messages) >= 2:  # Current + at least one previous
-            if "first" in user_message.lower() or "প্রথম" in user_message or "prothom" in user_message:
-                return f"Your first question was: '{user_messages[0].content}'"
-            elif "last" in user_message.lower() or "আগের" in user_message or "aage" in user_message:
-                return f"Your previous question was: '{user_messages[-2].content}'"
+            intents = match_intents(user_message)
+            if Intent.FIRST_QUESTION in intents:
+                return f"Your first question was: '{user_messages[0]}'"
+            elif Intent.PREVIOUS_QUESTION in intents:
+                return f"Your previous question was: '{user_messages[-2]}'"
             else:
-                return f"You asked: '{user_messages[-2].content}'"
-        elif len(user_messages) == 1:
-            return "This is your first message in our conversation."
+                return f"You asked: '{user_messages[-2]}'"
         else:
-            return "I don't have any previous questions in our conversation."
+            return "This is your first message in our conversation."
     
     def _detect_bengali(self, text: str) -> bool:
         """Detect if text contains Bengali characters"""
@@ -110,11 +213,17 @@ class ConversationManager:
     
     def get_conversation_history(self) -> List[ConversationMessage]:
         """Get the full conversation history"""
-        return self.conversation_history.copy()
+        return list(self.conversation_history)
     
     def clear_history(self) -> None:
         """Clear conversation history"""
         self.conversation_history.clear()
+        self._context_lines.clear()
+        self._context_tokens = 0
+        with self._summary_lock:
+            self._summary = ""
+            self._pending_lines = []
+            self._context = None
     
     def get_stats(self) -> Dict[str, Any]:
         """Get conversation statistics"""
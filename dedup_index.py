@@ -0,0 +1,117 @@
+"""
+Bounded de-duplication index for processed messages
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+
+class MessageDedupIndex:
+    """LRU set of message keys with size and time based eviction
+    
+    Lookups refresh an entry, so messages that are still visible in the chat
+    never expire while the oldest unseen keys are evicted first. Memory stays
+    bounded by ``max_size`` no matter how long the session runs.
+    ``on_add`` is called with every newly recorded key, e.g. to persist it.
+    
+    Messages without a data-id are numbered per text with
+    ``text_occurrences``, whose counts live here so they carry over from
+    one snapshot or push batch to the next.
+    """
+    
+    def __init__(self, max_size: int = 5000, ttl_seconds: Optional[float] = None,
+                 on_add: Optional[Callable[[str], None]] = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.on_add = on_add
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        # Text slot -> (copies visible, copies ever seen, snapshot they were visible in)
+        self._occurrences: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+        self._snapshot = 0
+    
+    def __contains__(self, key: str) -> bool:
+        seen_at = self._entries.get(key)
+        if seen_at is None:
+            return False
+        
+        now = time.time()
+        if self.ttl_seconds and now - seen_at > self.ttl_seconds:
+            del self._entries[key]
+            return False
+        
+        self._entries[key] = now
+        self._entries.move_to_end(key)
+        return True
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def add(self, key: str) -> None:
+        """Record a key as processed"""
+        self._entries[key] = time.time()
+        self._entries.move_to_end(key)
+        self._evict()
+        if self.on_add:
+            self.on_add(key)
+    
+    def update(self, keys: Iterable[str]) -> None:
+        """Record several keys as processed"""
+        for key in keys:
+            self.add(key)
+    
+    def restore(self, keys: Iterable[str]) -> None:
+        """Load previously persisted keys, oldest first, without reporting them"""
+        now = time.time()
+        for key in keys:
+            self._entries[key] = now
+            self._entries.move_to_end(key)
+        self._evict()
+    
+    def start_snapshot(self) -> None:
+        """Begin numbering a new snapshot; texts it lacks have scrolled out"""
+        self._snapshot += 1
+    
+    def text_occurrences(self, slot: str, copies: int, snapshot: bool = True) -> range:
+        """Occurrence numbers for the copies of an id-less text, oldest first
+        
+        In a snapshot, copies beyond those visible last time are new and get
+        the next numbers, while fewer copies mean older ones scrolled out.
+        A text missing from the previous snapshot had no visible copies.
+        In a batch of added messages (snapshot=False) every copy is new.
+        """
+        visible, total, seen_in = self._occurrences.get(slot, (0, 0, 0))
+        if snapshot:
+            if seen_in < self._snapshot - 1:
+                visible = 0
+            total += max(0, copies - visible)
+            visible = copies
+            seen_in = self._snapshot
+        else:
+            total += copies
+            visible += copies
+            seen_in = max(seen_in, self._snapshot)
+        self._occurrences[slot] = (visible, total, seen_in)
+        self._occurrences.move_to_end(slot)
+        while len(self._occurrences) > self.max_size:
+            self._occurrences.popitem(last=False)
+        return range(total - copies, total)
+    
+    def keys(self) -> List[str]:
+        """Return keys from oldest to most recently seen"""
+        return list(self._entries.keys())
+    
+    def clear(self) -> None:
+        """Forget every key"""
+        self._entries.clear()
+        self._occurrences.clear()
+    
+    def _evict(self) -> None:
+        """Drop entries beyond the size bound or older than the TTL"""
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        
+        if self.ttl_seconds:
+            cutoff = time.time() - self.ttl_seconds
+            while self._entries and next(iter(self._entries.values())) < cutoff:
+                self._entries.popitem(last=False)
@@ -0,0 +1,89 @@
+"""
+Browser driver interface shared by the WhatsApp Web automation backends
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Tuple
+from config import Config
+from models import Message
+
+class BaseWhatsAppDriver(ABC):
+    """Operations the bot needs from a WhatsApp Web browser backend
+    
+    Push detection and unread scanning are optional capabilities; the
+    defaults report them as unavailable so the bot falls back to polling.
+    """
+    
+    config: Config
+    
+    @abstractmethod
+    def login_whatsapp(self) -> bool:
+        """Open WhatsApp Web and wait until the session is logged in"""
+    
+    @abstractmethod
+    def open_chat(self, contact_name: str) -> bool:
+        """Open the chat with the given contact"""
+    
+    @abstractmethod
+    def get_latest_messages(self) -> List[Message]:
+        """Return every message visible in the open chat"""
+    
+    @abstractmethod
+    def send_message(self, message: str) -> bool:
+        """Send a message in the open chat"""
+    
+    @abstractmethod
+    def is_driver_alive(self) -> bool:
+        """Check whether the browser session is still usable"""
+    
+    @abstractmethod
+    def cleanup(self) -> None:
+        """Close the browser and release resources"""
+    
+    def install_message_observer(self) -> bool:
+        """Start push-based message detection in the open chat"""
+        return False
+    
+    def wait_for_new_messages(self, timeout: float) -> Optional[List[Message]]:
+        """Block until new messages are pushed; None when push is unavailable"""
+        return None
+    
+    def get_unread_chats(self) -> List[Tuple[str, int]]:
+        """Return (contact name, unread count) for chats with an unread badge"""
+        return []
+    
+    def get_chat_status(self) -> str:
+        """Return the open chat's header status line, e.g. "typing…" """
+        return ""
+    
+    def run_script(self, script: str, *args) -> Any:
+        """Run an execute_script style body in the page; None when scripts are unsupported"""
+        print(f"{type(self).__name__} cannot run page scripts")
+        return None
+    
+    @staticmethod
+    def _records_to_messages(records: List[dict]) -> List[Message]:
+        """Convert page-side message records into Message objects"""
+        messages = []
+        for record in records:
+            text = (record.get('text') or '').strip()
+            if not text:
+                continue
+            messages.append(Message(
+                text=text,
+                is_incoming=bool(record.get('incoming', True)),
+                direction_known=bool(record.get('known', True)),
+                timestamp=(record.get('ts') or time.time() * 1000) / 1000.0,
+                message_id=record.get('id')
+            ))
+        return messages
+
+def create_whatsapp_driver(config: Config) -> BaseWhatsAppDriver:
+    """Instantiate the browser backend selected by Config.BROWSER_BACKEND"""
+    # Backends are imported lazily so only the selected one needs to be installed
+    if config.BROWSER_BACKEND == "playwright":
+        from whatsapp_driver_playwright import PlaywrightWhatsAppDriver
+        return PlaywrightWhatsAppDriver(config)
+    
+    from whatsapp_driver import WhatsAppDriver
+    return WhatsAppDriver(config)
@@ -0,0 +1,137 @@
+"""
+Offline stand-in for the google-genai client used by AdvancedGeminiAIClient
+"""
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, Optional
+
+def count_tokens(text: Any) -> int:
+    """Approximate token count, about four characters per token"""
+    return len(str(text or "")) // 4
+
+class _StubModels:
+    """Synchronous models API"""
+    
+    def __init__(self, stub: "GeminiStubClient"):
+        self._stub = stub
+    
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> SimpleNamespace:
+        """Return a canned reply after the configured latency"""
+        response = self._stub.respond(contents, config)
+        time.sleep(self._stub.generation_time(response))
+        return response
+    
+    def generate_content_stream(self, model: str, contents: Any, config: Any = None) -> Iterator[SimpleNamespace]:
+        """Yield the canned reply in a few pieces"""
+        response = self.generate_content(model, contents, config)
+        words = response.text.split(" ")
+        size = max(1, len(words) // 3)
+        for start in range(0, len(words), size):
+            last = start + size >= len(words)
+            text = " ".join(words[start:start + size]) + ("" if last else " ")
+            yield self._stub.make_response(text, response.usage_metadata if last else None)
+
+class _StubAsyncModels:
+    """client.aio.models API"""
+    
+    def __init__(self, stub: "GeminiStubClient"):
+        self._stub = stub
+    
+    async def generate_content(self, model: str, contents: Any, config: Any = None) -> SimpleNamespace:
+        """Async canned reply"""
+        response = self._stub.respond(contents, config)
+        await asyncio.sleep(self._stub.generation_time(response))
+        return response
+
+class _StubCaches:
+    """Cached content API keeping entries in memory"""
+    
+    def __init__(self, stub: "GeminiStubClient"):
+        self._stub = stub
+        self._ids = itertools.count(1)
+    
+    def create(self, model: str, config: Any) -> SimpleNamespace:
+        """Store the system instruction under a new cache name"""
+        instruction = getattr(config, "system_instruction", None) or ""
+        if count_tokens(instruction) < self._stub.min_cache_tokens:
+            raise ValueError(f"Cached content is too small; minimum is {self._stub.min_cache_tokens} tokens")
+        name = f"cachedContents/stub-{next(self._ids)}"
+        self._stub.caches_store[name] = instruction
+        return SimpleNamespace(name=name, model=model)
+    
+    def update(self, name: str, config: Any) -> SimpleNamespace:
+        """Accept a TTL update for an existing entry"""
+        if name not in self._stub.caches_store:
+            raise KeyError(f"Unknown cached content {name}")
+        return SimpleNamespace(name=name)
+    
+    def delete(self, name: str) -> None:
+        """Drop an entry"""
+        self._stub.caches_store.pop(name, None)
+
+class GeminiStubClient:
+    """Duck-typed replacement for ``genai.Client`` that never touches the network
+    
+    Replies come from ``reply`` (by default an echo of the last prompt line)
+    after ``latency_seconds``, plus the output tokens at ``tokens_per_second``
+    when a token rate is set. Usage metadata is filled in the way the real
+    API reports it, including ``cached_content_token_count`` for requests
+    that reference a cache entry, so token accounting can be checked
+    offline. Pass an instance as ``client`` to AdvancedGeminiAIClient.
+    """
+    
+    def __init__(self, latency_seconds: float = 0.0, reply: Optional[Callable[[str], str]] = None,
+                 min_cache_tokens: int = 0, tokens_per_second: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.reply = reply or self._echo
+        self.min_cache_tokens = min_cache_tokens
+        self.caches_store: Dict[str, str] = {}
+        self.calls = 0
+        self.models = _StubModels(self)
+        self.aio = SimpleNamespace(models=_StubAsyncModels(self))
+        self.caches = _StubCaches(self)
+    
+    @staticmethod
+    def _echo(prompt: str) -> str:
+        """Default reply: acknowledge the user's message quoted in the prompt"""
+        for line in prompt.splitlines():
+            if line.startswith(("User message:", "User asked:")):
+                return f"Stub reply to {line.split(':', 1)[1].strip()}"
+        lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+        return f"Stub reply to: {lines[-1] if lines else prompt}"
+    
+    def generation_time(self, response: SimpleNamespace) -> float:
+        """Seconds a response takes: fixed latency plus output tokens at the token rate"""
+        if self.tokens_per_second <= 0:
+            return self.latency_seconds
+        return self.latency_seconds + response.usage_metadata.candidates_token_count / self.tokens_per_second
+    
+    def respond(self, contents: Any, config: Any = None) -> SimpleNamespace:
+        """Build a response with realistic usage metadata"""
+        self.calls += 1
+        prompt = str(contents or "")
+        cached_name = getattr(config, "cached_content", None)
+        cached_instruction = self.caches_store.get(cached_name, "") if cached_name else ""
+        inline_instruction = getattr(config, "system_instruction", None) or ""
+        
+        text = self.reply(prompt)
+        cached_tokens = count_tokens(cached_instruction)
+        prompt_tokens = count_tokens(prompt) + count_tokens(inline_instruction) + cached_tokens
+        output_tokens = count_tokens(text)
+        usage = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            cached_content_token_count=cached_tokens or None,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens
+        )
+        return self.make_response(text, usage)
+    
+    @staticmethod
+    def make_response(text: str, usage: Optional[SimpleNamespace]) -> SimpleNamespace:
+        """Response object shaped like GenerateContentResponse"""
+        part = SimpleNamespace(text=text, function_call=None)
+        candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]), grounding_metadata=None)
+        return SimpleNamespace(text=text, candidates=[candidate], usage_metadata=usage)
@@ -0,0 +1,157 @@
+"""
+Compiled multi-keyword matcher for message routing and filtering
+"""
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+class Intent:
+    """Tags reported by the shared intent matcher"""
+    SEARCH_OR_FUNCTION = "search_or_function"
+    WEB_SEARCH = "web_search"
+    FUNCTION_CALL = "function_call"
+    CONTEXT_QUERY = "context_query"
+    SUMMARY_QUERY = "summary_query"
+    FIRST_QUESTION = "first_question"
+    PREVIOUS_QUESTION = "previous_question"
+    SYSTEM_MESSAGE = "system_message"
+
+# Keyword tables, matched as lowercase substrings of the message
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    # Keywords that typically require search or functions (with Bengali equivalents)
+    Intent.SEARCH_OR_FUNCTION: [
+        'weather', 'current', 'today', 'now', 'search', 'find', 'look up',
+        'information about', 'tell me about', 'what is', 'who is',
+        'latest', 'recent', 'update', 'news', 'time', 'date',
+        'details about', 'more about', 'explain', 'describe',
+        'আবহাওয়া', 'বর্তমান', 'আজ', 'এখন', 'খুঁজ', 'তথ্য', 'সম্পর্কে বল',
+        'কি', 'কে', 'সর্বশেষ', 'সাম্প্রতিক', 'সময়', 'তারিখ', 'বিস্তারিত'
+    ],
+    Intent.WEB_SEARCH: [
+        'latest', 'recent', 'current', 'today', 'news', 'update', 'now',
+        'who is', 'what is', 'tell me about', 'information about',
+        'সর্বশেষ', 'সাম্প্রতিক', 'বর্তমান', 'আজ', 'এখন', 'সংবাদ', 'তথ্য'
+    ],
+    Intent.FUNCTION_CALL: [
+        'time', 'date', 'weather', 'temperature', 'forecast',
+        'সময়', 'তারিখ', 'আবহাওয়া', 'তাপমাত্রা'
+    ],
+    Intent.CONTEXT_QUERY: [
+        "what did i ask", "what was my question", "earlier", "before", "previous",
+        "first question", "last question", "আগে", "প্রথম", "আগের", "কি জিজ্ঞেস",
+        "কি প্রশ্ন", "er aage", "aage", "prothom", "jiggesh", "jiggsh"
+    ],
+    Intent.SUMMARY_QUERY: [
+        "summarize", "summary", "conversation", "chat", "talk", "discuss",
+        "সামারি", "সারসংক্ষেপ", "আলোচনা", "কথাবার্তা"
+    ],
+    Intent.FIRST_QUESTION: ["first", "প্রথম", "prothom"],
+    Intent.PREVIOUS_QUESTION: ["last", "আগের", "aage"],
+    # System messages or notifications
+    Intent.SYSTEM_MESSAGE: [
+        "joined using this group's invite link",
+        "left",
+        "added",
+        "removed",
+        "changed the group description",
+        "changed their phone number"
+    ],
+}
+
+class KeywordMatcher:
+    """Reports every tag whose keywords occur in a text
+    
+    All keywords are merged into a single trie-shaped regex, so the text is
+    scanned once no matter how many keywords or tags there are. Each search
+    yields the longest keyword at the next position where any keyword
+    starts, and scanning resumes one character later so overlapping keywords
+    are still seen. The tags of shorter keywords at the same position are
+    precomputed, because those keywords are always prefixes of the longest.
+    
+    The regex pays for every position of the text, which on long ASCII text
+    costs more than the C substring search. Those texts are checked with
+    one ``in`` test per ASCII keyword instead, skipping keywords whose tags
+    were already found. Either way the result is the same as testing each
+    keyword with ``in``.
+    """
+    
+    def __init__(self, tagged_keywords: Dict[str, Iterable[str]], scan_threshold: int = 200):
+        # ASCII texts at least this long use the substring path
+        self.scan_threshold = scan_threshold
+        keyword_tags: Dict[str, Set[str]] = {}
+        for tag, keywords in tagged_keywords.items():
+            for keyword in keywords:
+                keyword_tags.setdefault(keyword.lower(), set()).add(tag)
+        
+        # A match of a keyword implies a match of every keyword that prefixes it
+        self._tags: Dict[str, FrozenSet[str]] = {}
+        for keyword in keyword_tags:
+            tags = set()
+            for end in range(1, len(keyword) + 1):
+                tags |= keyword_tags.get(keyword[:end], set())
+            self._tags[keyword] = frozenset(tags)
+        
+        self.all_tags = frozenset(tag for tags in keyword_tags.values() for tag in tags)
+        # Shortest first, so a keyword's tags are often known before its longer variants
+        self._ascii_keywords = sorted((keyword for keyword in keyword_tags if keyword.isascii()), key=len)
+        self._pattern = re.compile(self._trie_pattern(self._build_trie(keyword_tags)))
+    
+    @staticmethod
+    def _build_trie(keywords: Iterable[str]) -> dict:
+        """Character trie; the empty-string key marks the end of a keyword"""
+        root: dict = {}
+        for keyword in keywords:
+            node = root
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+        return root
+    
+    @classmethod
+    def _trie_pattern(cls, node: dict) -> str:
+        """Regex for a trie node that prefers the longest keyword"""
+        branches = [re.escape(char) + cls._trie_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        group = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+        if "" in node:
+            # A keyword ends here; continuing to a longer one is optional
+            return "(?:%s)?" % group
+        return group
+    
+    def match(self, text: str) -> FrozenSet[str]:
+        """Return the tags of every keyword occurring in text (case-insensitive)"""
+        if not text:
+            return frozenset()
+        text = text.lower()
+        if len(text) >= self.scan_threshold and text.isascii():
+            return self._match_substrings(text)
+        found: Set[str] = set()
+        match = self._pattern.search(text)
+        while match and len(found) < len(self.all_tags):
+            found |= self._tags[match.group()]
+            match = self._pattern.search(text, match.start() + 1)
+        return frozenset(found)
+    
+    def _match_substrings(self, text: str) -> FrozenSet[str]:
+        """match() for long lowercase ASCII text, where no other keyword can occur"""
+        found: Set[str] = set()
+        for keyword in self._ascii_keywords:
+            tags = self._tags[keyword]
+            if not tags <= found and keyword in text:
+                found |= tags
+                if len(found) == len(self.all_tags):
+                    break
+        return frozenset(found)
+
+INTENT_MATCHER = KeywordMatcher(INTENT_KEYWORDS)
+
+@lru_cache(maxsize=1024)
+def match_intents(text: str) -> FrozenSet[str]:
+    """Intent tags for a message; repeated lookups of the same text are free
+    
+    Several components inspect each message, so the scan result is cached
+    and the message is only scanned once.
+    """
+    return INTENT_MATCHER.match(text)
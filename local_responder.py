@@ -0,0 +1,237 @@
+"""
+Local fast-path replies for time, date, greetings and context queries
+"""
+import datetime
+import re
+import unicodedata
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+from conversation_manager import ConversationManager
+from metrics import LOCAL_REPLIES
+
+class LocalIntent:
+    """Intents the local responder can answer without the model"""
+    TIME = "time"
+    DATE = "date"
+    CONTEXT = "context"
+    GREETING = "greeting"
+    WELLBEING = "wellbeing"
+    THANKS = "thanks"
+    ACKNOWLEDGEMENT = "acknowledgement"
+    FAREWELL = "farewell"
+    GOOD_NIGHT = "good_night"
+
+# Small talk that may accompany a question without changing its answer
+SOCIAL_INTENTS = (
+    LocalIntent.THANKS, LocalIntent.GOOD_NIGHT, LocalIntent.FAREWELL,
+    LocalIntent.WELLBEING, LocalIntent.GREETING, LocalIntent.ACKNOWLEDGEMENT,
+)
+
+# Words that carry no intent of their own and are ignored when matching
+FILLER_WORDS = frozenset([
+    "please", "pls", "plz", "bot", "bhai", "dada", "di", "ji", "sir", "just", "right", "now",
+    "today", "again", "so", "far", "before", "earlier", "can", "could", "you", "u", "me",
+    "tell", "do", "know", "and", "to", "ta", "na", "bolo", "bolun", "dao", "ekhon", "aaj", "aj", "ektu",
+    "বলো", "বলুন", "দাও", "একটু", "এখন", "আজ", "আজকে", "প্লিজ", "তো", "ভাই", "দাদা",
+    "তোমাকে", "আপনাকে",
+])
+
+# Messages shorter than this, punctuation aside, are too terse to answer locally
+MIN_MESSAGE_CHARS = 2
+
+# Phrases per intent, matched as whole word sequences of the message.
+# Time and date only come as questions; a bare "time" may mean anything.
+INTENT_PHRASES: Dict[str, List[str]] = {
+    LocalIntent.TIME: [
+        "what time is it", "what time it is", "what is the time", "whats the time", "what time",
+        "koyta baje", "kota baje", "somoy koto",
+        "কয়টা বাজে", "কটা বাজে", "সময় কত",
+    ],
+    LocalIntent.DATE: [
+        "what is the date", "whats the date", "what date is it", "what day is it", "what date",
+        "koto tarikh", "ki bar",
+        "কত তারিখ", "কি বার", "কী বার", "আজকের তারিখ কত",
+    ],
+    LocalIntent.CONTEXT: [
+        "what did i ask", "what was my question", "what was my first question",
+        "what was my last question", "what was my previous question", "my first question",
+        "my last question", "my previous question", "summarize our conversation",
+        "summarize our chat", "summarize the conversation", "summarize this chat",
+        "summary of our conversation", "summary of our chat", "conversation summary",
+        "conversation summarize koro", "amader conversation summarize koro",
+        "ami age ki jiggesh korechilam", "ami ki jiggesh korechilam", "amar prothom prosno ki chilo",
+        "আমি আগে কি জিজ্ঞেস করেছিলাম", "আমি কি জিজ্ঞেস করেছিলাম", "আমার প্রথম প্রশ্ন কি ছিল",
+        "আমার আগের প্রশ্ন কি ছিল", "আমাদের আলোচনার সারসংক্ষেপ", "আলোচনার সারসংক্ষেপ",
+    ],
+    LocalIntent.GREETING: [
+        "hi", "hello", "hey", "hi there", "hello there", "hey there", "yo", "good morning",
+        "good afternoon", "good evening", "are you there", "namaste", "salam", "assalamualaikum",
+        "ki khobor", "ki korcho", "হাই", "হ্যালো", "নমস্কার", "আসসালামু আলাইকুম", "কি খবর", "কী খবর",
+    ],
+    LocalIntent.WELLBEING: [
+        "how are you", "how are you doing", "hows it going", "how is it going", "kemon acho",
+        "kemon achen", "কেমন আছো", "কেমন আছেন", "তুমি কেমন আছো", "আপনি কেমন আছেন",
+    ],
+    LocalIntent.THANKS: [
+        "thanks", "thank you", "thanks a lot", "thank you so much", "thx", "ty", "many thanks",
+        "that helped", "very helpful", "dhonnobad", "dhanyabad", "ধন্যবাদ", "অনেক ধন্যবাদ",
+        "অনেক উপকার হলো", "উপকার হলো",
+    ],
+    LocalIntent.ACKNOWLEDGEMENT: [
+        "ok", "okay", "okk", "alright", "got it", "cool", "great", "nice", "sure",
+        "thik ache", "accha", "acha", "ঠিক আছে", "আচ্ছা", "ওকে",
+    ],
+    LocalIntent.FAREWELL: [
+        "bye", "goodbye", "bye bye", "see you later", "see you tomorrow", "talk later",
+        "talk tomorrow", "talk to you later", "take care", "tata", "kal kotha hobe",
+        "pore kotha hobe", "বিদায়", "আবার কথা হবে", "পরে কথা হবে",
+    ],
+    LocalIntent.GOOD_NIGHT: [
+        "good night", "gn", "shubho ratri", "শুভ রাত্রি",
+    ],
+}
+
+# (English, Bengali) reply per social intent
+SOCIAL_REPLIES: Dict[str, Tuple[str, str]] = {
+    LocalIntent.GREETING: ("Hello! How can I help you today?", "হ্যালো! আমি কীভাবে সাহায্য করতে পারি?"),
+    LocalIntent.WELLBEING: ("I'm doing well, thank you! How can I help you?",
+                            "আমি ভালো আছি, ধন্যবাদ! কীভাবে সাহায্য করতে পারি?"),
+    LocalIntent.THANKS: ("You're welcome! Let me know if you need anything else.",
+                         "আপনাকে স্বাগতম! আর কিছু লাগলে জানাবেন।"),
+    LocalIntent.ACKNOWLEDGEMENT: ("Great! Let me know if you need anything else.",
+                                  "ঠিক আছে! আর কিছু লাগলে জানাবেন।"),
+    LocalIntent.FAREWELL: ("Bye! Talk to you soon.", "বিদায়! আবার কথা হবে।"),
+    LocalIntent.GOOD_NIGHT: ("Good night! Talk to you soon.", "শুভ রাত্রি! আবার কথা হবে।"),
+}
+
+BENGALI_DIGITS = str.maketrans("0123456789", "০১২৩৪৫৬৭৮৯")
+BENGALI_WEEKDAYS = ["সোমবার", "মঙ্গলবার", "বুধবার", "বৃহস্পতিবার", "শুক্রবার", "শনিবার", "রবিবার"]
+BENGALI_MONTHS = ["জানুয়ারি", "ফেব্রুয়ারি", "মার্চ", "এপ্রিল", "মে", "জুন",
+                  "জুলাই", "আগস্ট", "সেপ্টেম্বর", "অক্টোবর", "নভেম্বর", "ডিসেম্বর"]
+
+def _tokens(text: str) -> List[str]:
+    """Lowercase words with punctuation and emoji removed; Bengali in NFC"""
+    text = unicodedata.normalize("NFC", text.lower()).replace("'", "").replace("’", "")
+    return re.sub(r"[^\w\u0980-\u09FF]+", " ", text).split()
+
+class LocalResponder:
+    """Answers deterministic messages from templates instead of calling Gemini
+    
+    Each message is split into words and matched against the phrase
+    tables. Confidence is the share of words, filler words aside, that the
+    matched phrases account for, so "what time is it?" scores 1.0 while
+    "what time is it in New York" does not. Messages scoring below
+    min_confidence, or mixing two answerable intents, go to the model.
+    Time and date need every word accounted for: a single extra word such
+    as "tomorrow" or "there" changes what is being asked.
+    An acknowledgement such as "ok" is only answered when the last
+    assistant turn did not ask something, since it may be the answer.
+    """
+    
+    def __init__(self, min_confidence: float = 0.75, now: Callable[[], datetime.datetime] = datetime.datetime.now):
+        self.min_confidence = min_confidence
+        self._now = now
+        self.replies = 0
+        # First word -> (phrase words, intent), longest phrase first
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for intent, phrases in INTENT_PHRASES.items():
+            for phrase in phrases:
+                words = tuple(word for word in _tokens(phrase) if word not in FILLER_WORDS)
+                self._phrases.setdefault(words[0], []).append((words, intent))
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda candidate: -len(candidate[0]))
+    
+    def classify(self, message: str) -> Tuple[Optional[str], FrozenSet[str], float]:
+        """Main intent, every matched intent and the confidence for a message
+        
+        The main intent is time/date, context or, for pure small talk, the
+        social intent. It is None when nothing answerable was found.
+        """
+        words = _tokens(message)
+        if len("".join(words)) < MIN_MESSAGE_CHARS:
+            return None, frozenset(), 0.0
+        
+        # Fillers are ignored, also inside phrases, and do not count towards confidence
+        content = [word for word in words if word not in FILLER_WORDS]
+        covered = 0
+        intents = set()
+        index = 0
+        while index < len(content):
+            for phrase, intent in self._phrases.get(content[index], ()):
+                if tuple(content[index:index + len(phrase)]) == phrase:
+                    intents.add(intent)
+                    covered += len(phrase)
+                    index += len(phrase)
+                    break
+            else:
+                index += 1
+        
+        if not intents:
+            return None, frozenset(), 0.0
+        clock = intents & {LocalIntent.TIME, LocalIntent.DATE}
+        if clock and LocalIntent.CONTEXT in intents:
+            # Two different questions in one message: let the model sort it out
+            return None, frozenset(intents), 0.0
+        if clock:
+            main = LocalIntent.DATE if clock == {LocalIntent.DATE} else LocalIntent.TIME
+        elif LocalIntent.CONTEXT in intents:
+            main = LocalIntent.CONTEXT
+        else:
+            main = next(intent for intent in SOCIAL_INTENTS if intent in intents)
+        return main, frozenset(intents), covered / len(content)
+    
+    def respond(self, message: str, conversation_manager: Optional[ConversationManager] = None) -> Optional[str]:
+        """A template reply, or None when the message needs the model
+        
+        The message itself need not be recorded in the conversation manager yet.
+        """
+        intent, intents, confidence = self.classify(message)
+        clock = intent in (LocalIntent.TIME, LocalIntent.DATE)
+        if intent is None or confidence < (1.0 if clock else self.min_confidence):
+            return None
+        if intent == LocalIntent.ACKNOWLEDGEMENT and self._awaits_answer(conversation_manager):
+            return None
+        
+        bengali = any("\u0980" <= char <= "\u09FF" for char in message)
+        if clock:
+            reply = self._clock_reply(LocalIntent.TIME in intents, LocalIntent.DATE in intents, bengali)
+        elif intent == LocalIntent.CONTEXT:
+            # History answers come from the conversation; without one, ask the model
+            reply = conversation_manager.handle_context_query(message) if conversation_manager else None
+        else:
+            reply = SOCIAL_REPLIES[intent][1 if bengali else 0]
+        
+        if reply:
+            self.replies += 1
+            LOCAL_REPLIES.inc(intent=intent)
+            print(f"✓ Answered locally ({intent}, confidence {confidence:.2f})")
+        return reply
+    
+    @staticmethod
+    def _awaits_answer(conversation_manager: Optional[ConversationManager]) -> bool:
+        """Whether the last assistant turn ended on a question; True when unknown"""
+        if conversation_manager is None:
+            return True
+        for turn in reversed(conversation_manager.conversation_history):
+            if turn.role == "assistant":
+                # Trailing emoji and the like do not make up a sentence of their own
+                sentences = [sentence for sentence in re.split(r"(?<=[.!?।])\s+|\n+", turn.content)
+                             if re.search(r"\w", sentence)]
+                return bool(sentences) and "?" in sentences[-1]
+        return False
+    
+    def _clock_reply(self, with_time: bool, with_date: bool, bengali: bool) -> str:
+        """Current time and/or date in the message's language"""
+        now = self._now()
+        if bengali:
+            clock = now.strftime("%H:%M").translate(BENGALI_DIGITS)
+            date = (f"{BENGALI_WEEKDAYS[now.weekday()]}, {str(now.day).translate(BENGALI_DIGITS)} "
+                    f"{BENGALI_MONTHS[now.month - 1]} {str(now.year).translate(BENGALI_DIGITS)}")
+            if with_time and with_date:
+                return f"এখন সময় {clock}, {date}।"
+            return f"এখন সময় {clock}।" if with_time else f"আজ {date}।"
+        
+        clock = now.strftime("%I:%M %p").lstrip("0")
+        date = f"{now.strftime('%A')}, {now.day} {now.strftime('%B %Y')}"
+        if with_time and with_date:
+            return f"It's {clock} on {date}."
+        return f"It's {clock}." if with_time else f"Today is {date}."
@@ -11,6 +11,8 @@ sys.path.insert(0, str(current_dir))
 
 from config import Config
 from bot_new import WhatsAppGeminiBot
+from async_bot import AsyncWhatsAppGeminiBot
+from metrics import GEMINI_SECONDS, GEMINI_TOKENS, STAGE_SECONDS, format_summary
 
 def main():
     """Main function to run the WhatsApp bot"""
@@ -23,12 +25,19 @@ def main():
         
         # Load configuration
         config = Config.load_from_env()
-        print(f"Target Contact: {config.TARGET_CONTACT}")
+        if config.MULTI_CHAT_MODE:
+            print(f"Target Contacts: {', '.join(config.MULTI_CHAT_CONTACTS) or 'all unread chats'}")
+        else:
+            print(f"Target Contact: {config.TARGET_CONTACT}")
         print(f"Chat Duration: {config.CHAT_DURATION_MINUTES} minutes")
         print(f"Response Delay: {config.RESPONSE_DELAY} seconds")
+        print(f"Orchestrator: {config.ORCHESTRATOR}")
         
         # Initialize bot
-        bot = WhatsAppGeminiBot(config)
+        if config.ORCHESTRATOR == "async":
+            bot = AsyncWhatsAppGeminiBot(config)
+        else:
+            bot = WhatsAppGeminiBot(config)
         
         # Initialize WhatsApp connection
         if not bot.initialize():
@@ -47,6 +56,36 @@ def main():
         print(f"Messages Received: {stats.total_messages_received}")
         print(f"Messages Sent: {stats.total_messages_sent}")
         print(f"Total Errors: {stats.total_errors}")
+        print(f"Average Response Time: {stats.average_response_time:.2f} seconds")
+        print(f"Answered Locally: {stats.model_calls_avoided} (Gemini calls avoided)")
+        if bot.state_store:
+            lifetime = bot.lifetime_stats()
+            print(f"All Sessions: {lifetime['total_messages_received']} received, "
+                  f"{lifetime['total_messages_sent']} sent, {lifetime['total_errors']} errors")
+        
+        gateway_stats = bot.ai_client.gateway.get_stats()
+        print(f"Gemini Calls: {gateway_stats['calls']} "
+              f"(retries: {gateway_stats['retries']}, rate limited: {gateway_stats['rate_limited']})")
+        
+        response_cache = bot.ai_client.response_cache
+        if response_cache:
+            cache_stats = response_cache.get_stats()
+            print(f"Response Cache: {cache_stats['hits']} hits "
+                  f"({cache_stats['disk_hits']} from disk), {cache_stats['misses']} misses, "
+                  f"hit rate {cache_stats['hit_rate']:.0%}")
+        
+        context_cache = bot.ai_client.context_cache
+        if context_cache:
+            context_stats = context_cache.get_stats()
+            print(f"Context Cache: {context_stats['cached_tokens']} of {context_stats['prompt_tokens']} "
+                  f"prompt tokens cached ({context_stats['cached_share']:.0%})")
+        
+        print("Latency by stage:")
+        for line in format_summary(STAGE_SECONDS) + format_summary(GEMINI_SECONDS, "gemini:"):
+            print(line)
+        tokens = {key[0]: value for key, value in GEMINI_TOKENS.values().items()}
+        print(f"Gemini Tokens: {tokens.get('prompt', 0):.0f} prompt "
+              f"({tokens.get('cached', 0):.0f} cached), {tokens.get('output', 0):.0f} output")
         
         # Show conversation history
         bot.show_conversation_history()
@@ -2,30 +2,20 @@
 Message processing utilities
 """
 import re
-from typing import List, Set
+import hashlib
+from typing import Dict, List, Tuple
 from models import Message
+from dedup_index import MessageDedupIndex
+from keyword_matcher import Intent, match_intents
+from text_sanitizer import sanitize_text
 
 class MessageProcessor:
     """Handles message processing and filtering"""
     
     @staticmethod
-    def clean_text_for_whatsapp(text: str) -> str:
+    def clean_text_for_whatsapp(text: str, keep_emoji: bool = False) -> str:
         """Remove emojis and non-BMP characters that cause ChromeDriver issues"""
-        if not text:
-            return ""
-        
-        # Remove emojis and other non-BMP characters
-        text = re.sub(r'[^\x00-\x7F\u00A0-\uFFFF]', '', text)
-        # Remove common emoji patterns
-        text = re.sub(r'[\U0001F600-\U0001F64F]', '', text)  # emoticons
-        text = re.sub(r'[\U0001F300-\U0001F5FF]', '', text)  # symbols & pictographs
-        text = re.sub(r'[\U0001F680-\U0001F6FF]', '', text)  # transport & map
-        text = re.sub(r'[\U0001F1E0-\U0001F1FF]', '', text)  # flags
-        text = re.sub(r'[\U00002702-\U000027B0]', '', text)  # dingbats
-        text = re.sub(r'[\U000024C2-\U0001F251]', '', text)  # enclosed characters
-        # Clean up extra spaces
-        text = ' '.join(text.split())
-        return text.strip()
+        return sanitize_text(text, keep_emoji=keep_emoji)
     
     @staticmethod
     def is_typing_indicator(message_text: str) -> bool:
@@ -42,31 +32,94 @@ class MessageProcessor:
             return True
         
         # Skip system messages or notifications
-        system_indicators = [
-            "joined using this group's invite link",
-            "left",
-            "added",
-            "removed",
-            "changed the group description",
-            "changed their phone number"
-        ]
+        return Intent.SYSTEM_MESSAGE in match_intents(message_text)
+    
+    @staticmethod
+    def message_key(message: Message, occurrence: int = 0) -> str:
+        """Stable identity for a message: WhatsApp's data-id, else a content hash.
         
-        return any(indicator in message_text.lower() for indicator in system_indicators)
+        ``occurrence`` distinguishes repeated identical texts (e.g. "ok" sent
+        twice) when no data-id is available.
+        """
+        if message.message_id:
+            return message.message_id
+        direction = "in" if message.is_incoming else "out"
+        payload = f"{direction}|{occurrence}|{message.text}".encode("utf-8")
+        return "h:" + hashlib.blake2b(payload, digest_size=8).hexdigest()
     
     @staticmethod
-    def filter_new_messages(current_messages: List[Message], processed_messages: Set[str]) -> List[Message]:
-        """Filter out already processed messages and return only new incoming messages"""
+    def text_key(text: str) -> str:
+        """Key for text the bot itself sent, used to ignore echoes of our replies"""
+        return "t:" + hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+    
+    @staticmethod
+    def message_keys(messages: List[Message], processed_messages: MessageDedupIndex,
+                     snapshot: bool = True) -> List[str]:
+        """Compute identity keys for messages, in order
+        
+        ``messages`` is either the whole visible chat (snapshot) or a batch
+        of newly added rows from the push observer. Repeated texts without a
+        data-id are numbered with counts kept in ``processed_messages``, so
+        a second "ok" gets a new key even in a later batch or after the
+        first one scrolled out of view.
+        """
+        slots: Dict[Tuple[bool, str], List[int]] = {}
+        for index, msg in enumerate(messages):
+            if not msg.message_id:
+                slots.setdefault((msg.is_incoming, msg.text), []).append(index)
+        
+        if snapshot:
+            processed_messages.start_snapshot()
+        keys = [msg.message_id or "" for msg in messages]
+        for (is_incoming, text), indexes in slots.items():
+            slot = f"{'in' if is_incoming else 'out'}|{text}"
+            occurrences = processed_messages.text_occurrences(slot, len(indexes), snapshot)
+            for index, occurrence in zip(indexes, occurrences):
+                keys[index] = MessageProcessor.message_key(messages[index], occurrence)
+        return keys
+    
+    @staticmethod
+    def filter_new_messages(current_messages: List[Message], processed_messages: MessageDedupIndex,
+                            snapshot: bool = True) -> List[Message]:
+        """Return only new incoming messages and record them in the dedup index
+        
+        Pass snapshot=False for a push batch that holds only added rows.
+        """
         new_messages = []
+        keys = MessageProcessor.message_keys(current_messages, processed_messages, snapshot)
         
-        for msg in current_messages:
+        for msg, key in zip(current_messages, keys):
             # Only process truly new incoming messages
-            if (msg.text not in processed_messages and 
-                msg.is_incoming and 
-                not MessageProcessor.should_skip_message(msg.text)):
-                new_messages.append(msg)
+            if (not msg.is_incoming or
+                    key in processed_messages or
+                    MessageProcessor.should_skip_message(msg.text)):
+                continue
+            # A row of unknown direction may be our own reply rendered without its class
+            if not msg.direction_known and MessageProcessor.text_key(msg.text) in processed_messages:
+                continue
+            processed_messages.add(key)
+            new_messages.append(msg)
         
         return new_messages
     
+    @staticmethod
+    def merge_messages(messages: List[Message]) -> Message:
+        """Combine a burst of consecutive messages into one, one line per message"""
+        if len(messages) == 1:
+            return messages[0]
+        last = messages[-1]
+        return Message(
+            text="\n".join(msg.text for msg in messages),
+            is_incoming=last.is_incoming,
+            timestamp=last.timestamp,
+            message_id=last.message_id
+        )
+    
+    @staticmethod
+    def burst_deadline(now: float, burst_start: float, window: float, max_wait: float) -> float:
+        """When to stop waiting for follow-ups: window from now, at most max_wait after the burst began"""
+        return min(now + window, burst_start + max_wait)
+    
     @staticmethod
     def detect_language(text: str) -> str:
         """Detect the language of the text (English or Bengali)"""
@@ -85,13 +138,13 @@ class MessageProcessor:
         return message[:max_length] + "..."
     
     @staticmethod
-    def validate_response(response: str, max_length: int = 400) -> str:
+    def validate_response(response: str, max_length: int = 400, keep_emoji: bool = False) -> str:
         """Validate and clean AI response"""
         if not response or len(response.strip()) < 2:
             return ""
         
         # Clean the response
-        response = MessageProcessor.clean_text_for_whatsapp(response)
+        response = MessageProcessor.clean_text_for_whatsapp(response, keep_emoji)
         
         # Limit response length
         if len(response) > max_length:
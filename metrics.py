@@ -0,0 +1,246 @@
+"""
+Latency histograms, counters and a Prometheus text endpoint for the bot
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Upper bounds in seconds, from a DOM query up to a slow grounded search
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set, e.g. {stage="send",le="0.5"}"""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label combination"""
+    
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation"""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the with block"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+    
+    def summary(self) -> Dict[LabelValues, Dict[str, float]]:
+        """Count, mean and estimated p50/p95/p99 in seconds per series"""
+        with self._lock:
+            snapshot = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        return {
+            key: {
+                "count": count,
+                "mean": total / count if count else 0.0,
+                "p50": self._quantile(counts, count, 0.50),
+                "p95": self._quantile(counts, count, 0.95),
+                "p99": self._quantile(counts, count, 0.99),
+            }
+            for key, (counts, total, count) in snapshot.items()
+        }
+    
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.buckets):
+                    # Open-ended +Inf bucket: the largest finite bound is all we know
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+    
+    def render(self) -> List[str]:
+        """Prometheus text exposition lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+    
+    def reset(self) -> None:
+        """Drop every series"""
+        with self._lock:
+            self._series.clear()
+
+class Counter:
+    """Monotonic counter, one series per label combination"""
+    
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add amount to the labelled series"""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def values(self) -> Dict[LabelValues, float]:
+        """Current value per series"""
+        with self._lock:
+            return dict(self._values)
+    
+    def render(self) -> List[str]:
+        """Prometheus text exposition lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+    
+    def reset(self) -> None:
+        """Drop every series"""
+        with self._lock:
+            self._values.clear()
+
+class MetricsRegistry:
+    """Named metrics plus gauge collectors rendered in Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], List[Tuple[str, str, float]]]] = []
+    
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Histogram:
+        """Register a histogram, or return the one already registered under name"""
+        return self._metrics.setdefault(name, Histogram(name, documentation, label_names))
+    
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """Register a counter, or return the one already registered under name"""
+        return self._metrics.setdefault(name, Counter(name, documentation, label_names))
+    
+    def add_collector(self, collector: Callable[[], List[Tuple[str, str, float]]]) -> None:
+        """Register a callable returning (name, help, value) gauges at scrape time"""
+        self._collectors.append(collector)
+    
+    def remove_collector(self, collector: Callable[[], List[Tuple[str, str, float]]]) -> None:
+        """Unregister a collector added with add_collector"""
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+    
+    def render(self) -> str:
+        """Every metric in Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                gauges = collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for name, documentation, value in gauges:
+                lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {value}"])
+        return "\n".join(lines) + "\n"
+    
+    def reset(self) -> None:
+        """Clear recorded values, e.g. between benchmark runs"""
+        for metric in self._metrics.values():
+            metric.reset()
+
+# Process-wide registry; the bot, AI client and drivers all record into it
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "whatsapp_bot_stage_seconds", "Time spent in each pipeline stage", ("stage",)
+)
+GEMINI_SECONDS = REGISTRY.histogram(
+    "whatsapp_bot_gemini_seconds", "Gemini generation time per route, including rate limiting", ("route",)
+)
+RESPONSE_SECONDS = REGISTRY.histogram(
+    "whatsapp_bot_response_seconds", "Time from handling a message to its reply being sent"
+)
+GEMINI_TOKENS = REGISTRY.counter(
+    "whatsapp_bot_gemini_tokens_total", "Tokens reported in Gemini usage_metadata", ("kind",)
+)
+LOCAL_REPLIES = REGISTRY.counter(
+    "whatsapp_bot_local_replies_total", "Replies answered from local templates, i.e. Gemini calls avoided", ("intent",)
+)
+
+class MetricsServer:
+    """Serves REGISTRY at http://host:port/metrics from a daemon thread"""
+    
+    def __init__(self, host: str, port: int, registry: MetricsRegistry = REGISTRY):
+        registry_ref = registry
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format: str, *args) -> None:
+                pass  # Scrapes would flood the bot's console
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        print(f"✓ Metrics available at http://{host}:{self.port}/metrics")
+    
+    def close(self) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+def format_summary(histogram: Histogram, prefix: str = "") -> List[str]:
+    """Human readable p50/p95/p99 lines for the session summary"""
+    lines = []
+    for key, stats in sorted(histogram.summary().items()):
+        name = prefix + "/".join(key) if key else histogram.name
+        lines.append(f"  {name:<16} n={stats['count']:<5} mean {stats['mean'] * 1000:7.1f}ms  "
+                     f"p50 {stats['p50'] * 1000:7.1f}ms  p95 {stats['p95'] * 1000:7.1f}ms  "
+                     f"p99 {stats['p99'] * 1000:7.1f}ms")
+    return lines
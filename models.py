@@ -16,6 +16,8 @@ class Message(BaseModel):
     text: str
     is_incoming: bool
     timestamp: float
+    message_id: Optional[str] = None  # WhatsApp data-id when available
+    direction_known: bool = True  # False when the row had neither message-in nor message-out
     
     class Config:
         """Pydantic configuration"""
@@ -39,7 +41,7 @@ class BotStatus(BaseModel):
     messages_processed: int = 0
     errors_count: int = 0
     last_activity: Optional[float] = None
-    
+
 class BotStats(BaseModel):
     """Model for bot statistics"""
     total_messages_received: int = 0
@@ -47,6 +49,7 @@ class BotStats(BaseModel):
     total_errors: int = 0
     session_duration: float = 0.0
     average_response_time: float = 0.0
+    model_calls_avoided: int = 0
     languages_detected: Dict[str, int] = {}
     
     def add_language(self, language: str):
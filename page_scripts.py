@@ -0,0 +1,151 @@
+"""
+JavaScript snippets evaluated inside WhatsApp Web by the browser drivers
+
+Scripts follow WebDriver execute_script conventions: the body may ``return``
+a value and reads its inputs from ``arguments``. Async scripts receive their
+completion callback as the last argument.
+"""
+
+# Shared page-side helpers: locate message text spans and turn each one into a
+# compact record (text, direction, whether the direction is known, data-id, timestamp).
+MESSAGE_RECORD_HELPERS = """
+const SPAN_SELECTOR = 'span[class*="_ao3e"][class*="selectable-text"]';
+
+function toRecord(span) {
+    const container = span.closest('div[class*="message-"], div[class*="_akbu"]');
+    const cls = container ? (container.className || '') : '';
+    const idHolder = span.closest('[data-id]');
+    const known = cls.indexOf('message-in') !== -1 || cls.indexOf('message-out') !== -1;
+    return {
+        text: (span.innerText || '').trim(),
+        incoming: cls.indexOf('message-in') !== -1 || cls.indexOf('message-out') === -1,
+        known: known,
+        id: idHolder ? idHolder.getAttribute('data-id') : null,
+        ts: Date.now()
+    };
+}
+"""
+
+# Extract every visible message in a single WebDriver round trip.
+MESSAGE_SNAPSHOT_SCRIPT = MESSAGE_RECORD_HELPERS + """
+const root = document.querySelector('#main') || document;
+return Array.prototype.map.call(root.querySelectorAll(SPAN_SELECTOR), toRecord)
+    .filter(function (record) { return record.text; });
+"""
+
+# Page-side MutationObserver that queues new message nodes so Python can drain
+# them in one call instead of re-scanning the whole conversation pane.
+MESSAGE_OBSERVER_SCRIPT = MESSAGE_RECORD_HELPERS + """
+const pane = document.querySelector('#main');
+if (!pane) { return false; }
+if (window.__waBot && window.__waBot.pane === pane && pane.isConnected) { return true; }
+if (window.__waBot && window.__waBot.observer) { window.__waBot.observer.disconnect(); }
+
+const state = {pane: pane, queue: [], waiter: null, seen: new WeakSet(), observer: null};
+
+pane.querySelectorAll(SPAN_SELECTOR).forEach(function (span) { state.seen.add(span); });
+
+state.observer = new MutationObserver(function (mutations) {
+    mutations.forEach(function (mutation) {
+        mutation.addedNodes.forEach(function (node) {
+            if (node.nodeType !== Node.ELEMENT_NODE) { return; }
+            const spans = node.matches(SPAN_SELECTOR) ? [node] : node.querySelectorAll(SPAN_SELECTOR);
+            spans.forEach(function (span) {
+                if (state.seen.has(span)) { return; }
+                state.seen.add(span);
+                const record = toRecord(span);
+                if (record.text) { state.queue.push(record); }
+            });
+        });
+    });
+    if (state.queue.length && state.waiter) { state.waiter(); }
+});
+state.observer.observe(pane, {childList: true, subtree: true});
+window.__waBot = state;
+return true;
+"""
+
+# Async script: resolves as soon as the observer has queued records, or with an
+# empty list after the timeout. Resolves null when the observer is gone.
+MESSAGE_WAIT_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const timeoutMs = arguments[0];
+const state = window.__waBot;
+if (!state || !state.pane.isConnected) { done(null); return; }
+if (state.queue.length) { done(state.queue.splice(0)); return; }
+const timer = setTimeout(function () { state.waiter = null; done([]); }, timeoutMs);
+state.waiter = function () {
+    clearTimeout(timer);
+    state.waiter = null;
+    done(state.queue.splice(0));
+};
+"""
+
+# Scan the chat list once and return every chat showing an unread badge.
+UNREAD_CHATS_SCRIPT = """
+const pane = document.querySelector('#pane-side');
+if (!pane) { return []; }
+const chats = [];
+pane.querySelectorAll('[role="listitem"], [role="row"]').forEach(function (row) {
+    const badge = row.querySelector('span[aria-label*="unread message"]');
+    const title = row.querySelector('span[title]');
+    if (!badge || !title) { return; }
+    chats.push({name: title.getAttribute('title'), unread: parseInt(badge.innerText, 10) || 1});
+});
+return chats;
+"""
+
+# Find the chat list entry whose title matches arguments[0].
+CHAT_ROW_SCRIPT = """
+const pane = document.querySelector('#pane-side');
+if (!pane) { return null; }
+const titles = pane.querySelectorAll('span[title]');
+for (let i = 0; i < titles.length; i++) {
+    if (titles[i].getAttribute('title') === arguments[0]) { return titles[i]; }
+}
+return null;
+"""
+
+# Title of the chat currently open in the conversation pane.
+OPEN_CHAT_TITLE_SCRIPT = """
+const title = document.querySelector('#main header span[title]');
+return title ? title.getAttribute('title') : null;
+"""
+
+# Status line under the open chat's title ("online", "typing…", "last seen ...").
+CHAT_STATUS_SCRIPT = """
+const header = document.querySelector('#main header');
+if (!header) { return ''; }
+const spans = header.querySelectorAll('span:not([title])');
+for (let i = 0; i < spans.length; i++) {
+    const text = spans[i].innerText;
+    if (text && !spans[i].querySelector('span')) { return text; }
+}
+return '';
+"""
+
+# Async script: insert arguments[1] into the message box arguments[0] in one
+# step, replacing any draft. insertText fires the same beforeinput/input events
+# as typing; the editor applies them asynchronously, so the result is checked
+# on the next animation frame. Whitespace is compared loosely because line
+# breaks come back as paragraphs. On a mismatch the box is cleared again and
+# false is returned so the caller can type the message instead.
+INSERT_TEXT_SCRIPT = """
+const input = arguments[0];
+const text = arguments[1];
+const done = arguments[arguments.length - 1];
+const normalize = function (value) { return value.replace(/\\s+/g, ' ').trim(); };
+input.focus();
+document.execCommand('selectAll', false, null);
+document.execCommand('insertText', false, text);
+requestAnimationFrame(function () {
+    if (normalize(input.innerText || '') === normalize(text)) {
+        done(true);
+        return;
+    }
+    input.focus();
+    document.execCommand('selectAll', false, null);
+    document.execCommand('delete', false, null);
+    done(false);
+});
+"""
@@ -0,0 +1,283 @@
+"""
+Client-side rate limiting and concurrency control for Gemini API calls
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+class Priority:
+    """Call priorities; lower values are admitted first"""
+    USER_REPLY = 0
+    GREETING = 1
+    SUMMARY = 2
+
+# Priority of the calls made in the current thread or asyncio task
+current_priority: contextvars.ContextVar = contextvars.ContextVar(
+    "gemini_call_priority", default=Priority.USER_REPLY
+)
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+_RETRY_DELAY_PATTERN = re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s")
+
+def estimate_tokens(contents: Any, expected_output_tokens: int = 256) -> int:
+    """Rough token estimate for a request (about four characters per token)"""
+    return len(str(contents or "")) // 4 + expected_output_tokens
+
+class TokenBucket:
+    """Token bucket refilled continuously up to a per-minute capacity"""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until amount tokens are available (0 when they already are)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+    
+    def consume(self, amount: float) -> None:
+        """Take tokens; negative amounts return over-estimated tokens"""
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+class GeminiCallGateway:
+    """Single entry point for every Gemini model call
+    
+    Admits calls in priority order while keeping requests and tokens per
+    minute under the configured quota and capping in-flight requests.
+    Rate limit and transient server errors are retried with jittered
+    exponential backoff; a 429 pauses all callers for the server's
+    suggested retry delay.
+    """
+    
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_in_flight: int,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0):
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+    
+    def call(self, func: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Any:
+        """Run a blocking model call under the rate limits"""
+        for attempt in range(self.max_retries + 1):
+            self._acquire(estimated_tokens)
+            try:
+                result = func(*args, **kwargs)
+                self._settle_tokens(result, estimated_tokens)
+                return result
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._release()
+            time.sleep(delay)
+    
+    async def call_async(self, func: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Any:
+        """Await an async model call under the rate limits"""
+        for attempt in range(self.max_retries + 1):
+            await self._acquire_async(estimated_tokens)
+            try:
+                result = await func(*args, **kwargs)
+                self._settle_tokens(result, estimated_tokens)
+                return result
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+    
+    def call_stream(self, func: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Iterator[Any]:
+        """Iterate a streaming model call, holding an in-flight slot only while the model streams
+        
+        A reader thread drains the upstream stream into a queue and releases
+        the slot when it ends, so a consumer that is slow between chunks
+        (e.g. sending each one through the browser) does not hold it.
+        Failures are only retried before the first chunk has been received.
+        """
+        chunks: "queue.Queue[Tuple[bool, Any]]" = queue.Queue()
+        stop = threading.Event()
+        
+        def pump() -> None:
+            try:
+                for attempt in range(self.max_retries + 1):
+                    self._acquire(estimated_tokens)
+                    started = False
+                    delay = None
+                    try:
+                        for chunk in func(*args, **kwargs):
+                            started = True
+                            chunks.put((False, chunk))
+                            if stop.is_set():
+                                break
+                        chunks.put((True, None))
+                        return
+                    except Exception as e:
+                        delay = None if started else self._retry_delay(e, attempt)
+                        if delay is None:
+                            raise
+                    finally:
+                        self._release()
+                    time.sleep(delay)
+            except BaseException as e:
+                chunks.put((True, e))
+        
+        # The reader inherits this context, so it is admitted at the caller's priority
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(pump,), name="gemini-stream", daemon=True).start()
+        try:
+            while True:
+                done, item = chunks.get()
+                if done:
+                    if item is not None:
+                        raise item
+                    return
+                yield item
+        finally:
+            stop.set()
+    
+    def get_stats(self) -> dict:
+        """Get gateway counters"""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "in_flight": self._in_flight
+        }
+    
+    def _acquire(self, estimated_tokens: int) -> None:
+        """Block until this call may start"""
+        with self._cond:
+            ticket = self._enqueue()
+            try:
+                while True:
+                    wait = self._try_admit(ticket, estimated_tokens)
+                    if wait is None:
+                        return
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._withdraw(ticket)
+                raise
+    
+    async def _acquire_async(self, estimated_tokens: int) -> None:
+        """Wait without blocking the event loop until this call may start"""
+        with self._cond:
+            ticket = self._enqueue()
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(ticket, estimated_tokens)
+                if wait is None:
+                    return
+                await asyncio.sleep(min(wait, 0.25))
+        except BaseException:
+            with self._cond:
+                self._withdraw(ticket)
+            raise
+    
+    def _enqueue(self) -> Tuple[int, int]:
+        """Register a waiting call; caller holds the lock"""
+        ticket = (current_priority.get(), next(self._sequence))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+    
+    def _withdraw(self, ticket: Tuple[int, int]) -> None:
+        """Remove an abandoned ticket; caller holds the lock"""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+    
+    def _try_admit(self, ticket: Tuple[int, int], estimated_tokens: int) -> Optional[float]:
+        """Admit the ticket if it is first in line and quota allows.
+        
+        Returns None once admitted, otherwise how long to wait before retrying.
+        Caller holds the lock.
+        """
+        now = time.monotonic()
+        if self._waiting[0] != ticket or self._in_flight >= self.max_in_flight:
+            return 0.25
+        
+        wait = max(
+            self._paused_until - now,
+            self._requests.time_until(1, now),
+            self._tokens.time_until(estimated_tokens, now)
+        )
+        if wait > 0:
+            return wait
+        
+        heapq.heappop(self._waiting)
+        self._requests.consume(1)
+        self._tokens.consume(estimated_tokens)
+        self._in_flight += 1
+        self.calls += 1
+        self._cond.notify_all()
+        return None
+    
+    def _release(self) -> None:
+        """Free the in-flight slot of a finished call"""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+    
+    def _settle_tokens(self, result: Any, estimated_tokens: int) -> None:
+        """Correct the token bucket with the usage the API actually reported"""
+        usage = getattr(result, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", None) if usage else None
+        if actual is None:
+            return
+        with self._cond:
+            self._tokens.consume(actual - estimated_tokens)
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Backoff before the next attempt, or None when the error is final"""
+        code = getattr(error, "code", None)
+        message = str(error)
+        rate_limited = code == 429 or "RESOURCE_EXHAUSTED" in message
+        if not (rate_limited or code in RETRYABLE_STATUS_CODES) or attempt >= self.max_retries:
+            return None
+        
+        # Full jitter exponential backoff, raised to the server's hint if given
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        hint = _RETRY_DELAY_PATTERN.search(message)
+        if hint:
+            delay = max(delay, float(hint.group(1)) + random.uniform(0, self.backoff_base))
+        
+        self.retries += 1
+        if rate_limited:
+            self.rate_limited += 1
+            # Hold back every caller, not just this one, until quota recovers
+            with self._cond:
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        
+        print(f"Gemini call failed ({code or 'error'}), retrying in {delay:.1f}s "
+              f"(attempt {attempt + 2}/{self.max_retries + 1})")
+        return delay
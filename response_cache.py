@@ -0,0 +1,147 @@
+"""
+Response cache with TTL freshness classes for AI replies
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class ResponseCache:
+    """Size-bounded LRU cache of AI responses with a per-entry TTL
+    
+    Entries live in memory by default. When ``db_path`` is set, they are
+    also written to a SQLite table so cached answers survive restarts; a
+    memory miss then falls through to disk and promotes the hit.
+    """
+    
+    _NORMALIZE_PATTERN = re.compile(r"[\s?!.,;:।]+")
+    
+    def __init__(self, max_entries: int = 512, db_path: str = ""):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+    
+    @classmethod
+    def make_key(cls, message: str, language: str, context: str = "") -> str:
+        """Normalize a message so trivially different phrasings share a key
+        
+        A non-empty conversation context is fingerprinted into the key, so
+        a follow-up such as "what about the second one" is only reused in
+        the same conversation state, never for another contact.
+        """
+        normalized = cls._NORMALIZE_PATTERN.sub(" ", message.lower()).strip()
+        if not context.strip():
+            return f"{language}:{normalized}"
+        fingerprint = hashlib.blake2b(context.encode("utf-8"), digest_size=8).hexdigest()
+        return f"{language}:{normalized}|{fingerprint}"
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached response, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+            
+            disk_entry = self._load_from_disk(key, now)
+            if disk_entry is not None:
+                self._remember(key, *disk_entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return disk_entry[0]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, response: str, ttl_seconds: float) -> None:
+        """Cache a response for ttl_seconds (ignored when ttl is not positive)"""
+        if ttl_seconds <= 0:
+            return
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._save_to_disk(key, response, expires_at)
+    
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate()
+        }
+    
+    def close(self) -> None:
+        """Close the on-disk tier"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+    
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entries"""
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _open_db(self, db_path: str) -> None:
+        """Open the SQLite tier and drop expired rows"""
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Response cache database unavailable, using memory only: {e}")
+            self._db = None
+    
+    def _load_from_disk(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        """Look up an unexpired entry in the SQLite tier"""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM response_cache WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            return (row[0], row[1]) if row else None
+        except sqlite3.Error as e:
+            print(f"Error reading response cache: {e}")
+            return None
+    
+    def _save_to_disk(self, key: str, response: str, expires_at: float) -> None:
+        """Write an entry through to the SQLite tier"""
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, expires_at)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing response cache: {e}")
@@ -0,0 +1,186 @@
+"""
+Persistent per-contact bot state in SQLite
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+from models import ConversationMessage
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS messages ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, contact TEXT NOT NULL, role TEXT NOT NULL, "
+    "content TEXT NOT NULL, timestamp REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS messages_contact ON messages (contact, id)",
+    "CREATE TABLE IF NOT EXISTS processed_keys ("
+    "contact TEXT NOT NULL, key TEXT NOT NULL, seen_at REAL NOT NULL, PRIMARY KEY (contact, key))",
+    "CREATE INDEX IF NOT EXISTS processed_keys_seen ON processed_keys (contact, seen_at)",
+    "CREATE TABLE IF NOT EXISTS contacts ("
+    "contact TEXT PRIMARY KEY, summary TEXT NOT NULL DEFAULT '', stats TEXT NOT NULL DEFAULT '{}', "
+    "updated_at REAL NOT NULL)",
+]
+
+INSERT_MESSAGE = "INSERT INTO messages (contact, role, content, timestamp) VALUES (?, ?, ?, ?)"
+INSERT_KEY = "INSERT OR REPLACE INTO processed_keys (contact, key, seen_at) VALUES (?, ?, ?)"
+UPSERT_SUMMARY = (
+    "INSERT INTO contacts (contact, summary, updated_at) VALUES (?, ?, ?) "
+    "ON CONFLICT (contact) DO UPDATE SET summary = excluded.summary, updated_at = excluded.updated_at"
+)
+UPSERT_STATS = (
+    "INSERT INTO contacts (contact, stats, updated_at) VALUES (?, ?, ?) "
+    "ON CONFLICT (contact) DO UPDATE SET stats = excluded.stats, updated_at = excluded.updated_at"
+)
+PRUNE_MESSAGES = (
+    "DELETE FROM messages WHERE contact = ? AND id <= "
+    "(SELECT id FROM messages WHERE contact = ? ORDER BY id DESC LIMIT 1 OFFSET ?)"
+)
+PRUNE_KEYS = (
+    "DELETE FROM processed_keys WHERE contact = ? AND seen_at <= "
+    "(SELECT seen_at FROM processed_keys WHERE contact = ? ORDER BY seen_at DESC LIMIT 1 OFFSET ?)"
+)
+
+class BotStateStore:
+    """Conversation history, processed message keys and stats per contact
+    
+    The database runs in WAL mode, so loading state never waits on the
+    writer. Every ``record_*`` call only puts a statement on a queue; a
+    background thread commits queued statements in batches every
+    ``flush_interval`` seconds, so persistence adds no latency to replies.
+    """
+    
+    def __init__(self, db_path: str, flush_interval: float = 0.5, batch_size: int = 500):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self.writes = 0
+        self.commits = 0
+        
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        
+        self._writer = threading.Thread(target=self._write_loop, name="state-writer", daemon=True)
+        self._writer.start()
+    
+    def record_message(self, contact: str, message: ConversationMessage) -> None:
+        """Queue a conversation message"""
+        self._queue.put((INSERT_MESSAGE, (contact, message.role, message.content, message.timestamp)))
+    
+    def record_processed(self, contact: str, key: str) -> None:
+        """Queue a processed message key"""
+        self._queue.put((INSERT_KEY, (contact, key, time.time())))
+    
+    def record_summary(self, contact: str, summary: str) -> None:
+        """Queue the contact's rolling conversation summary"""
+        self._queue.put((UPSERT_SUMMARY, (contact, summary, time.time())))
+    
+    def record_stats(self, contact: str, stats: Dict[str, Any]) -> None:
+        """Queue a snapshot of the contact's counters"""
+        self._queue.put((UPSERT_STATS, (contact, json.dumps(stats), time.time())))
+    
+    def prune(self, contact: str, keep_messages: int, keep_keys: int) -> None:
+        """Queue removal of rows beyond what a restart would load"""
+        self._queue.put((PRUNE_MESSAGES, (contact, contact, keep_messages)))
+        self._queue.put((PRUNE_KEYS, (contact, contact, keep_keys)))
+    
+    def load_conversation(self, contact: str, limit: int) -> Tuple[List[ConversationMessage], str]:
+        """Newest ``limit`` messages in chronological order, and the rolling summary"""
+        rows = self._read(
+            "SELECT role, content, timestamp FROM messages WHERE contact = ? ORDER BY id DESC LIMIT ?",
+            (contact, limit)
+        )
+        messages = [ConversationMessage(role=role, content=content, timestamp=timestamp)
+                    for role, content, timestamp in reversed(rows)]
+        summary = self._read("SELECT summary FROM contacts WHERE contact = ?", (contact,))
+        return messages, summary[0][0] if summary else ""
+    
+    def load_processed(self, contact: str, limit: int) -> List[str]:
+        """Most recently seen ``limit`` keys, oldest first"""
+        rows = self._read(
+            "SELECT key FROM (SELECT key, seen_at FROM processed_keys WHERE contact = ? "
+            "ORDER BY seen_at DESC LIMIT ?) ORDER BY seen_at",
+            (contact, limit)
+        )
+        return [row[0] for row in rows]
+    
+    def load_stats(self, contact: str) -> Dict[str, Any]:
+        """Last stored counters for the contact, or an empty dict"""
+        rows = self._read("SELECT stats FROM contacts WHERE contact = ?", (contact,))
+        return json.loads(rows[0][0]) if rows else {}
+    
+    def _read(self, sql: str, params: tuple) -> List[tuple]:
+        """Run a query on a short-lived reader connection"""
+        connection = sqlite3.connect(self.db_path)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is committed"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self, timeout: float = 5.0) -> None:
+        """Commit outstanding writes and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=timeout)
+        if self._writer.is_alive():
+            # The writer still owns the connection; closing it would fail its commit
+            print(f"State store writer still busy after {timeout}s; leaving {self.db_path} open")
+            return
+        self._db.close()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get writer counters"""
+        return {"writes": self.writes, "commits": self.commits, "queued": self._queue.qsize()}
+    
+    def _write_loop(self) -> None:
+        """Commit queued statements in batches until closed"""
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # A flush request or shutdown commits immediately
+            while len(batch) < self.batch_size and isinstance(batch[-1], tuple):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            running = None not in batch
+            self._commit([item for item in batch if isinstance(item, tuple)])
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+    
+    def _commit(self, statements: Iterable[Tuple[str, tuple]]) -> None:
+        """Write one batch in a single transaction, grouping repeated statements"""
+        groups: List[Tuple[str, List[tuple]]] = []
+        for sql, params in statements:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+        if not groups:
+            return
+        
+        try:
+            with self._db:
+                for sql, rows in groups:
+                    self._db.executemany(sql, rows)
+                    self.writes += len(rows)
+            self.commits += 1
+        except sqlite3.Error as e:
+            print(f"Error writing bot state: {e}")
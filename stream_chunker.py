@@ -0,0 +1,85 @@
+"""
+Chunking of streamed model output into WhatsApp-sized messages
+"""
+import re
+from typing import Callable, Iterator, List, Optional
+
+class StreamChunker:
+    """Groups streamed text into paragraph or sentence sized chunks
+    
+    Text is released at the last paragraph break, or failing that the last
+    sentence end, once at least ``min_chars`` are buffered. Every chunk is
+    passed through ``clean`` and the total length of all chunks is capped at
+    ``max_length`` with a trailing "..." when the stream runs over.
+    """
+    
+    _PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+    _SENTENCE_END = re.compile(r"[.!?।](?=\s)")
+    
+    def __init__(self, min_chars: int = 80, max_chunk_chars: int = 700,
+                 max_length: int = 4096, clean: Optional[Callable[[str], str]] = None):
+        self.min_chars = min_chars
+        self.max_chunk_chars = max_chunk_chars
+        self.max_length = max_length
+        self.clean = clean or (lambda text: text.strip())
+        self.emitted_length = 0
+        self.truncated = False
+        self._buffer = ""
+    
+    def feed(self, text: Optional[str]) -> Iterator[str]:
+        """Add streamed text and yield any chunks that are ready"""
+        if not text or self.truncated:
+            return
+        self._buffer += text
+        
+        while len(self._buffer) >= self.min_chars and not self.truncated:
+            cut = self._find_cut()
+            if cut <= 0:
+                break
+            piece, self._buffer = self._buffer[:cut], self._buffer[cut:]
+            yield from self._emit(piece)
+    
+    def flush(self) -> Iterator[str]:
+        """Yield whatever is left once the stream has ended"""
+        piece, self._buffer = self._buffer, ""
+        if piece and not self.truncated:
+            yield from self._emit(piece)
+    
+    def _find_cut(self) -> int:
+        """Index just past the best boundary in the buffer, or 0 if none yet
+        
+        Only boundaries within the first max_chunk_chars count, so no chunk
+        is longer than that.
+        """
+        window = self._buffer[:self.max_chunk_chars + 1]
+        paragraph_ends = [match.end() for match in self._PARAGRAPH_BREAK.finditer(window)
+                          if match.end() <= self.max_chunk_chars]
+        if paragraph_ends and paragraph_ends[-1] >= self.min_chars:
+            return paragraph_ends[-1]
+        
+        sentence_ends = [match.end() for match in self._SENTENCE_END.finditer(window)
+                         if match.end() <= self.max_chunk_chars]
+        if sentence_ends and sentence_ends[-1] >= self.min_chars:
+            return sentence_ends[-1]
+        
+        # No usable boundary in a long buffer: break at the last space instead
+        if len(self._buffer) >= self.max_chunk_chars:
+            space = self._buffer.rfind(" ", 0, self.max_chunk_chars)
+            return space if space > 0 else self.max_chunk_chars
+        return 0
+    
+    def _emit(self, piece: str) -> List[str]:
+        """Clean a chunk and apply the overall length limit"""
+        chunk = self.clean(piece)
+        if not chunk:
+            return []
+        
+        remaining = self.max_length - self.emitted_length
+        if len(chunk) > remaining:
+            self.truncated = True
+            if remaining <= 3:
+                return []
+            chunk = chunk[:remaining - 3] + "..."
+        
+        self.emitted_length += len(chunk)
+        return [chunk]
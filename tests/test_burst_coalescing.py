@@ -0,0 +1,73 @@
+"""
+Tests for merging bursts of consecutive messages into one reply
+"""
+from config import Config
+from bot_new import WhatsAppGeminiBot
+from dedup_index import MessageDedupIndex
+from message_processor import MessageProcessor
+from models import BotStats, Message
+
+def incoming(text: str, timestamp: float = 0.0, message_id=None) -> Message:
+    return Message(text=text, is_incoming=True, timestamp=timestamp, message_id=message_id)
+
+class ScriptedDriver:
+    """Push-mode driver that hands out one scripted batch per wait"""
+    
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.typing = False
+    
+    def wait_for_new_messages(self, timeout: float):
+        return self.batches.pop(0) if self.batches else []
+    
+    def get_chat_status(self) -> str:
+        return "typing…" if self.typing else ""
+
+def make_bot(driver: ScriptedDriver, window: float, max_wait: float) -> WhatsAppGeminiBot:
+    """A bot with just the state _collect_burst uses, no browser or model"""
+    bot = WhatsAppGeminiBot.__new__(WhatsAppGeminiBot)
+    bot.config = Config()
+    bot.config.COALESCE_WINDOW = window
+    bot.config.COALESCE_MAX_WAIT = max_wait
+    bot.whatsapp_driver = driver
+    bot.message_processor = MessageProcessor()
+    bot.processed_messages = MessageDedupIndex()
+    bot.stats = BotStats()
+    return bot
+
+def test_merge_single_message_is_unchanged():
+    message = incoming("hello")
+    assert MessageProcessor.merge_messages([message]) is message
+
+def test_merge_joins_lines_and_keeps_the_last_identity():
+    merged = MessageProcessor.merge_messages([
+        incoming("hi", 1.0, "id1"), incoming("are you there", 2.0, "id2"), incoming("?", 3.0, "id3")
+    ])
+    assert merged.text == "hi\nare you there\n?"
+    assert merged.timestamp == 3.0
+    assert merged.message_id == "id3"
+    assert merged.is_incoming
+
+def test_burst_deadline_restarts_the_window():
+    assert MessageProcessor.burst_deadline(now=10.0, burst_start=9.0, window=1.5, max_wait=8.0) == 11.5
+
+def test_burst_deadline_is_capped_by_max_wait():
+    assert MessageProcessor.burst_deadline(now=16.0, burst_start=9.0, window=1.5, max_wait=8.0) == 17.0
+
+def test_disabled_window_returns_the_messages_right_away():
+    bot = make_bot(ScriptedDriver([[incoming("more")]]), window=0.0, max_wait=8.0)
+    assert [msg.text for msg in bot._collect_burst([incoming("first")], push_mode=True)] == ["first"]
+
+def test_follow_ups_within_the_window_join_the_burst():
+    driver = ScriptedDriver([[incoming("second")], [incoming("third")]])
+    bot = make_bot(driver, window=0.05, max_wait=5.0)
+    burst = bot._collect_burst([incoming("first")], push_mode=True)
+    assert [msg.text for msg in burst] == ["first", "second", "third"]
+    assert bot.stats.total_messages_received == 2
+
+def test_typing_contact_is_capped_by_max_wait():
+    driver = ScriptedDriver([])
+    driver.typing = True
+    bot = make_bot(driver, window=0.02, max_wait=0.2)
+    burst = bot._collect_burst([incoming("first")], push_mode=True)
+    assert [msg.text for msg in burst] == ["first"]
@@ -0,0 +1,75 @@
+"""
+Tests for fair chat scheduling in multi-chat mode
+"""
+import pytest
+from chat_scheduler import ChatScheduler
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("chat_scheduler.time.time", lambda: now[0])
+    return now
+
+def test_busiest_chat_first(clock):
+    scheduler = ChatScheduler()
+    scheduler.update([("alice", 1), ("bob", 4)])
+    assert scheduler.next_chat() == "bob"
+
+def test_aging_lifts_a_quiet_chat(clock):
+    scheduler = ChatScheduler(aging_weight=0.5)
+    scheduler.update([("alice", 1)])
+    clock[0] += 10
+    scheduler.update([("alice", 1), ("bob", 4)])
+    assert scheduler.next_chat() == "alice"
+
+def test_busy_open_chat_is_kept_while_it_outranks_waiting_chats(clock):
+    scheduler = ChatScheduler(aging_weight=0.2)
+    scheduler.mark_served("alice")
+    scheduler.update([("bob", 1)])
+    scheduler.record_handled(2)
+    assert scheduler.next_chat(exclude="alice", current_unread=2) is None
+
+def test_waiting_chat_is_not_starved_by_a_busy_chat(clock):
+    scheduler = ChatScheduler(aging_weight=0.2, max_visit_messages=100)
+    scheduler.mark_served("alice")
+    scheduler.update([("bob", 1)])
+    for _ in range(10):
+        scheduler.record_handled(1)
+        if scheduler.next_chat(exclude="alice", current_unread=1) == "bob":
+            break
+        clock[0] += 1
+    else:
+        pytest.fail("bob never got a turn")
+
+def test_visit_cap_hands_over_the_browser(clock):
+    scheduler = ChatScheduler(aging_weight=0.0, max_visit_messages=3)
+    scheduler.mark_served("alice")
+    scheduler.update([("bob", 1)])
+    scheduler.record_handled(2)
+    assert scheduler.next_chat(exclude="alice", current_unread=2) is None
+    scheduler.record_handled(2)
+    assert scheduler.next_chat(exclude="alice", current_unread=2) == "bob"
+    
+    # A new visit starts with a fresh allowance
+    scheduler.mark_served("bob")
+    scheduler.update([("alice", 1)])
+    assert scheduler.next_chat(exclude="bob", current_unread=2) is None
+
+def test_failed_open_keeps_wait_age_and_is_retried_later(clock):
+    scheduler = ChatScheduler(aging_weight=0.5, retry_after=10.0)
+    scheduler.update([("alice", 1)])
+    clock[0] += 20
+    scheduler.update([("alice", 1), ("bob", 5)])
+    assert scheduler.next_chat() == "alice"
+    
+    scheduler.mark_failed("alice")
+    assert scheduler.next_chat() == "bob"
+    clock[0] += 11
+    assert scheduler.next_chat() == "alice"
+
+def test_switch_cost_moving_average():
+    scheduler = ChatScheduler(smoothing=0.5)
+    scheduler.record_switch(2.0)
+    scheduler.record_switch(4.0)
+    assert scheduler.switch_cost == 3.0
+    assert scheduler.switch_count == 2
@@ -0,0 +1,84 @@
+"""
+Tests for the conversation ring buffer and background rolling summary
+"""
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import pytest
+from config import Config
+from conversation_manager import ConversationManager
+
+class ImmediateExecutor(Executor):
+    """Runs each task on submit, so its future is already done when returned"""
+    
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+@pytest.fixture
+def config():
+    config = Config()
+    config.MAX_CONVERSATION_HISTORY = 4
+    config.SUMMARY_BATCH_MESSAGES = 2
+    return config
+
+def add_messages(manager: ConversationManager, count: int) -> None:
+    """Add messages on a worker thread and fail instead of hanging on a deadlock"""
+    worker = threading.Thread(target=lambda: [manager.add_message(f"message {i}") for i in range(count)],
+                              daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+    assert not worker.is_alive(), "add_message blocked"
+
+def test_history_is_bounded(config):
+    manager = ConversationManager(config)
+    add_messages(manager, 10)
+    assert [msg.content for msg in manager.get_conversation_history()] == [f"message {i}" for i in range(6, 10)]
+    assert "message 5" not in manager.get_conversation_context()
+    assert "message 9" in manager.get_conversation_context()
+
+def test_instant_summarizer_does_not_deadlock(config):
+    batches = []
+    
+    def summarize(summary: str, lines: str) -> str:
+        batches.append(lines)
+        return f"summary {len(batches)}"
+    
+    manager = ConversationManager(config, summarizer=summarize, executor=ImmediateExecutor())
+    add_messages(manager, 10)
+    assert len(batches) == 3
+    assert manager.get_summary() == "summary 3"
+    assert "Earlier conversation summary: summary 3" in manager.get_conversation_context()
+
+def test_raising_summarizer_keeps_previous_summary(config):
+    def summarize(summary: str, lines: str) -> str:
+        raise RuntimeError("model unavailable")
+    
+    manager = ConversationManager(config, summarizer=summarize, executor=ImmediateExecutor())
+    add_messages(manager, 10)
+    assert manager.get_summary() == ""
+
+def test_background_summary(config):
+    executor = ThreadPoolExecutor(max_workers=1)
+    manager = ConversationManager(config, summarizer=lambda summary, lines: summary + lines, executor=executor)
+    add_messages(manager, 6)
+    executor.shutdown(wait=True)
+    assert manager.get_summary() == "User: message 0\nUser: message 1\n"
+
+def test_shut_down_executor_skips_summary(config):
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.shutdown()
+    manager = ConversationManager(config, summarizer=lambda summary, lines: lines, executor=executor)
+    add_messages(manager, 10)
+    assert manager.get_summary() == ""
+
+def test_previous_question_whether_or_not_the_message_is_recorded(config):
+    manager = ConversationManager(config)
+    manager.add_message("what is AI")
+    manager.add_message("AI is ...", role="assistant")
+    assert manager.handle_context_query("what did i ask before") == "You asked: 'what is AI'"
+    manager.add_message("what did i ask before")
+    assert manager.handle_context_query("what did i ask before") == "You asked: 'what is AI'"
@@ -0,0 +1,59 @@
+"""
+Tests for the bounded message de-duplication index
+"""
+import pytest
+from dedup_index import MessageDedupIndex
+
+def test_add_and_contains():
+    index = MessageDedupIndex(max_size=10)
+    index.add("a")
+    assert "a" in index
+    assert "b" not in index
+    assert len(index) == 1
+
+def test_evicts_least_recently_seen_key():
+    index = MessageDedupIndex(max_size=2)
+    index.update(["a", "b"])
+    assert "a" in index  # refreshes "a", so "b" is now the oldest
+    index.add("c")
+    assert index.keys() == ["a", "c"]
+
+def test_ttl_expires_keys(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("dedup_index.time.time", lambda: clock[0])
+    index = MessageDedupIndex(ttl_seconds=60)
+    index.add("a")
+    clock[0] += 61
+    assert "a" not in index
+    assert len(index) == 0
+
+def test_on_add_reports_new_keys_but_not_restored_ones():
+    added = []
+    index = MessageDedupIndex(on_add=added.append)
+    index.restore(["old"])
+    index.add("new")
+    assert added == ["new"]
+    assert "old" in index
+
+def test_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        MessageDedupIndex(max_size=0)
+
+def test_snapshot_occurrences_only_number_additional_copies():
+    index = MessageDedupIndex()
+    assert list(index.text_occurrences("in|ok", 1)) == [0]
+    assert list(index.text_occurrences("in|ok", 1)) == [0]
+    assert list(index.text_occurrences("in|ok", 2)) == [0, 1]
+
+def test_batch_occurrences_are_always_new():
+    index = MessageDedupIndex()
+    assert list(index.text_occurrences("in|ok", 1, snapshot=False)) == [0]
+    assert list(index.text_occurrences("in|ok", 1, snapshot=False)) == [1]
+
+def test_clear_forgets_keys_and_occurrences():
+    index = MessageDedupIndex()
+    index.add("a")
+    index.text_occurrences("in|ok", 1)
+    index.clear()
+    assert "a" not in index
+    assert list(index.text_occurrences("in|ok", 1)) == [0]
@@ -0,0 +1,40 @@
+"""
+Tests for the compiled intent matcher
+"""
+import random
+import pytest
+from keyword_matcher import INTENT_KEYWORDS, INTENT_MATCHER, Intent, KeywordMatcher
+
+def naive_match(text: str) -> frozenset:
+    text = text.lower()
+    return frozenset(tag for tag, keywords in INTENT_KEYWORDS.items()
+                     if any(keyword.lower() in text for keyword in keywords))
+
+@pytest.mark.parametrize("text, expected", [
+    ("", frozenset()),
+    ("What is the WEATHER like?", {Intent.SEARCH_OR_FUNCTION, Intent.WEB_SEARCH, Intent.FUNCTION_CALL}),
+    ("what was my first question", {Intent.CONTEXT_QUERY, Intent.FIRST_QUESTION}),
+    ("Alice left", {Intent.SYSTEM_MESSAGE}),
+    ("আজ কত তারিখ", {Intent.SEARCH_OR_FUNCTION, Intent.WEB_SEARCH, Intent.FUNCTION_CALL}),
+])
+def test_match(text, expected):
+    assert INTENT_MATCHER.match(text) == frozenset(expected)
+
+def test_overlapping_and_prefix_keywords():
+    matcher = KeywordMatcher({"short": ["ab"], "long": ["abc"], "inner": ["bcd"]})
+    assert matcher.match("xabcdx") == {"short", "long", "inner"}
+    assert matcher.match("xabx") == {"short"}
+
+@pytest.mark.parametrize("length", [20, 400])
+def test_agrees_with_substring_scan(length):
+    # Short texts use the regex and long ASCII texts the substring path
+    words = [keyword for keywords in INTENT_KEYWORDS.values() for keyword in keywords]
+    words += ["plan", "trip", "hills", "ami", "kal", "NOW", "Time", "আমি"] * 10
+    rng = random.Random(length)
+    for _ in range(500):
+        text = ""
+        while len(text) < length:
+            text += rng.choice(words) + rng.choice([" ", "", ". "])
+        if rng.random() < 0.5:
+            text = "".join(char for char in text if char.isascii())
+        assert INTENT_MATCHER.match(text) == naive_match(text), text
@@ -0,0 +1,61 @@
+"""
+Tests for local template replies
+"""
+import datetime
+import pytest
+from config import Config
+from conversation_manager import ConversationManager
+from local_responder import LocalIntent, LocalResponder
+
+NOW = datetime.datetime(2026, 10, 17, 14, 5)
+
+@pytest.fixture
+def responder():
+    return LocalResponder(now=lambda: NOW)
+
+@pytest.fixture
+def conversation():
+    return ConversationManager(Config())
+
+@pytest.mark.parametrize("message, intent", [
+    ("What time is it?", LocalIntent.TIME),
+    ("koyta baje", LocalIntent.TIME),
+    ("আজকের তারিখ কত?", LocalIntent.DATE),
+    ("hi there!", LocalIntent.GREETING),
+    ("thanks a lot", LocalIntent.THANKS),
+    ("good night", LocalIntent.GOOD_NIGHT),
+])
+def test_classify(responder, message, intent):
+    main, _, confidence = responder.classify(message)
+    assert main == intent
+    assert confidence == 1.0
+
+@pytest.mark.parametrize("message", ["time", "date", "k", "fine", "what time do you close",
+                                     "tell me about the history of Bengal", "what day is it tomorrow",
+                                     "what time is it there?", "what was the date yesterday",
+                                     "what time is it in London", "what date is next friday"])
+def test_goes_to_model(responder, conversation, message):
+    conversation.add_message(message, role="user")
+    assert responder.respond(message, conversation) is None
+
+def test_clock_replies(responder):
+    assert responder.respond("what time is it") == "It's 2:05 PM."
+    assert responder.respond("thanks! what time is it now?") == "It's 2:05 PM."
+    assert responder.respond("কয়টা বাজে?") == "এখন সময় ১৪:০৫।"
+
+def test_acknowledgement_depends_on_last_assistant_turn(responder, conversation):
+    conversation.add_message("Would you like more details?", role="assistant")
+    conversation.add_message("ok", role="user")
+    assert responder.respond("ok", conversation) is None
+    
+    conversation.add_message("Here is the summary. Have a nice day! 😊", role="assistant")
+    conversation.add_message("ok", role="user")
+    assert responder.respond("ok", conversation) is not None
+
+def test_acknowledgement_without_conversation_goes_to_model(responder):
+    assert responder.respond("okay") is None
+
+def test_context_query_sees_previous_question(responder, conversation):
+    for message in ["what is AI", "what did i ask before"]:
+        conversation.add_message(message, role="user")
+    assert responder.respond("what did i ask before", conversation) == "You asked: 'what is AI'"
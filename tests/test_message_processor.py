@@ -0,0 +1,71 @@
+"""
+Tests for message keys and new-message filtering
+"""
+from dedup_index import MessageDedupIndex
+from message_processor import MessageProcessor
+from models import Message
+
+def incoming(text: str, message_id=None, direction_known: bool = True) -> Message:
+    return Message(text=text, is_incoming=True, timestamp=0.0, message_id=message_id,
+                   direction_known=direction_known)
+
+def outgoing(text: str) -> Message:
+    return Message(text=text, is_incoming=False, timestamp=0.0)
+
+def test_data_id_is_the_key():
+    assert MessageProcessor.message_key(incoming("hi", message_id="true_123")) == "true_123"
+
+def test_repeated_texts_get_distinct_keys():
+    index = MessageDedupIndex()
+    keys = MessageProcessor.message_keys([incoming("ok"), incoming("ok")], index)
+    assert keys[0] != keys[1]
+
+def test_direction_is_part_of_the_key():
+    index = MessageDedupIndex()
+    keys = MessageProcessor.message_keys([incoming("ok"), outgoing("ok")], index)
+    assert keys[0] != keys[1]
+
+def test_same_snapshot_yields_nothing_new_the_second_time():
+    index = MessageDedupIndex()
+    chat = [incoming("hello there"), incoming("ok")]
+    assert MessageProcessor.filter_new_messages(chat, index) == chat
+    assert MessageProcessor.filter_new_messages(chat, index) == []
+
+def test_repeat_in_later_push_batch_is_new():
+    # Regression: occurrence counts used to restart with every batch
+    index = MessageDedupIndex()
+    first = MessageProcessor.filter_new_messages([incoming("ok")], index, snapshot=False)
+    second = MessageProcessor.filter_new_messages([incoming("ok")], index, snapshot=False)
+    assert len(first) == 1
+    assert len(second) == 1
+
+def test_repeat_in_later_snapshot_is_new():
+    index = MessageDedupIndex()
+    MessageProcessor.filter_new_messages([incoming("ok")], index)
+    new = MessageProcessor.filter_new_messages([incoming("ok"), incoming("ok")], index)
+    assert len(new) == 1
+
+def test_repeat_after_first_copy_scrolled_out_is_new():
+    index = MessageDedupIndex()
+    MessageProcessor.filter_new_messages([incoming("ok"), incoming("question one")], index)
+    MessageProcessor.filter_new_messages([incoming("question one")], index)
+    new = MessageProcessor.filter_new_messages([incoming("question one"), incoming("ok")], index)
+    assert [msg.text for msg in new] == ["ok"]
+
+def test_incoming_text_matching_a_bot_reply_is_kept():
+    # Regression: the echo check used to drop the contact's own "thanks" etc.
+    index = MessageDedupIndex()
+    index.add(MessageProcessor.text_key("thank you"))
+    new = MessageProcessor.filter_new_messages([incoming("thank you")], index)
+    assert len(new) == 1
+
+def test_unknown_direction_echo_of_bot_reply_is_dropped():
+    index = MessageDedupIndex()
+    index.add(MessageProcessor.text_key("thank you"))
+    new = MessageProcessor.filter_new_messages([incoming("thank you", direction_known=False)], index)
+    assert new == []
+
+def test_outgoing_and_system_messages_are_skipped():
+    index = MessageDedupIndex()
+    chat = [outgoing("hello"), incoming("Alice left"), incoming("x")]
+    assert MessageProcessor.filter_new_messages(chat, index) == []
@@ -0,0 +1,63 @@
+"""
+Tests for the token bucket and the streaming gateway call
+"""
+import threading
+import pytest
+from rate_limiter import GeminiCallGateway, TokenBucket
+
+def test_bucket_starts_full():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.time_until(60, now=bucket._updated) == 0.0
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket._updated
+    bucket.consume(60)
+    assert bucket.time_until(1, now) == pytest.approx(1.0)
+    assert bucket.time_until(1, now + 1.0) == pytest.approx(0.0)
+
+def test_bucket_never_exceeds_capacity():
+    bucket = TokenBucket(per_minute=60)
+    bucket.time_until(1, bucket._updated + 3600)
+    assert bucket.tokens == 60
+    bucket.consume(-100)
+    assert bucket.tokens == 60
+
+def test_requests_above_capacity_wait_only_for_a_full_bucket():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket._updated
+    bucket.consume(30)
+    assert bucket.time_until(1000, now) == pytest.approx(30.0)
+
+def test_stream_releases_slot_while_consumer_is_busy():
+    # Regression: the in-flight slot used to be held until the consumer finished
+    gateway = GeminiCallGateway(requests_per_minute=60, tokens_per_minute=100000, max_in_flight=1)
+    upstream_done = threading.Event()
+    
+    def stream():
+        yield "one"
+        yield "two"
+        upstream_done.set()
+    
+    chunks = gateway.call_stream(stream)
+    assert next(chunks) == "one"
+    assert upstream_done.wait(timeout=5)
+    for _ in range(100):
+        if gateway.get_stats()["in_flight"] == 0:
+            break
+        threading.Event().wait(0.01)
+    assert gateway.get_stats()["in_flight"] == 0
+    assert list(chunks) == ["two"]
+
+def test_stream_error_reaches_consumer():
+    gateway = GeminiCallGateway(requests_per_minute=60, tokens_per_minute=100000, max_in_flight=1,
+                                max_retries=0)
+    
+    def stream():
+        yield "one"
+        raise RuntimeError("boom")
+    
+    chunks = gateway.call_stream(stream)
+    assert next(chunks) == "one"
+    with pytest.raises(RuntimeError):
+        next(chunks)
@@ -0,0 +1,56 @@
+"""
+Tests for the LRU response cache and its SQLite tier
+"""
+from response_cache import ResponseCache
+
+def test_make_key_normalizes_punctuation_and_case():
+    assert ResponseCache.make_key("What is  AI?", "english") == ResponseCache.make_key("what is ai", "english")
+    assert ResponseCache.make_key("hi", "english") != ResponseCache.make_key("hi", "bengali")
+
+def test_make_key_scopes_follow_ups_to_their_context():
+    question = "what about the second one"
+    alice = ResponseCache.make_key(question, "english", "User: list two laptops\nAssistant: A and B")
+    bob = ResponseCache.make_key(question, "english", "User: list two phones\nAssistant: C and D")
+    assert alice != bob
+    assert ResponseCache.make_key(question, "english", "  ") == ResponseCache.make_key(question, "english")
+
+def test_hit_and_miss_counters():
+    cache = ResponseCache()
+    cache.put("k", "reply", ttl_seconds=60)
+    assert cache.get("k") == "reply"
+    assert cache.get("other") is None
+    assert cache.get_stats()["hits"] == 1
+    assert cache.hit_rate() == 0.5
+
+def test_non_positive_ttl_is_not_cached():
+    cache = ResponseCache()
+    cache.put("k", "reply", ttl_seconds=0)
+    assert cache.get("k") is None
+
+def test_expired_entries_are_dropped(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("response_cache.time.time", lambda: clock[0])
+    cache = ResponseCache()
+    cache.put("k", "reply", ttl_seconds=10)
+    clock[0] += 11
+    assert cache.get("k") is None
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1", 60)
+    cache.put("b", "2", 60)
+    cache.get("a")
+    cache.put("c", "3", 60)
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+def test_entries_survive_restart_through_sqlite(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = ResponseCache(db_path=db_path)
+    cache.put("k", "reply", ttl_seconds=60)
+    cache.close()
+    
+    reopened = ResponseCache(db_path=db_path)
+    assert reopened.get("k") == "reply"
+    assert reopened.disk_hits == 1
+    reopened.close()
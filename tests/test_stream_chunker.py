@@ -0,0 +1,41 @@
+"""
+Tests for chunking streamed model output
+"""
+from stream_chunker import StreamChunker
+
+def chunk_all(chunker: StreamChunker, pieces) -> list:
+    chunks = []
+    for piece in pieces:
+        chunks.extend(chunker.feed(piece))
+    chunks.extend(chunker.flush())
+    return chunks
+
+def test_short_reply_comes_out_on_flush():
+    chunker = StreamChunker(min_chars=80)
+    assert list(chunker.feed("Hello there.")) == []
+    assert list(chunker.flush()) == ["Hello there."]
+
+def test_cuts_at_paragraph_break():
+    first = "A" * 90 + "."
+    chunks = chunk_all(StreamChunker(min_chars=80), [first + "\n\n", "Second part."])
+    assert chunks == [first, "Second part."]
+
+def test_cuts_at_sentence_end_when_no_paragraph_break():
+    text = "x" * 85 + ". And more text follows here"
+    chunks = chunk_all(StreamChunker(min_chars=80), [text])
+    assert chunks == ["x" * 85 + ".", "And more text follows here"]
+
+def test_no_chunk_exceeds_max_chunk_chars():
+    # Regression: a boundary just past the limit used to be chosen
+    text = ("word " * 140).strip() + ".\n\n" + "tail. " * 20
+    chunker = StreamChunker(min_chars=80, max_chunk_chars=700)
+    chunks = chunk_all(chunker, [text[i:i + 37] for i in range(0, len(text), 37)])
+    assert all(len(chunk) <= 700 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+def test_total_length_is_capped():
+    chunker = StreamChunker(min_chars=10, max_length=50)
+    chunks = chunk_all(chunker, ["This is a sentence. " * 10])
+    assert sum(len(chunk) for chunk in chunks) <= 50
+    assert chunks[-1].endswith("...")
+    assert chunker.truncated
@@ -0,0 +1,22 @@
+"""
+Tests for text sanitizing before messages are typed
+"""
+from text_sanitizer import sanitize_text
+
+def test_empty():
+    assert sanitize_text("") == ""
+
+def test_removes_emoji_and_collapses_spaces():
+    assert sanitize_text("Hello 😀   world ✅") == "Hello world"
+
+def test_keeps_bengali():
+    assert sanitize_text("আমি ভালো আছি") == "আমি ভালো আছি"
+
+def test_keeps_lines_with_at_most_one_blank_line():
+    assert sanitize_text("  one  \n\n\n\n two\nthree ") == "one\n\ntwo\nthree"
+
+def test_flattens_without_newlines():
+    assert sanitize_text("one\n\ntwo", keep_newlines=False) == "one two"
+
+def test_keep_emoji_only_strips_c1_controls():
+    assert sanitize_text("hi 😀\x85", keep_emoji=True) == "hi 😀"
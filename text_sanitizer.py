@@ -0,0 +1,34 @@
+"""
+Text sanitizing for messages typed into WhatsApp Web
+"""
+import re
+
+# Everything the old per-range passes removed, as one negated character
+# class: C1 controls, plus enclosed characters through the end of Unicode,
+# which covers dingbats, emoji, flags and every non-BMP character
+# ChromeDriver cannot type
+UNSUPPORTED_CHARS = re.compile(r'[^\x00-\x7F\u00A0-\u24C1]')
+
+# What is left to remove when text is pasted instead of typed
+C1_CONTROLS = re.compile(r'[\x80-\x9F]')
+
+BLANK_LINES = re.compile(r'\n{3,}')
+
+def sanitize_text(text: str, keep_newlines: bool = True, keep_emoji: bool = False) -> str:
+    """Remove characters ChromeDriver cannot type and normalize whitespace
+    
+    Spaces inside a line are collapsed and every line is stripped. With
+    keep_newlines, line breaks survive with at most one blank line in a
+    row, so lists and paragraphs stay readable. Without it, the text is
+    flattened onto one line. keep_emoji keeps emoji and other non-BMP
+    characters for send paths that do not type key by key.
+    """
+    if not text:
+        return ""
+    
+    text = (C1_CONTROLS if keep_emoji else UNSUPPORTED_CHARS).sub('', text)
+    if not keep_newlines:
+        return ' '.join(text.split())
+    
+    text = '\n'.join([' '.join(line.split()) for line in text.split('\n')])
+    return BLANK_LINES.sub('\n\n', text).strip()
@@ -8,61 +8,106 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.remote.webelement import WebElement
 from webdriver_manager.chrome import ChromeDriverManager
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import os
 import time
 from config import Config
 from models import Message
+from driver_base import BaseWhatsAppDriver
+from page_scripts import (
+    MESSAGE_SNAPSHOT_SCRIPT, MESSAGE_OBSERVER_SCRIPT, MESSAGE_WAIT_SCRIPT,
+    UNREAD_CHATS_SCRIPT, CHAT_ROW_SCRIPT, OPEN_CHAT_TITLE_SCRIPT, CHAT_STATUS_SCRIPT,
+    INSERT_TEXT_SCRIPT
+)
+from text_sanitizer import sanitize_text
 
-class WhatsAppDriver:
-    """Handles WhatsApp Web automation"""
+# Fallback selectors, tried in order until one matches
+SEARCH_BOX_SELECTORS = [
+    '//div[@contenteditable="true"][@data-tab="3"]',
+    '//div[@role="textbox"][@title="Search input textbox"]',
+    '//div[contains(@class, "x1hx0egp")][@contenteditable="true"]',
+    '//div[@aria-label="Search input textbox"]'
+]
+
+MESSAGE_INPUT_SELECTORS = [
+    '//div[@contenteditable="true"][@data-tab="10"][@role="textbox"]',
+    '//div[@aria-label="Type a message"][@contenteditable="true"]',
+    '//div[@contenteditable="true"][@role="textbox"][@spellcheck="true"]',
+    '//div[contains(@class, "x1hx0egp")][@contenteditable="true"]',
+    '//div[@data-lexical-editor="true"][@contenteditable="true"]',
+]
+
+# Any search box means the chat list is up and the session is logged in
+LOGGED_IN_XPATH = " | ".join(SEARCH_BOX_SELECTORS)
+
+class WhatsAppDriver(BaseWhatsAppDriver):
+    """Handles WhatsApp Web automation with Selenium and ChromeDriver
+    
+    The search box and message input are looked up once and their element
+    handles reused. A handle is only resolved again when using it raises
+    StaleElementReferenceException, starting with the selector that matched
+    last time, so a send normally costs no lookup round trips.
+    """
     
     def __init__(self, config: Config):
         self.config = config
         self.driver: Optional[webdriver.Chrome] = None
         self.wait: Optional[WebDriverWait] = None
+        self._elements: Dict[str, WebElement] = {}
+        self._selectors: Dict[str, str] = {}
         self._setup_driver()
     
     def _setup_driver(self) -> None:
         """Initialize Chrome WebDriver with WhatsApp compatibility"""
         chrome_options = Options()
-        
+        # Return from driver.get at DOMContentLoaded; login waits for the chat list anyway
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_argument("--no-first-run")
+        chrome_options.add_argument("--no-default-browser-check")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        if self.config.CHROME_PROFILE_DIR:
+            chrome_options.add_argument(f"--user-data-dir={os.path.abspath(self.config.CHROME_PROFILE_DIR)}")
+        if self.config.HEADLESS:
+            chrome_options.add_argument("--headless=new")
+            chrome_options.add_argument("--window-size=1280,900")
         
         self.driver = webdriver.Chrome(options=chrome_options)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if self.config.HEADLESS:
+            # WhatsApp Web refuses user agents that announce headless Chrome
+            user_agent = self.driver.execute_script("return navigator.userAgent").replace("HeadlessChrome", "Chrome")
+            self.driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": user_agent})
         self.wait = WebDriverWait(self.driver, self.config.WEBDRIVER_TIMEOUT)
     
     def login_whatsapp(self) -> bool:
         """Open WhatsApp Web and wait for QR code scan"""
         try:
-            self.driver.get("https://web.whatsapp.com/")
-            
-            print("Please scan the QR code to login to WhatsApp Web...")
-            print("Waiting for WhatsApp to load completely...")
-            
-            # Wait for WhatsApp to load completely with multiple fallback selectors
-            search_selectors = [
-                '//div[@contenteditable="true"][@data-tab="3"]',
-                '//div[@role="textbox"][@title="Search input textbox"]',
-                '//div[contains(@class, "x1hx0egp")][@contenteditable="true"]',
-                '//div[@aria-label="Search input textbox"]'
-            ]
-            
-            element_found = False
-            for selector in search_selectors:
-                try:
-                    self.wait.until(ec.presence_of_element_located((By.XPATH, selector)))
-                    element_found = True
-                    break
-                except:
-                    continue
-            
-            if not element_found:
+            start_time = time.perf_counter()
+            self.driver.get(self.config.WHATSAPP_URL)
+            page_loaded = time.perf_counter()
+            
+            if self.config.CHROME_PROFILE_DIR:
+                print("Waiting for WhatsApp to load (scan the QR code if this profile is not logged in yet)...")
+            else:
+                print("Please scan the QR code to login to WhatsApp Web...")
+                print("Waiting for WhatsApp to load completely...")
+            
+            # One wait for whichever search box selector shows up first
+            try:
+                self._elements["search_box"] = WebDriverWait(self.driver, self.config.LOGIN_TIMEOUT).until(
+                    ec.presence_of_element_located((By.XPATH, LOGGED_IN_XPATH))
+                )
+            except TimeoutException:
                 print("Trying alternative login detection...")
                 # Alternative: wait for the main WhatsApp interface
                 time.sleep(10)
-                
-            print("WhatsApp loaded successfully!")
+            
+            print(f"WhatsApp loaded successfully! (page {page_loaded - start_time:.1f}s, "
+                  f"chat list {time.perf_counter() - page_loaded:.1f}s)")
             return True
             
         except Exception as e:
@@ -75,18 +120,23 @@ class WhatsAppDriver:
         try:
             print(f"Looking for contact: {contact_name}")
             
+            # Chats already visible in the chat list can be opened without searching
+            if self._open_chat_from_list(contact_name):
+                print(f"Chat opened from chat list: {contact_name}")
+                return True
+            
             # Search for the contact
-            search_box_xpath = '//div[@contenteditable="true"][@data-tab="3"]'
-            search_box = self.driver.find_element(By.XPATH, search_box_xpath)
-            search_box.click()
-            search_box.clear()
-            search_box.send_keys(contact_name)
+            try:
+                self._search_for(self._cached_element("search_box", SEARCH_BOX_SELECTORS), contact_name)
+            except StaleElementReferenceException:
+                self._search_for(self._cached_element("search_box", SEARCH_BOX_SELECTORS, refresh=True), contact_name)
             time.sleep(1)
             
             # Click on the contact
             contact_xpath = f'//span[@title="{contact_name}"]'
             contact = self.wait.until(ec.element_to_be_clickable((By.XPATH, contact_xpath)))
             contact.click()
+            self._elements.pop("message_input", None)
             
             print(f"Contact found and chat opened: {contact_name}")
             time.sleep(1)
@@ -96,45 +146,105 @@ class WhatsAppDriver:
             print(f"Error opening chat: {e}")
             return False
     
-    def get_message_input(self):
-        """Find and return the message input box"""
-        message_input_selectors = [
-            '//div[@contenteditable="true"][@data-tab="10"][@role="textbox"]',
-            '//div[@aria-label="Type a message"][@contenteditable="true"]',
-            '//div[@contenteditable="true"][@role="textbox"][@spellcheck="true"]',
-            '//div[contains(@class, "x1hx0egp")][@contenteditable="true"]',
-            '//div[@data-lexical-editor="true"][@contenteditable="true"]',
-        ]
+    @staticmethod
+    def _search_for(search_box: Optional[WebElement], contact_name: str) -> None:
+        """Type the contact name into the chat search box"""
+        if search_box is None:
+            raise NoSuchElementException("Could not find the chat search box")
+        search_box.click()
+        search_box.clear()
+        search_box.send_keys(contact_name)
+    
+    def _cached_element(self, name: str, selectors: List[str], refresh: bool = False) -> Optional[WebElement]:
+        """Return the remembered element, resolving it when missing or refresh is set"""
+        element = self._elements.get(name)
+        if element is not None and not refresh:
+            return element
         
-        for selector in message_input_selectors:
+        # Try the selector that matched last time before the others
+        winner = self._selectors.get(name)
+        ordered = [winner] + [selector for selector in selectors if selector != winner] if winner else selectors
+        for selector in ordered:
             try:
-                return self.driver.find_element(By.XPATH, selector)
-            except:
+                element = self.driver.find_element(By.XPATH, selector)
+            except NoSuchElementException:
                 continue
+            self._elements[name] = element
+            self._selectors[name] = selector
+            return element
+        
+        self._elements.pop(name, None)
         return None
     
+    def _open_chat_from_list(self, contact_name: str) -> bool:
+        """Click the contact's chat list entry directly, if it is visible"""
+        try:
+            row = self.driver.execute_script(CHAT_ROW_SCRIPT, contact_name)
+            if row is None:
+                return False
+            row.click()
+            # The conversation pane, and with it the message input, is re-rendered
+            self._elements.pop("message_input", None)
+            
+            # Wait until the conversation pane shows the selected chat
+            try:
+                WebDriverWait(self.driver, 5, poll_frequency=0.1).until(
+                    lambda driver: driver.execute_script(OPEN_CHAT_TITLE_SCRIPT) == contact_name
+                )
+            except TimeoutException:
+                pass
+            return True
+            
+        except Exception as e:
+            print(f"Could not open chat from list: {e}")
+            return False
+    
+    def get_unread_chats(self) -> List[Tuple[str, int]]:
+        """Return (contact name, unread count) for chats with an unread badge"""
+        try:
+            chats = self.driver.execute_script(UNREAD_CHATS_SCRIPT) or []
+            return [(chat['name'], int(chat['unread'])) for chat in chats if chat.get('name')]
+        except Exception as e:
+            print(f"Error scanning unread chats: {e}")
+            return []
+    
+    def get_chat_status(self) -> str:
+        """Return the open chat's header status line, e.g. "typing…" """
+        try:
+            return self.driver.execute_script(CHAT_STATUS_SCRIPT) or ""
+        except Exception:
+            return ""
+    
+    def run_script(self, script: str, *args) -> Any:
+        """Run an execute_script style body in the page and return its result"""
+        return self.driver.execute_script(script, *args)
+    
+    def get_message_input(self, refresh: bool = False) -> Optional[WebElement]:
+        """Find and return the message input box"""
+        return self._cached_element("message_input", MESSAGE_INPUT_SELECTORS, refresh)
+    
     def send_message(self, message: str) -> bool:
         """Send a message in the current chat"""
         try:
-            message_input = self.get_message_input()
-            if not message_input:
+            start_time = time.perf_counter()
+            try:
+                method = self._send_with(self.get_message_input(), message)
+            except StaleElementReferenceException:
+                # The chat re-rendered since the input was cached; look it up again
+                method = self._send_with(self.get_message_input(refresh=True), message)
+            if not method:
                 print("Could not find message input box")
                 return False
             
-            # Send the message
-            message_input.click()
-            message_input.clear()
-            message_input.send_keys(message)
-            message_input.send_keys(Keys.ENTER)
-            
-            print(f"Sent: {message}")
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            print(f"Sent ({method}, {len(message)} chars, {elapsed_ms:.0f}ms): {message}")
             return True
             
         except Exception as e:
             print(f"Error sending message: {e}")
             # Try sending a simple fallback message
             try:
-                message_input = self.get_message_input()
+                message_input = self.get_message_input(refresh=True)
                 if message_input:
                     message_input.click()
                     message_input.clear()
@@ -146,8 +256,55 @@ class WhatsAppDriver:
                 pass
             return False
     
+    def _send_with(self, message_input: Optional[WebElement], message: str) -> Optional[str]:
+        """Fill the input box and press Enter; returns the insert method, None without a box"""
+        if message_input is None:
+            return None
+        message_input.click()
+        method = self._insert_message(message_input, message)
+        message_input.send_keys(Keys.ENTER)
+        return method
+    
+    def _insert_message(self, message_input, message: str) -> str:
+        """Put the message in the input box and return the method that worked
+        
+        The paste path inserts the whole text with one script call and
+        only counts when the box then holds exactly the message; send_keys
+        costs a key event per character and cannot type emoji.
+        """
+        if self.config.SEND_METHOD == "paste":
+            try:
+                if self.driver.execute_async_script(INSERT_TEXT_SCRIPT, message_input, message):
+                    return "paste"
+                print("Paste insert did not match the message, typing instead")
+            except Exception as e:
+                print(f"Paste insert failed, typing instead: {e}")
+        
+        message_input.clear()
+        self._type_message(message_input, sanitize_text(message))
+        return "keys"
+    
+    @staticmethod
+    def _type_message(message_input, message: str) -> None:
+        """Type a message, entering line breaks as Shift+Enter so it is not sent early"""
+        for index, line in enumerate(message.split("\n")):
+            if index:
+                message_input.send_keys(Keys.SHIFT + Keys.ENTER)
+            if line:
+                message_input.send_keys(line)
+    
     def get_latest_messages(self) -> List[Message]:
         """Get the latest messages from the chat with sender info"""
+        try:
+            # One execute_script call returns every message as a compact record
+            records = self.driver.execute_script(MESSAGE_SNAPSHOT_SCRIPT)
+            return self._records_to_messages(records or [])
+        except Exception as e:
+            print(f"Error in bulk message extraction, using element scan: {e}")
+            return self._scan_message_elements()
+    
+    def _scan_message_elements(self) -> List[Message]:
+        """Per-element message scan (one round trip per lookup); fallback only"""
         try:
             messages = []
             
@@ -196,6 +353,34 @@ class WhatsAppDriver:
             print(f"Error getting messages: {e}")
             return []
     
+    def install_message_observer(self) -> bool:
+        """Inject the MutationObserver into the open conversation pane"""
+        try:
+            installed = bool(self.driver.execute_script(MESSAGE_OBSERVER_SCRIPT))
+            if installed:
+                # Async waits must be allowed to outlive the longest push timeout
+                self.driver.set_script_timeout(self.config.PUSH_WAIT_TIMEOUT + 5)
+            return installed
+        except Exception as e:
+            print(f"Error installing message observer: {e}")
+            return False
+    
+    def wait_for_new_messages(self, timeout: float) -> Optional[List[Message]]:
+        """Block until the page observer reports new messages or the timeout elapses.
+        
+        Returns None when the observer is no longer attached (e.g. the chat pane
+        was re-rendered), so the caller can reinstall it or fall back to polling.
+        """
+        try:
+            records = self.driver.execute_async_script(MESSAGE_WAIT_SCRIPT, int(timeout * 1000))
+        except Exception as e:
+            print(f"Error waiting for message events: {e}")
+            return None
+        
+        if records is None:
+            return None
+        return self._records_to_messages(records)
+    
     def cleanup(self) -> None:
         """Clean up resources"""
         try:
@@ -0,0 +1,310 @@
+"""
+WhatsApp Web automation driver built on async Playwright
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, List, Optional, Tuple
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from config import Config
+from models import Message
+from driver_base import BaseWhatsAppDriver
+from page_scripts import (
+    MESSAGE_SNAPSHOT_SCRIPT, MESSAGE_OBSERVER_SCRIPT,
+    UNREAD_CHATS_SCRIPT, CHAT_ROW_SCRIPT, OPEN_CHAT_TITLE_SCRIPT, CHAT_STATUS_SCRIPT
+)
+
+# CSS equivalents of the Selenium driver's XPath selectors
+SEARCH_BOX_SELECTOR = ', '.join([
+    'div[contenteditable="true"][data-tab="3"]',
+    'div[role="textbox"][title="Search input textbox"]',
+    'div[contenteditable="true"][class*="x1hx0egp"]',
+    'div[aria-label="Search input textbox"]',
+])
+
+MESSAGE_INPUT_SELECTOR = ', '.join([
+    'div[contenteditable="true"][data-tab="10"][role="textbox"]',
+    'div[aria-label="Type a message"][contenteditable="true"]',
+    'div[contenteditable="true"][role="textbox"][spellcheck="true"]',
+    'div[data-lexical-editor="true"][contenteditable="true"]',
+])
+
+# Forward observer records to Python through the exposed CDP binding
+PUSH_BINDING = "__waBotPush"
+BIND_OBSERVER_SCRIPT = """
+const state = window.__waBot;
+if (!state) { return false; }
+state.waiter = function () { window.%s(state.queue.splice(0)); };
+if (state.queue.length) { state.waiter(); }
+return true;
+""" % PUSH_BINDING
+
+OBSERVER_ALIVE_SCRIPT = "return !!(window.__waBot && window.__waBot.pane.isConnected);"
+
+# Seconds to wait for the main interface when the search box never showed up
+LOGIN_FALLBACK_SECONDS = 10
+
+def _page_function(script: str) -> str:
+    """Wrap an execute_script style body so page.evaluate can call it"""
+    return "(args) => (function () {\n%s\n}).apply(null, args)" % script
+
+class PlaywrightWhatsAppDriver(BaseWhatsAppDriver):
+    """Handles WhatsApp Web automation with async Playwright
+    
+    Playwright keeps one persistent CDP connection to the browser instead of
+    an HTTP request per command, and pushes observer events through an
+    exposed binding. It runs on a private event loop thread; the synchronous
+    driver methods submit coroutines to it, so the bot can use either backend.
+    """
+    
+    def __init__(self, config: Config):
+        self.config = config
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="playwright", daemon=True)
+        self._thread.start()
+        
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self._events: Optional[asyncio.Queue] = None
+        self._run(self._setup(), timeout=2 * config.WEBDRIVER_TIMEOUT)
+    
+    def _run(self, coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the Playwright loop and wait for its result
+        
+        The wait is bounded by timeout, WEBDRIVER_TIMEOUT by default. A
+        coroutine still running then is cancelled so it cannot act later.
+        """
+        if timeout is None:
+            timeout = self.config.WEBDRIVER_TIMEOUT
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Browser call did not finish within {timeout}s") from None
+    
+    async def _setup(self) -> None:
+        """Launch Chromium and register the push binding"""
+        self._events = asyncio.Queue()
+        self._playwright = await async_playwright().start()
+        if self.config.CHROME_PROFILE_DIR:
+            # A persistent context keeps the WhatsApp session in the profile directory
+            self._context = await self._playwright.chromium.launch_persistent_context(
+                os.path.abspath(self.config.CHROME_PROFILE_DIR), headless=self.config.HEADLESS
+            )
+        else:
+            self._browser = await self._playwright.chromium.launch(headless=self.config.HEADLESS)
+            self._context = await self._browser.new_context()
+        await self._context.expose_binding(PUSH_BINDING, self._on_push)
+        self.page = self._context.pages[0] if self._context.pages else await self._context.new_page()
+        if self.config.HEADLESS:
+            # WhatsApp Web refuses user agents that announce headless Chrome
+            user_agent = (await self.page.evaluate("navigator.userAgent")).replace("HeadlessChrome", "Chrome")
+            cdp = await self._context.new_cdp_session(self.page)
+            await cdp.send("Network.setUserAgentOverride", {"userAgent": user_agent})
+        self.page.set_default_timeout(self.config.WEBDRIVER_TIMEOUT * 1000)
+    
+    async def _on_push(self, source, records: List[dict]) -> None:
+        """Receive message records pushed by the page observer"""
+        for record in records or []:
+            self._events.put_nowait(record)
+    
+    async def _evaluate(self, script: str, *args) -> Any:
+        """Evaluate an execute_script style body in the page"""
+        return await self.page.evaluate(_page_function(script), list(args))
+    
+    def login_whatsapp(self) -> bool:
+        """Open WhatsApp Web and wait for QR code scan"""
+        try:
+            if self.config.CHROME_PROFILE_DIR:
+                print("Waiting for WhatsApp to load (scan the QR code if this profile is not logged in yet)...")
+            else:
+                print("Please scan the QR code to login to WhatsApp Web...")
+                print("Waiting for WhatsApp to load completely...")
+            # Page load, chat list wait and the fallback each have their own bound
+            self._run(self._login(), timeout=(self.config.WEBDRIVER_TIMEOUT + self.config.LOGIN_TIMEOUT
+                                              + LOGIN_FALLBACK_SECONDS))
+            return True
+            
+        except Exception as e:
+            print(f"Error logging into WhatsApp: {e}")
+            print("Please make sure to scan the QR code quickly and have a stable internet connection.")
+            return False
+    
+    async def _login(self) -> None:
+        """Load WhatsApp Web and wait for the logged-in chat list"""
+        start_time = time.perf_counter()
+        await self.page.goto(self.config.WHATSAPP_URL, wait_until="domcontentloaded")
+        page_loaded = time.perf_counter()
+        try:
+            await self.page.wait_for_selector(SEARCH_BOX_SELECTOR, timeout=self.config.LOGIN_TIMEOUT * 1000)
+        except PlaywrightTimeoutError:
+            # Like the Selenium driver, carry on once the main interface had time to appear
+            print("Trying alternative login detection...")
+            try:
+                await self.page.wait_for_selector("#pane-side", timeout=LOGIN_FALLBACK_SECONDS * 1000)
+            except PlaywrightTimeoutError:
+                pass
+        print(f"WhatsApp loaded successfully! (page {page_loaded - start_time:.1f}s, "
+              f"chat list {time.perf_counter() - page_loaded:.1f}s)")
+    
+    def open_chat(self, contact_name: str) -> bool:
+        """Open the contact's chat from the chat list, or search for it"""
+        try:
+            print(f"Looking for contact: {contact_name}")
+            self._run(self._open_chat(contact_name), timeout=2 * self.config.WEBDRIVER_TIMEOUT)
+            print(f"Contact found and chat opened: {contact_name}")
+            return True
+            
+        except Exception as e:
+            print(f"Error opening chat: {e}")
+            return False
+    
+    async def _open_chat(self, contact_name: str) -> None:
+        """Click the chat list entry, searching for it when not visible"""
+        row = await self.page.evaluate_handle(_page_function(CHAT_ROW_SCRIPT), [contact_name])
+        element = row.as_element()
+        
+        if element is None:
+            # Not visible in the chat list: search for the contact
+            search_box = self.page.locator(SEARCH_BOX_SELECTOR).first
+            await search_box.click()
+            await self.page.keyboard.press("Control+A")
+            await self.page.keyboard.press("Backspace")
+            await self.page.keyboard.insert_text(contact_name)
+            element = await self.page.wait_for_selector(f'#pane-side span[title="{contact_name}"]')
+        
+        await element.click()
+        try:
+            await self.page.wait_for_function(
+                "(name) => (function () {%s}).apply(null, []) === name" % OPEN_CHAT_TITLE_SCRIPT,
+                arg=contact_name, timeout=5000
+            )
+        except PlaywrightTimeoutError:
+            pass
+    
+    def send_message(self, message: str) -> bool:
+        """Send a message in the current chat"""
+        try:
+            self._run(self._send(message), timeout=2 * self.config.WEBDRIVER_TIMEOUT)
+            print(f"Sent: {message}")
+            return True
+            
+        except Exception as e:
+            print(f"Error sending message: {e}")
+            return False
+    
+    async def _send(self, message: str) -> None:
+        """Type the message into the input box and press Enter"""
+        message_input = self.page.locator(MESSAGE_INPUT_SELECTOR).first
+        await message_input.click()
+        
+        # Enter would send early, so line breaks are typed as Shift+Enter
+        for index, line in enumerate(message.split("\n")):
+            if index:
+                await self.page.keyboard.press("Shift+Enter")
+            if line:
+                await self.page.keyboard.insert_text(line)
+        await self.page.keyboard.press("Enter")
+    
+    def get_latest_messages(self) -> List[Message]:
+        """Get the latest messages from the chat with sender info"""
+        try:
+            records = self._run(self._evaluate(MESSAGE_SNAPSHOT_SCRIPT))
+            return self._records_to_messages(records or [])
+        except Exception as e:
+            print(f"Error getting messages: {e}")
+            return []
+    
+    def install_message_observer(self) -> bool:
+        """Inject the MutationObserver and route its events to the push binding"""
+        try:
+            return self._run(self._install_observer())
+        except Exception as e:
+            print(f"Error installing message observer: {e}")
+            return False
+    
+    async def _install_observer(self) -> bool:
+        """Install the observer and point its waiter at the push binding"""
+        if not await self._evaluate(MESSAGE_OBSERVER_SCRIPT):
+            return False
+        return bool(await self._evaluate(BIND_OBSERVER_SCRIPT))
+    
+    def wait_for_new_messages(self, timeout: float) -> Optional[List[Message]]:
+        """Block until the observer pushes new messages or the timeout elapses"""
+        try:
+            records = self._run(self._next_events(timeout), timeout=timeout + self.config.WEBDRIVER_TIMEOUT)
+        except Exception as e:
+            print(f"Error waiting for message events: {e}")
+            return None
+        
+        if records is None:
+            return None
+        return self._records_to_messages(records)
+    
+    async def _next_events(self, timeout: float) -> Optional[List[dict]]:
+        """Wait for the first pushed record, then drain whatever else arrived"""
+        try:
+            records = [await asyncio.wait_for(self._events.get(), timeout)]
+        except asyncio.TimeoutError:
+            # Quiet period: make sure the observer is still attached to the chat
+            return [] if await self._evaluate(OBSERVER_ALIVE_SCRIPT) else None
+        
+        while not self._events.empty():
+            records.append(self._events.get_nowait())
+        return records
+    
+    def get_unread_chats(self) -> List[Tuple[str, int]]:
+        """Return (contact name, unread count) for chats with an unread badge"""
+        try:
+            chats = self._run(self._evaluate(UNREAD_CHATS_SCRIPT)) or []
+            return [(chat['name'], int(chat['unread'])) for chat in chats if chat.get('name')]
+        except Exception as e:
+            print(f"Error scanning unread chats: {e}")
+            return []
+    
+    def get_chat_status(self) -> str:
+        """Return the open chat's header status line, e.g. "typing…" """
+        try:
+            return self._run(self._evaluate(CHAT_STATUS_SCRIPT)) or ""
+        except Exception:
+            return ""
+    
+    def run_script(self, script: str, *args) -> Any:
+        """Run an execute_script style body in the page and return its result"""
+        return self._run(self._evaluate(script, *args))
+    
+    def cleanup(self) -> None:
+        """Clean up resources"""
+        try:
+            self._run(self._close())
+            print("Browser closed successfully")
+        except Exception as e:
+            print(f"Error during cleanup: {e}")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+    
+    async def _close(self) -> None:
+        """Close the context, browser and Playwright server"""
+        if self._context:
+            await self._context.close()
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+    
+    def is_driver_alive(self) -> bool:
+        """Check if the browser page is still open"""
+        try:
+            if self.page is None or self.page.is_closed():
+                return False
+            # A persistent context has no separate Browser object
+            return self._browser is None or self._browser.is_connected()
+        except Exception:
+            return False